@@ -1,20 +1,36 @@
-from flask import Flask, request, jsonify, Blueprint
+from flask import Flask, request, jsonify, Blueprint, Response, g, send_file
+import click
 from werkzeug.utils import secure_filename
-import os
+import threading
+import time
 from bson.objectid import ObjectId
-from collections import Counter
 from datetime import datetime, timedelta
 
 from backend.database import db_instance
 from backend.config import Config
+from backend.blobs import BlobStore
 from backend.nlp.parser import ResumeParser
-from backend.nlp.cleaner import TextCleaner
+from backend.nlp.document import PreparedDocument
 from backend.nlp.ner import EntityExtractor
 from backend.nlp.embedder import ResumeEmbedder
 from backend.matching.engine import MatchingEngine
+from backend.matching.index import build_index_from_collection, recall_at_k
+from backend.matching.cache import MatchCache, CANDIDATE_PROJECTION
+from backend.matching.batch import BatchRanker
+from backend.matching.snapshot import EmbeddingSnapshot
+from backend.matching.prefilter import build_posting_index, mandatory_query, backfill_skills_norm, backfill_job_skills_norm
 from backend.models.resume import ResumeModel
 from backend.models.job import JobModel
+from backend.models.vectors import encode_embedding, decode_embedding, migrate_collection, is_current
 from backend.nlp.summarizer import SmartSummarizer
+from backend.nlp.dedup import DuplicateDetector
+from backend.ingestion.pipeline import BulkIngestPipeline, allowed_file
+from backend.ingestion.tasks import TaskQueue
+from backend.ingestion.reembed import ReembedJob, EmbeddingUnavailable
+from backend.pagination import build_projection, list_response, stream_ndjson, InvalidListRequest
+from backend.analytics import AnalyticsCounters, aggregate_skill_distribution
+from backend.metrics import metrics, format_timing_header
+from backend.lazy import LazyProxy
 
 app = Flask(__name__)
 app.config.from_object(Config)
@@ -23,23 +39,370 @@ app.config.from_object(Config)
 from flask_cors import CORS
 CORS(app)
 
-# Initialize Global Components (Load models once)
-print("Initializing NLP Components...")
-extractor = EntityExtractor()
-embedder = ResumeEmbedder()
-print("Initialization Complete.")
+# Global Components are built on first use (Load models once), so a cold start
+# only pays for what the first request touches. See warm_up() to build them eagerly.
+def _load_extractor():
+    print("Initializing Entity Extractor...")
+    return EntityExtractor()
 
-# Connect to DB
-db = db_instance.get_db()
-resumes_col = db.resumes
-jobs_col = db.jobs
+def _load_embedder():
+    print("Initializing Embedder...")
+    return ResumeEmbedder()
+
+extractor = LazyProxy(_load_extractor, "extractor")
+embedder = LazyProxy(_load_embedder, "embedder")
+
+# DB connection is opened by the first query
+def _connect_db():
+    database = db_instance.get_db()
+    # Rebuild missing counters before anything can be written, or the first upload would be counted twice
+    AnalyticsCounters(database.stats).ensure(database.resumes, database.jobs)
+    return database
+
+db = LazyProxy(_connect_db, "db")
+resumes_col = LazyProxy(lambda: db.resumes, "resumes")
+jobs_col = LazyProxy(lambda: db.jobs, "jobs")
+imports_col = LazyProxy(lambda: db.imports, "imports")
+tasks_col = LazyProxy(lambda: db.tasks, "tasks")
+matches_col = LazyProxy(lambda: db.matches, "matches")
+shortlists_col = LazyProxy(lambda: db.shortlists, "shortlists")
+stats_col = LazyProxy(lambda: db.stats, "stats")
+checkpoints_col = LazyProxy(lambda: db.checkpoints, "checkpoints")
+
+# Precomputed per-job rankings, updated incrementally as resumes arrive
+match_cache = LazyProxy(lambda: MatchCache(matches_col, jobs_col, resumes_col), "match_cache")
+# Jobs for a candidate, and blocked all-jobs x all-candidates top K into the shortlists collection
+batch_ranker = LazyProxy(lambda: BatchRanker(jobs_col, resumes_col, shortlists_col), "batch_ranker")
+
+# Dashboard counters, updated incrementally at ingest (ensured when the DB connects)
+analytics = LazyProxy(lambda: AnalyticsCounters(stats_col), "analytics")
+
+# Uploaded originals, content-addressed and shared by identical uploads
+blob_store = LazyProxy(lambda: BlobStore(), "blob_store")
+
+# Vector index over resume embeddings (built on first use, kept current by uploads)
+vector_index = None
+snapshot = EmbeddingSnapshot() if Config.SNAPSHOT_ENABLED else None
+duplicate_detector = LazyProxy(lambda: DuplicateDetector(resumes_col), "duplicate_detector") if Config.DEDUP_ENABLED else None
+# Skill -> candidate bitmap postings for mandatory-skill prefiltering (built on first use)
+skill_postings = None
+
+def get_vector_index():
+    global vector_index
+    if vector_index is None:
+        vector_index = build_index_from_collection(resumes_col, snapshot=snapshot)
+    return vector_index
+
+def get_skill_postings():
+    global skill_postings
+    if skill_postings is None:
+        skill_postings = build_posting_index(resumes_col)
+    return skill_postings
+
+def qualified_candidates(mandatory_skills):
+    """
+    Canonical resumes having every mandatory skill, found through the posting index
+    (or the skills_norm multikey index) so only qualified candidates are loaded.
+    """
+    if Config.SKILL_PREFILTER == 'bitmap':
+        ids = [ObjectId(i) for i in get_skill_postings().candidates(mandatory_skills)]
+        return list(resumes_col.find({"_id": {"$in": ids}})) if ids else []
+    return list(resumes_col.find(mandatory_query(mandatory_skills)))
+
+def retrieve_candidates(job, top_k=None):
+    """
+    Candidate pool for a live (uncached) match.
+    """
+    mandatory_skills = job.get('mandatory_skills')
+    if mandatory_skills:
+        # Hard constraints first: only qualified candidates are scored
+        return qualified_candidates(mandatory_skills)
+    if top_k and is_current(job.get('embedding_meta')):
+        # Retrieve the nearest candidates from the vector index, then re-rank
+        # them with the full score so skill overlap can still reorder them
+        hits = get_vector_index().search(decode_embedding(job['embedding']), top_k * Config.INDEX_OVERSAMPLE)
+        hit_ids = [ObjectId(doc_id) for doc_id, _ in hits]
+        return list(resumes_col.find({"_id": {"$in": hit_ids}}))
+    return list(resumes_col.find(ResumeModel.CANONICAL))
+
+def rank_candidates(job, candidates, top_k=None):
+    """
+    Score, sort and summarize a candidate pool. returns: response entries, best first
+    """
+    results = []
+    
+    # Score the whole pool in one vectorized pass
+    with metrics.stage("match.score"):
+        scores = MatchingEngine.score_batch(job, candidates)
+    
+        # Sort by score desc, then summarize only the candidates we return
+        ranked = sorted(zip(candidates, scores), key=lambda x: x[1]['total_score'], reverse=True)
+        if top_k:
+            ranked = ranked[:top_k]
+    
+    with metrics.stage("match.summarize"):
+        for cand, score_data in ranked:
+            # Generate Smart Summary
+            summary = SmartSummarizer.generate_summary(cand, job, score_data)
+            
+            results.append({
+                "candidate_id": str(cand['_id']),
+                "filename": cand['filename'],
+                "skills": cand.get('skills', []),
+                "match_score": score_data['total_score'],
+                "details": score_data,
+                "summary": summary
+            })
+    return results
+
+def on_resumes_inserted(ids, embeddings, metas=None):
+    """
+    Keep derived state (vector index, snapshot, cached rankings) current after inserts.
+    ids: list of ObjectId
+    metas: embedding_meta per id (None = all current)
+    """
+    with metrics.stage("ingest.index"):
+        _update_derived_state(ids, embeddings, metas)
+
+def _update_derived_state(ids, embeddings, metas):
+    if metas is not None:
+        # Only current-version, non-fallback vectors are searchable
+        keep = [k for k, meta in enumerate(metas) if is_current(meta)]
+        vector_ids, vectors = [ids[k] for k in keep], [embeddings[k] for k in keep]
+    else:
+        vector_ids, vectors = ids, embeddings
+    if vector_index is not None and vector_ids:
+        vector_index.add([str(i) for i in vector_ids], vectors)
+    if skill_postings is not None:
+        for doc in resumes_col.find({"_id": {"$in": list(ids)}}, {"skills_norm": 1, "skills": 1}):
+            skill_postings.add(doc['_id'], doc.get('skills_norm') or doc.get('skills'))
+    if snapshot is not None:
+        snapshot.append(vector_ids, vectors)
+    if Config.MATCH_CACHE_ENABLED:
+        match_cache.add_candidates(ids)
+
+def analyze_text(raw_text):
+    """
+    Clean + NER: the CPU-bound part of ingestion after parsing. The text is
+    preprocessed once; dedup, embedding and storage reuse the same document.
+    returns: (PreparedDocument, entities)
+    """
+    with metrics.stage("upload.clean"):
+        document = PreparedDocument(raw_text)
+    with metrics.stage("upload.ner"):
+        entities = extractor.extract_document(document)
+    return document, entities
+
+def check_duplicate(document):
+    """
+    returns: (fingerprint, kind, canonical resume) - all None when dedup is disabled
+    """
+    if duplicate_detector is None:
+        return None, None, None
+    with metrics.stage("upload.dedup"):
+        fingerprint = duplicate_detector.fingerprint_document(document)
+        kind, canonical = duplicate_detector.find_duplicate(fingerprint)
+    if kind:
+        metrics.inc("duplicates", kind=kind)
+    return fingerprint, kind, canonical
+
+def exact_duplicate_result(canonical, entities):
+    return {
+        "resume_id": str(canonical['_id']),
+        "extracted_skills": entities.get('SKILL', []),
+        "duplicate": DuplicateDetector.EXACT
+    }
+
+def stored_result(resume_id, skills, duplicate_of):
+    return {
+        "resume_id": str(resume_id),
+        "extracted_skills": skills,
+        "duplicate": DuplicateDetector.NEAR if duplicate_of else None,
+        "duplicate_of": str(duplicate_of) if duplicate_of else None
+    }
+
+# Steps after a resume insert; queued ingests store the unfinished ones on the resume (ingest_pending)
+INGEST_STEPS = ("analytics", "duplicate_count", "derived")
+
+def resume_stored(resume_data, inserted_id, embedding, duplicate_of):
+    """
+    Counters and derived state after a resume insert. Only the steps still listed in
+    resume_data['ingest_pending'] (all of them when absent) run, and each one is pulled
+    from the stored resume once it succeeds, so a retried task replays just the rest.
+    returns: the ingestion result
+    """
+    pending = resume_data.get('ingest_pending', INGEST_STEPS)
+    for step in INGEST_STEPS:
+        if step not in pending:
+            continue
+        if step == "analytics":
+            analytics.record_resumes([resume_data])
+        elif step == "duplicate_count" and duplicate_of is not None:
+            # Collapsed into the canonical candidate for ranking
+            resumes_col.update_one({"_id": duplicate_of}, {"$inc": {"duplicate_count": 1}})
+        elif step == "derived" and duplicate_of is None:
+            on_resumes_inserted([inserted_id], [embedding], [resume_data['embedding_meta']])
+        if 'ingest_pending' in resume_data:
+            resumes_col.update_one({"_id": inserted_id}, {"$pull": {"ingest_pending": step}})
+    if resume_data.get('ingest_pending'):
+        resumes_col.update_one({"_id": inserted_id}, {"$unset": {"ingest_pending": ""}})
+    
+    return stored_result(inserted_id, resume_data['skills'], duplicate_of)
+
+def process_resume(source, filename, blob=None, resume_id=None):
+    """
+    Full ingestion of one resume. Used inline, parsing the upload stream, and by
+    the task queue, parsing the stored blob (asgi.py runs the same stages with async I/O).
+    source: upload stream or path; filename: original name (gives the format)
+    blob: BlobStore reference kept on the resume
+    resume_id: _id to store the resume under (assigned when an ingest task is queued)
+    """
+    # 1. Parse
+    with metrics.stage("upload.parse"):
+        raw_text = ResumeParser.parse(source, filename=filename)
+    # 2. Clean, 3. Extract Entities
+    document, entities = analyze_text(raw_text)
+    
+    # 4. Duplicate check: exact copies are not stored again, near-duplicates reuse the embedding
+    fingerprint, kind, canonical = check_duplicate(document)
+    if kind == DuplicateDetector.EXACT:
+        return exact_duplicate_result(canonical, entities)
+    duplicate_of, embedding, meta = None, None, None
+    if kind == DuplicateDetector.NEAR:
+        duplicate_of = canonical['_id']
+        if is_current(canonical.get('embedding_meta')):
+            embedding, meta = decode_embedding(canonical['embedding']).tolist(), canonical['embedding_meta']
+    
+    # 5. Embed
+    if embedding is None:
+        with metrics.stage("upload.embed"):
+            embedding, meta = embedder.embed(document.embedding_text)
+    
+    # 6. Save to DB
+    with metrics.stage("upload.insert"):
+        resume_data = ResumeModel.create(filename, document.raw, document.clean, entities, embedding, fingerprint, duplicate_of, meta, blob,
+                                         document.skills_norm)
+        if resume_id is not None:
+            resume_data['_id'] = resume_id
+            resume_data['ingest_pending'] = list(INGEST_STEPS)
+        result = resumes_col.insert_one(resume_data)
+    return resume_stored(resume_data, result.inserted_id, embedding, duplicate_of)
+
+def make_reembed_job(batch_size=None, rate=None):
+    return ReembedJob(embedder, {"jobs": jobs_col, "resumes": resumes_col}, checkpoints_col, batch_size, rate)
+
+def run_reembed(batch_size=None, rate=None):
+    """
+    Re-embed stale documents, then drop what was derived from the old vectors.
+    """
+    global vector_index
+    try:
+        return make_reembed_job(batch_size, rate).run()
+    finally:
+        # Re-embedded resumes become searchable, rankings are recomputed on next read
+        vector_index = None
+        if snapshot is not None:
+            snapshot.write_full(resumes_col)
+        if Config.MATCH_CACHE_ENABLED:
+            match_cache.invalidate_all()
+
+def ingest_payload(blob, filename):
+    # The resume _id is fixed when queued, so a retried task can tell its insert already happened
+    return {"blob": blob, "filename": filename, "resume_id": str(ObjectId())}
+
+def ingest_task(payload):
+    if 'blob' not in payload:
+        return process_resume(payload['file_path'], payload['filename'])  # queued before the blob store
+    blob = payload['blob']
+    resume_id = ObjectId(payload['resume_id']) if 'resume_id' in payload else None
+    if resume_id is not None:
+        stored = resumes_col.find_one({"_id": resume_id}, {"skills": 1, "upload_date": 1, "embedding": 1, "embedding_meta": 1,
+                                                           "duplicate_of": 1, "ingest_pending": 1})
+        if stored is not None:
+            stored.setdefault('ingest_pending', [])  # absent once every step finished
+            # An earlier attempt failed after the insert: finish its remaining steps instead of storing the resume twice
+            return resume_stored(stored, resume_id, decode_embedding(stored['embedding']), stored.get('duplicate_of'))
+    return process_resume(blob_store.path(blob['sha256']), payload['filename'], blob, resume_id)
+
+# Background ingestion queue (state kept in the tasks collection)
+def _load_task_queue():
+    queue = TaskQueue(tasks_col)
+    queue.register("ingest_resume", ingest_task)
+    queue.register("rank_job", lambda payload: {"ranked": match_cache.rebuild(jobs_col.find_one({"_id": ObjectId(payload['job_id'])}))})
+    queue.register("reembed", lambda payload: run_reembed(payload.get('batch_size'), payload.get('rate')))
+    queue.register("rank_all", lambda payload: batch_ranker.rank_all())
+    if Config.TASK_RECOVER_ON_START:
+        queue.recover()
+    return queue
+
+task_queue = LazyProxy(_load_task_queue, "task_queue")
+
+def schedule_ranking(job):
+    """
+    Batch rescore a new or edited job, in the background when the queue is enabled.
+    """
+    if not Config.MATCH_CACHE_ENABLED:
+        return
+    if Config.ASYNC_INGEST:
+        task_queue.enqueue("rank_job", {"job_id": str(job['_id'])})
+    else:
+        match_cache.rebuild(job)
+
+def warm_up(indexes=False):
+    """
+    Build every lazy component now instead of on the first request that needs it.
+    indexes: also build the vector index and skill posting index.
+    returns: {component: seconds}
+    """
+    timings = {}
+    for proxy in (db, extractor, embedder, match_cache, analytics, blob_store, duplicate_detector, task_queue):
+        if proxy is None:
+            continue
+        start = time.perf_counter()
+        proxy.resolve()
+        timings[proxy._name] = round(time.perf_counter() - start, 4)
+    if indexes:
+        for name, build in (("vector_index", get_vector_index), ("skill_postings", get_skill_postings)):
+            start = time.perf_counter()
+            build()
+            timings[name] = round(time.perf_counter() - start, 4)
+    return timings
+
+if Config.WARM_UP_ON_START:
+    # Warm in the background so importing the app (and the first health check) stays fast
+    threading.Thread(target=warm_up, kwargs={"indexes": Config.WARM_UP_INDEXES}, daemon=True).start()
 
 # Create API Blueprint
 api = Blueprint('api', __name__, url_prefix='/api')
 
-def allowed_file(filename):
-    return '.' in filename and \
-           filename.rsplit('.', 1)[1].lower() in Config.ALLOWED_EXTENSIONS
+def embedding_cache_gauges():
+    # Scraping metrics must not be what loads the embedder
+    if not embedder.is_loaded() or embedder.cache is None:
+        return []
+    stats = embedder.cache.stats()
+    return [("embedding_cache_" + key, {}, value) for key, value in stats.items() if isinstance(value, (int, float))]
+metrics.add_collector(embedding_cache_gauges)
+
+@api.before_request
+def start_timing():
+    if not metrics.enabled:
+        return
+    g.request_start = time.perf_counter()
+    if Config.METRICS_TIMING_HEADER or request.headers.get('X-Timing'):
+        metrics.start_request()
+
+@api.after_request
+def finish_timing(response):
+    if not metrics.enabled or 'request_start' not in g:
+        return response
+    endpoint = request.endpoint or 'unknown'
+    metrics.observe("request_seconds", time.perf_counter() - g.request_start, endpoint=endpoint)
+    if response.status_code >= 500:
+        metrics.inc("errors", endpoint=endpoint)
+    timings = metrics.finish_request()
+    if timings:
+        response.headers['X-Timing'] = format_timing_header(timings)
+    return response
 
 @api.route('/upload-resume', methods=['POST'])
 def upload_resume():
@@ -51,28 +414,27 @@ def upload_resume():
     
     if file and allowed_file(file.filename):
         filename = secure_filename(file.filename)
-        file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(file_path)
+        # Parsed straight from the upload stream; only the content-addressed original is written
+        stream = file.stream if file.stream.seekable() else ResumeParser.spool(file.stream)
         
         try:
-            # 1. Parse
-            raw_text = ResumeParser.parse(file_path)
-            # 2. Clean
-            clean_text = TextCleaner.clean_text(raw_text)
-            norm_text = TextCleaner.normalize_for_embedding(raw_text)
-            # 3. Extract Entities
-            entities = extractor.extract(clean_text)
-            # 4. Embed
-            embedding = embedder.get_embedding(norm_text)
-            
-            # 5. Save to DB
-            resume_data = ResumeModel.create(filename, raw_text, clean_text, entities, embedding)
-            result = resumes_col.insert_one(resume_data)
+            with metrics.stage("upload.save"):
+                blob = blob_store.put(stream)
+            if Config.ASYNC_INGEST:
+                task_id = task_queue.enqueue("ingest_resume", ingest_payload(blob, filename))
+                return jsonify({
+                    "message": "Resume queued for processing",
+                    "task_id": task_id,
+                    "status_url": f"/api/tasks/{task_id}"
+                }), 202
             
+            result = process_resume(stream, filename, blob)
             return jsonify({
                 "message": "Resume processed successfully",
-                "id": str(result.inserted_id),
-                "extracted_skills": entities.get('SKILL', [])
+                "id": result['resume_id'],
+                "extracted_skills": result['extracted_skills'],
+                "duplicate": result.get('duplicate'),
+                "duplicate_of": result.get('duplicate_of')
             }), 201
             
         except Exception as e:
@@ -80,24 +442,108 @@ def upload_resume():
             
     return jsonify({"error": "File type not allowed"}), 400
 
+@api.route('/upload-resumes', methods=['POST'])
+def upload_resumes():
+    """
+    Bulk import: multiple 'files' and/or zip archives. Returns per-file status;
+    progress of a running import can be polled at /api/imports/<import_id>.
+    """
+    files = request.files.getlist('files') + request.files.getlist('file')
+    if not files:
+        return jsonify({"error": "No file part"}), 400
+    if len(files) > Config.BULK_MAX_FILES:
+        return jsonify({"error": f"Import is limited to {Config.BULK_MAX_FILES} files"}), 400
+    
+    pipeline = BulkIngestPipeline(extractor, embedder, resumes_col, imports_col,
+                                  on_inserted=on_resumes_inserted, detector=duplicate_detector, stats=analytics,
+                                  blobs=blob_store)
+    try:
+        for f in files:
+            pipeline.add_upload(f)
+        results = pipeline.run()
+        
+        return jsonify({
+            "import_id": str(pipeline.import_id),
+            "total": len(results),
+            "succeeded": sum(1 for r in results if r['status'] == 'ok'),
+            "duplicates": sum(1 for r in results if r['status'] == 'duplicate'),
+            "failed": sum(1 for r in results if r['status'] == 'error'),
+            "files": results
+        }), 201
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    finally:
+        pipeline.close()
+
+@api.route('/imports', methods=['GET'])
+def list_imports():
+    imports = imports_col.find({}).sort("started_at", -1).limit(20)
+    res = []
+    for i in imports:
+        i['_id'] = str(i['_id'])
+        res.append(i)
+    return jsonify(res), 200
+
+@api.route('/imports/<import_id>', methods=['GET'])
+def get_import(import_id):
+    try:
+        status = imports_col.find_one({"_id": ObjectId(import_id)})
+        if not status:
+            return jsonify({"error": "Import not found"}), 404
+        
+        status['_id'] = str(status['_id'])
+        return jsonify(status), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@api.route('/tasks/<task_id>', methods=['GET'])
+def get_task(task_id):
+    try:
+        task = task_queue.get(task_id)
+        if not task:
+            return jsonify({"error": "Task not found"}), 404
+        
+        result = task.get('result') or {}
+        return jsonify({
+            "task_id": str(task['_id']),
+            "type": task['type'],
+            "status": task['status'],
+            "attempts": task.get('attempts', 0),
+            "resume_id": result.get('resume_id'),
+            "result": result,
+            "error": task.get('error'),
+            "created_at": task.get('created_at'),
+            "finished_at": task.get('finished_at')
+        }), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 @api.route('/add-job', methods=['POST'])
 def add_job():
     data = request.json
     title = data.get('title')
     description = data.get('description')
     required_skills = data.get('required_skills', []) # List of strings
+    mandatory_skills = data.get('mandatory_skills', []) # Candidates lacking any of these are never ranked
     
     if not title or not description:
         return jsonify({"error": "Title and description are required"}), 400
+    error = JobModel.invalid_skills(data)
+    if error:
+        return jsonify({"error": error}), 400
     
     try:
         # Generate embedding for job description + title
-        full_text = f"{title} {description}"
-        norm_text = TextCleaner.normalize_for_embedding(full_text)
-        embedding = embedder.get_embedding(norm_text)
+        document = PreparedDocument(f"{title} {description}", required_skills)
+        with metrics.stage("add_job.embed"):
+            embedding, meta = embedder.embed(document.embedding_text)
         
-        job_data = JobModel.create(title, description, required_skills, embedding)
-        result = jobs_col.insert_one(job_data)
+        with metrics.stage("add_job.insert"):
+            job_data = JobModel.create(title, description, required_skills, embedding, mandatory_skills, meta, document.skill_ids)
+            result = jobs_col.insert_one(job_data)
+            analytics.record_job()
+        with metrics.stage("add_job.rank"):
+            schedule_ranking(job_data)
         
         return jsonify({
             "message": "Job added successfully",
@@ -106,55 +552,266 @@ def add_job():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
-@api.route('/match-candidates/<job_id>', methods=['GET'])
-def match_candidates(job_id):
+@api.route('/jobs/<job_id>', methods=['PUT'])
+def update_job(job_id):
     try:
         job = jobs_col.find_one({"_id": ObjectId(job_id)})
         if not job:
             return jsonify({"error": "Job not found"}), 404
-            
-        candidates = list(resumes_col.find({}))
-        results = []
         
-        for cand in candidates:
-            score_data = MatchingEngine.calculate_score(cand, job)
+        data = request.json or {}
+        updates = {k: data[k] for k in ('title', 'description', 'required_skills', 'mandatory_skills') if k in data}
+        if not updates:
+            return jsonify({"error": "Nothing to update"}), 400
+        error = JobModel.invalid_skills(updates)
+        if error:
+            return jsonify({"error": error}), 400
+        
+        if 'title' in updates or 'description' in updates:
+            document = PreparedDocument(f"{updates.get('title', job['title'])} {updates.get('description', job['description'])}")
+            embedding, updates['embedding_meta'] = embedder.embed(document.embedding_text)
+            updates['embedding'] = encode_embedding(embedding)
+        if 'required_skills' in updates or 'mandatory_skills' in updates:
+            updates.update(JobModel.normalized_skills(updates.get('required_skills', job.get('required_skills')),
+                                                      updates.get('mandatory_skills', job.get('mandatory_skills'))))
+        
+        jobs_col.update_one({"_id": job['_id']}, {"$set": updates})
+        match_cache.invalidate(job['_id'])
+        batch_ranker.discard(job_ids=[job['_id']])
+        job.update(updates)
+        job.pop('ranked_at', None)
+        schedule_ranking(job)
+        
+        return jsonify({
+            "message": "Job updated successfully",
+            "id": job_id
+        }), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@api.route('/match-candidates/<job_id>', methods=['GET'])
+def match_candidates(job_id):
+    """
+    Ranked candidates for a job.
+    With MATCH_CACHE_ENABLED the stored ranking of the whole qualified pool is served and
+    ?top_k= only caps the page size (as ?limit= does); the vector index is not consulted.
+    Without the cache, ?top_k= retrieves the nearest top_k * INDEX_OVERSAMPLE candidates
+    from the vector index and re-ranks only those.
+    """
+    try:
+        with metrics.stage("match.load_job"):
+            job = jobs_col.find_one({"_id": ObjectId(job_id)})
+        if not job:
+            return jsonify({"error": "Job not found"}), 404
             
-            # Generate Smart Summary
-            summary = SmartSummarizer.generate_summary(cand, job, score_data)
+        top_k = request.args.get('top_k', type=int)
+        if Config.MATCH_CACHE_ENABLED:
+            # Serve the stored ranking (built once, then kept current incrementally)
+            offset = request.args.get('offset', 0, type=int)
+            limit = request.args.get('limit', type=int) or top_k  # top_k is just a page size here
+            if not match_cache.is_ranked(job):
+                with metrics.stage("match.rank"):
+                    match_cache.rebuild(job)
+            if request.args.get('format') == 'ndjson':
+                return stream_ndjson(match_cache.ranked(job, offset, limit))
+            with metrics.stage("match.cache_read"):
+                results, total = match_cache.page(job, offset, limit)
             
-            results.append({
-                "candidate_id": str(cand['_id']),
-                "filename": cand['filename'],
-                "skills": cand.get('skills', []),
+            return jsonify({
+                "job_title": job['title'],
+                "candidates": results,
+                "total": total,
+                "offset": offset,
+                "limit": limit
+            }), 200
+        
+        with metrics.stage("match.retrieve"):
+            candidates = retrieve_candidates(job, top_k)
+        results = rank_candidates(job, candidates, top_k)
+        
+        return jsonify({
+            "job_title": job['title'],
+            "candidates": results
+        }), 200
+        
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@api.route('/match-jobs/<candidate_id>', methods=['GET'])
+def match_jobs(candidate_id):
+    """
+    Best jobs for one candidate: every job scored against the candidate in one pass.
+    Jobs whose mandatory skills the candidate lacks are left out. ?top_k= limits the list.
+    """
+    try:
+        with metrics.stage("match_jobs.load_candidate"):
+            candidate = resumes_col.find_one({"_id": ObjectId(candidate_id)}, CANDIDATE_PROJECTION)
+        if not candidate:
+            return jsonify({"error": "Candidate not found"}), 404
+        
+        top_k = request.args.get('top_k', type=int)
+        with metrics.stage("match_jobs.score"):
+            ranked = batch_ranker.jobs_for_candidate(candidate, top_k)
+        
+        with metrics.stage("match_jobs.summarize"):
+            results = [{
+                "job_id": str(job['_id']),
+                "title": job['title'],
                 "match_score": score_data['total_score'],
                 "details": score_data,
-                "summary": summary
-            })
-            
-        # Sort by score desc
-        results.sort(key=lambda x: x['match_score'], reverse=True)
+                "summary": SmartSummarizer.generate_summary(candidate, job, score_data)
+            } for job, score_data in ranked]
         
+        return jsonify({
+            "candidate_id": candidate_id,
+            "filename": candidate['filename'],
+            "jobs": results
+        }), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@api.route('/rank-all', methods=['POST'])
+def rank_all():
+    """
+    Refresh every job's shortlist (e.g. nightly) in one blocked pass over all
+    jobs x all candidates; each job keeps its top BATCH_RANK_TOP_K candidates,
+    read back from /api/jobs/<job_id>/shortlist.
+    """
+    try:
+        if Config.ASYNC_INGEST:
+            task_id = task_queue.enqueue("rank_all", {})
+            return jsonify({
+                "message": "Batch ranking queued",
+                "task_id": task_id,
+                "status_url": f"/api/tasks/{task_id}"
+            }), 202
+        
+        return jsonify({"message": "Batch ranking finished", "result": batch_ranker.rank_all()}), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@api.route('/jobs/<job_id>/shortlist', methods=['GET'])
+def job_shortlist(job_id):
+    """
+    A job's top candidates from the last rank-all (empty until it has run).
+    """
+    try:
+        job = jobs_col.find_one({"_id": ObjectId(job_id)}, {"title": 1, "shortlisted_at": 1})
+        if not job:
+            return jsonify({"error": "Job not found"}), 404
+        
+        offset = request.args.get('offset', 0, type=int)
+        limit = request.args.get('limit', type=int)
+        results, total = batch_ranker.shortlist(job, offset, limit)
         return jsonify({
             "job_title": job['title'],
-            "candidates": results
+            "shortlisted_at": job.get('shortlisted_at'),
+            "candidates": results,
+            "total": total,
+            "offset": offset,
+            "limit": limit
         }), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@api.route('/index/recall', methods=['GET'])
+def index_recall():
+    """
+    Recall@k of the configured vector index against an exact flat search,
+    using job embeddings as queries. ?nprobe= tries another IVF probing for this
+    measurement only; searches keep using IVF_NPROBE.
+    """
+    try:
+        k = request.args.get('k', 10, type=int)
+        index = get_vector_index()
+        nprobe = request.args.get('nprobe', type=int) or getattr(index, 'nprobe', None)
+        
+        queries = [decode_embedding(j['embedding']) for j in jobs_col.find({}, {"embedding": 1}) if j.get('embedding')]
+        recall = recall_at_k(index, index.to_flat(), queries, k, nprobe)
         
+        return jsonify({
+            "backend": index.name,
+            "size": len(index),
+            "k": k,
+            "queries": len(queries),
+            "nprobe": nprobe,
+            "recall": round(recall, 4)
+        }), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@api.route('/reembed', methods=['POST'])
+def start_reembed():
+    """
+    Re-embed documents whose embedding is stale (another model / normalization version,
+    or a fallback vector). Resumes from the last checkpoint; queued when the task queue is on.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        payload = {k: data[k] for k in ('batch_size', 'rate') if k in data}
+        if Config.ASYNC_INGEST:
+            task_id = task_queue.enqueue("reembed", payload)
+            return jsonify({
+                "message": "Re-embedding queued",
+                "task_id": task_id,
+                "status_url": f"/api/tasks/{task_id}"
+            }), 202
+        
+        return jsonify({"message": "Re-embedding finished", "result": run_reembed(**payload)}), 200
+    except EmbeddingUnavailable as e:
+        return jsonify({"error": str(e)}), 503
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@api.route('/reembed', methods=['GET'])
+def reembed_status():
+    try:
+        return jsonify(make_reembed_job().status()), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@api.route('/metrics', methods=['GET'])
+def get_metrics():
+    """
+    Prometheus text format; ?format=json returns p50/p95/p99 per stage instead.
+    """
+    if request.args.get('format') == 'json':
+        return jsonify(metrics.snapshot()), 200
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@api.route('/warmup', methods=['GET', 'POST'])
+def warmup():
+    """
+    Build lazy components now (e.g. from a scheduled ping after deploy). ?indexes=true also builds indexes.
+    """
+    try:
+        indexes = request.args.get('indexes', 'false').lower() == 'true'
+        return jsonify({"warmed": warm_up(indexes)}), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@api.route('/embedding-cache/stats', methods=['GET'])
+def embedding_cache_stats():
+    if embedder.cache is None:
+        return jsonify({"enabled": False}), 200
+    stats = embedder.cache.stats()
+    stats["enabled"] = True
+    return jsonify(stats), 200
+
 @api.route('/candidates', methods=['GET'])
 def list_candidates():
-    candidates = resumes_col.find({}, {"embedding": 0, "text_raw": 0})
-    res = []
-    for c in candidates:
-        c['_id'] = str(c['_id'])
-        res.append(c)
-    return jsonify(res), 200
+    try:
+        projection = build_projection(["embedding", "text_raw", "minhash", "lsh_bands"], optional=["text_clean", "meta"])
+        return list_response(resumes_col, projection)
+    except InvalidListRequest as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
 
 @api.route('/candidates/<candidate_id>', methods=['GET'])
 def get_candidate(candidate_id):
     try:
-        candidate = resumes_col.find_one({"_id": ObjectId(candidate_id)}, {"embedding": 0})
+        candidate = resumes_col.find_one({"_id": ObjectId(candidate_id)}, {"embedding": 0, "minhash": 0, "lsh_bands": 0})
         if not candidate:
             return jsonify({"error": "Candidate not found"}), 404
         
@@ -163,40 +820,177 @@ def get_candidate(candidate_id):
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@api.route('/candidates/<candidate_id>/file', methods=['GET'])
+def get_candidate_file(candidate_id):
+    """
+    The uploaded original, served from the blob store.
+    """
+    try:
+        candidate = resumes_col.find_one({"_id": ObjectId(candidate_id)}, {"filename": 1, "blob": 1})
+        if not candidate:
+            return jsonify({"error": "Candidate not found"}), 404
+        blob = candidate.get('blob')
+        if not blob or not blob_store.exists(blob['sha256']):
+            return jsonify({"error": "Original file not stored"}), 404
+        return send_file(blob_store.open(blob['sha256']), download_name=candidate['filename'], as_attachment=True)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@api.route('/candidates/<candidate_id>', methods=['DELETE'])
+def delete_candidate(candidate_id):
+    try:
+        oid = ObjectId(candidate_id)
+        deleted = resumes_col.find_one_and_delete({"_id": oid}, {"skills": 1, "upload_date": 1, "duplicate_of": 1})
+        if deleted is None:
+            return jsonify({"error": "Candidate not found"}), 404
+        if deleted.get('duplicate_of') is not None:
+            resumes_col.update_one({"_id": deleted['duplicate_of']}, {"$inc": {"duplicate_count": -1}})
+        
+        analytics.remove_resume(deleted)
+        matches_col.delete_many({"candidate_id": candidate_id})
+        batch_ranker.discard(candidate_ids=[candidate_id])
+        if vector_index is not None:
+            vector_index.remove([candidate_id])
+        if skill_postings is not None:
+            skill_postings.remove([candidate_id])
+        if snapshot is not None:
+            snapshot.delete([oid])
+        
+        # Promote the oldest near-duplicate (if any) to be the new canonical resume
+        children = list(resumes_col.find({"duplicate_of": oid}, {"embedding": 1, "embedding_meta": 1}).sort("_id", 1))
+        if children:
+            heir = children[0]
+            resumes_col.update_one({"_id": heir['_id']}, {"$unset": {"duplicate_of": ""},
+                                                          "$set": {"duplicate_count": len(children) - 1}})
+            resumes_col.update_many({"duplicate_of": oid}, {"$set": {"duplicate_of": heir['_id']}})
+            on_resumes_inserted([heir['_id']], [decode_embedding(heir['embedding'])], [heir.get('embedding_meta')])
+        
+        return jsonify({"message": "Candidate deleted", "id": candidate_id}), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 @api.route('/jobs', methods=['GET'])
 def list_jobs():
-    jobs = jobs_col.find({}, {"embedding": 0})
-    res = []
-    for j in jobs:
-        j['_id'] = str(j['_id'])
-        res.append(j)
-    return jsonify(res), 200
+    try:
+        projection = build_projection(["embedding"])
+        return list_response(jobs_col, projection, sort_fields=('_id', 'created_at'))
+    except InvalidListRequest as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
 
 @api.route('/analytics', methods=['GET'])
 def get_analytics():
+    """
+    Dashboard summary from the pre-aggregated counters (constant time).
+    ?source=aggregate computes the skill distribution live with a MongoDB pipeline instead.
+    """
     try:
+        source = request.args.get('source', Config.ANALYTICS_SOURCE)
         # 1. Skill Distribution (Top 10)
-        all_resumes = list(resumes_col.find({}, {"skills": 1, "upload_date": 1}))
-        all_skills = []
-        for r in all_resumes:
-            all_skills.extend(r.get('skills', []))
-        
-        skill_counts = Counter(all_skills).most_common(10)
+        if source == 'aggregate':
+            skill_distribution = aggregate_skill_distribution(resumes_col, 10)
+        else:
+            skill_distribution = analytics.top_skills(10)
         
         # 2. Activity / Stats
-        total_candidates = len(all_resumes)
-        total_jobs = jobs_col.count_documents({})
+        total_candidates, total_jobs = analytics.totals()
         
         return jsonify({
-            "skill_distribution": [{"name": s[0], "value": s[1]} for s in skill_counts],
+            "skill_distribution": skill_distribution,
             "total_candidates": total_candidates,
-            "total_jobs": total_jobs
+            "total_jobs": total_jobs,
+            "source": source
         }), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@api.route('/analytics/uploads', methods=['GET'])
+def uploads_per_day():
+    try:
+        days = min(request.args.get('days', 30, type=int), 366)
+        return jsonify({"days": analytics.uploads_per_day(days)}), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@api.route('/analytics/skill-trends', methods=['GET'])
+def skill_trends():
+    """
+    Daily uploads per skill: ?skills=python,docker (default: current top 5) &days=30
+    """
+    try:
+        days = min(request.args.get('days', 30, type=int), 366)
+        skills = [s.strip() for s in request.args.get('skills', '').split(',') if s.strip()]
+        return jsonify({"trends": analytics.skill_trends(skills, days)}), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@api.route('/analytics/jobs/<job_id>/skills', methods=['GET'])
+def job_skill_supply(job_id):
+    try:
+        job = jobs_col.find_one({"_id": ObjectId(job_id)}, {"required_skills": 1, "mandatory_skills": 1, "title": 1})
+        if not job:
+            return jsonify({"error": "Job not found"}), 404
+        
+        limit = request.args.get('limit', 10, type=int)
+        return jsonify({"job_title": job['title'], "skills": analytics.job_skills(job, limit)}), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 # Register Blueprint
 app.register_blueprint(api)
 
+@app.cli.command('migrate-embeddings')
+@click.option('--storage', type=click.Choice(['float32', 'int8']), default=None,
+              help="Target format (defaults to Config.EMBEDDING_STORAGE)")
+def migrate_embeddings(storage):
+    """Convert list-format embeddings to packed binary."""
+    for name, col in (("resumes", resumes_col), ("jobs", jobs_col)):
+        count = migrate_collection(col, storage)
+        print(f"Migrated {count} {name} embeddings")
+
+@app.cli.command('rebuild-stats')
+def rebuild_stats():
+    """Recompute the analytics counters from the resumes and jobs collections."""
+    candidates, jobs = analytics.rebuild(resumes_col, jobs_col)
+    print(f"Rebuilt analytics counters: {candidates} candidates, {jobs} jobs")
+
+@app.cli.command('backfill-skills')
+def backfill_skills():
+    """Add normalized skill ids to resumes and jobs stored before they were kept on the document."""
+    count = backfill_skills_norm(resumes_col)
+    print(f"Backfilled skills_norm on {count} resumes")
+    count = backfill_job_skills_norm(jobs_col)
+    print(f"Backfilled required/mandatory skills_norm on {count} jobs")
+
+@app.cli.command('reembed')
+@click.option('--batch-size', type=int, default=None, help="Documents per embedding call / bulk write")
+@click.option('--rate', type=float, default=None, help="Max documents per second (0 = unthrottled)")
+def reembed(batch_size, rate):
+    """Re-embed stale embeddings. Re-run to continue after a crash or pause."""
+    try:
+        summary = run_reembed(batch_size, rate)
+    except EmbeddingUnavailable as e:
+        print(f"{e}. Progress is checkpointed; run again when the endpoint is back.")
+        return
+    for name, result in summary.items():
+        print(f"Re-embedded {result['updated']} of {result['processed']} stale {name} ({result['failed']} fell back, left stale)")
+
+@app.cli.command('rank-all')
+@click.option('--top-k', type=int, default=None, help="Candidates stored per job (defaults to BATCH_RANK_TOP_K)")
+@click.option('--workers', type=int, default=None, help="Worker processes (defaults to BATCH_RANK_WORKERS)")
+def rank_all_command(top_k, workers):
+    """Rank every candidate for every job and store each job's top K."""
+    ranker = BatchRanker(jobs_col, resumes_col, shortlists_col, top_k=top_k, workers=workers)
+    summary = ranker.rank_all()
+    print(f"Ranked {summary['candidates']} candidates for {summary['jobs']} jobs in {summary['seconds']}s "
+          f"({summary['stored']} shortlist entries stored, {summary['workers']} worker(s))")
+
+@app.cli.command('purge-blobs')
+def purge_blobs():
+    """Delete expired (BLOB_RETENTION_DAYS) and unreferenced originals from the blob store."""
+    counts = blob_store.purge(resumes_col)
+    print(f"Purged {counts['expired']} expired and {counts['orphaned']} unreferenced blobs ({counts['kept']} kept)")
+
 if __name__ == '__main__':
     app.run(debug=True, port=5000)
@@ -0,0 +1,371 @@
+"""
+Async serving mode:
+
+    uvicorn asgi:application --port 5000
+
+Upload, add-job and match run as coroutines: Mongo through AsyncMongoClient,
+embeddings through the async HTTP client, and parsing / NER / scoring in
+executors, so a request waiting on I/O doesn't hold a worker thread. Every
+other route is served by the Flask app (app.py) through asgiref's WsgiToAsgi
+adapter, which streams its responses, so both modes expose the same API.
+"""
+import asyncio
+import re
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from asgiref.sync import ThreadSensitiveContext
+from asgiref.wsgi import WsgiToAsgi
+from bson.objectid import ObjectId
+from werkzeug.utils import secure_filename
+from werkzeug.wrappers import Request
+
+import app as app_module
+from backend.config import Config
+from backend.database import db_instance
+from backend.ingestion.pipeline import allowed_file, parse_one
+from backend.lazy import LazyProxy, resolve
+from backend.metrics import metrics
+from backend.models.job import JobModel
+from backend.models.resume import ResumeModel
+from backend.models.vectors import decode_embedding, is_current
+from backend.nlp.document import PreparedDocument
+from backend.nlp.dedup import DuplicateDetector
+from backend.nlp.parser import ResumeParser
+
+flask_app = app_module.app
+# The Flask routes, response iterables (NDJSON / JSON array listings) sent chunk by chunk
+wsgi_app = WsgiToAsgi(flask_app)
+# Each Flask request runs on its own thread (ThreadSensitiveContext), at most ASYNC_WSGI_THREADS at once
+wsgi_slots = asyncio.Semaphore(Config.ASYNC_WSGI_THREADS)
+
+cpu_executor = ThreadPoolExecutor(Config.ASYNC_CPU_WORKERS, thread_name_prefix="cpu")
+
+def _load_parse_pool():
+    from concurrent.futures import ProcessPoolExecutor
+    return ProcessPoolExecutor(max_workers=Config.ASYNC_PARSE_PROCESSES)
+
+parse_pool = LazyProxy(_load_parse_pool, "parse_pool") if Config.ASYNC_PARSE_PROCESSES > 0 else None
+
+async def run_cpu(fn, *args):
+    return await asyncio.get_running_loop().run_in_executor(cpu_executor, fn, *args)
+
+async def component(proxy):
+    """
+    A lazy component from app.py, built off the event loop the first time.
+    """
+    if not proxy.is_loaded():
+        await asyncio.to_thread(proxy.resolve)
+    return resolve(proxy)
+
+async def async_db():
+    # The sync connection goes first: it picks MongoDB or the mongomock fallback and ensures the counters
+    await component(app_module.db)
+    return db_instance.get_async_db()
+
+# --- Native async routes ---
+
+async def process_resume(stream, filename, blob):
+    """
+    app.process_resume with the parse / NER stages in executors and awaited embedding + insert.
+    The upload stream is parsed in memory on the CPU threads; a process pool parses the stored blob.
+    """
+    loop = asyncio.get_running_loop()
+    with metrics.stage("upload.parse"):
+        if parse_pool is not None:
+            blob_store = await component(app_module.blob_store)
+            raw_text, error = await loop.run_in_executor(resolve(parse_pool), parse_one, blob_store.path(blob['sha256']), filename)
+        else:
+            raw_text, error = await run_cpu(parse_one, stream, filename)
+    if error:
+        raise ValueError(error)
+    await component(app_module.extractor)
+    document, entities = await run_cpu(app_module.analyze_text, raw_text)
+
+    fingerprint, kind, canonical = await asyncio.to_thread(app_module.check_duplicate, document)
+    if kind == DuplicateDetector.EXACT:
+        return app_module.exact_duplicate_result(canonical, entities)
+    duplicate_of, embedding, meta = None, None, None
+    if kind == DuplicateDetector.NEAR:
+        duplicate_of = canonical['_id']
+        if is_current(canonical.get('embedding_meta')):
+            embedding, meta = decode_embedding(canonical['embedding']).tolist(), canonical['embedding_meta']
+
+    if embedding is None:
+        embedder = await component(app_module.embedder)
+        with metrics.stage("upload.embed"):
+            embedding, meta = await embedder.aembed(document.embedding_text)
+
+    db = await async_db()
+    with metrics.stage("upload.insert"):
+        resume_data = ResumeModel.create(filename, document.raw, document.clean, entities, embedding, fingerprint, duplicate_of, meta, blob,
+                                         document.skills_norm)
+        result = await db.resumes.insert_one(resume_data)
+    return await asyncio.to_thread(app_module.resume_stored, resume_data, result.inserted_id, embedding, duplicate_of)
+
+async def upload_resume(request):
+    files = await asyncio.to_thread(lambda: request.files)  # multipart parsing
+    if 'file' not in files:
+        return {"error": "No file part"}, 400
+    file = files['file']
+    if file.filename == '':
+        return {"error": "No selected file"}, 400
+    if not allowed_file(file.filename):
+        return {"error": "File type not allowed"}, 400
+
+    filename = secure_filename(file.filename)
+    stream = file.stream if file.stream.seekable() else ResumeParser.spool(file.stream)
+
+    try:
+        blob_store = await component(app_module.blob_store)
+        with metrics.stage("upload.save"):
+            blob = await asyncio.to_thread(blob_store.put, stream)
+        if Config.ASYNC_INGEST:
+            task_queue = await component(app_module.task_queue)
+            task_id = await asyncio.to_thread(task_queue.enqueue, "ingest_resume", app_module.ingest_payload(blob, filename))
+            return {
+                "message": "Resume queued for processing",
+                "task_id": task_id,
+                "status_url": f"/api/tasks/{task_id}"
+            }, 202
+
+        result = await process_resume(stream, filename, blob)
+        return {
+            "message": "Resume processed successfully",
+            "id": result['resume_id'],
+            "extracted_skills": result['extracted_skills'],
+            "duplicate": result.get('duplicate'),
+            "duplicate_of": result.get('duplicate_of')
+        }, 201
+    except Exception as e:
+        return {"error": str(e)}, 500
+
+async def add_job(request):
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return {"error": "Request body must be a JSON object"}, 415
+    title = data.get('title')
+    description = data.get('description')
+    required_skills = data.get('required_skills', [])
+    mandatory_skills = data.get('mandatory_skills', [])
+
+    if not title or not description:
+        return {"error": "Title and description are required"}, 400
+    error = JobModel.invalid_skills(data)
+    if error:
+        return {"error": error}, 400
+
+    try:
+        document = PreparedDocument(f"{title} {description}", required_skills)
+        embedder = await component(app_module.embedder)
+        with metrics.stage("add_job.embed"):
+            embedding, meta = await embedder.aembed(document.embedding_text)
+
+        db = await async_db()
+        with metrics.stage("add_job.insert"):
+            job_data = JobModel.create(title, description, required_skills, embedding, mandatory_skills, meta, document.skill_ids)
+            result = await db.jobs.insert_one(job_data)
+            await asyncio.to_thread(app_module.analytics.record_job)
+        with metrics.stage("add_job.rank"):
+            await run_cpu(app_module.schedule_ranking, job_data)
+
+        return {
+            "message": "Job added successfully",
+            "id": str(result.inserted_id)
+        }, 201
+    except Exception as e:
+        return {"error": str(e)}, 500
+
+async def match_candidates(request, job_id):
+    if request.args.get('format') == 'ndjson':
+        return None  # streamed by the Flask route
+    try:
+        db = await async_db()
+        with metrics.stage("match.load_job"):
+            job = await db.jobs.find_one({"_id": ObjectId(job_id)})
+        if not job:
+            return {"error": "Job not found"}, 404
+
+        top_k = request.args.get('top_k', type=int)
+        if Config.MATCH_CACHE_ENABLED:
+            offset = request.args.get('offset', 0, type=int)
+            limit = request.args.get('limit', type=int) or top_k
+            match_cache = await component(app_module.match_cache)
+            if not match_cache.is_ranked(job):
+                with metrics.stage("match.rank"):
+                    await run_cpu(match_cache.rebuild, job)
+            with metrics.stage("match.cache_read"):
+                results, total = await match_cache.apage(job, offset, limit, db.matches)
+
+            return {
+                "job_title": job['title'],
+                "candidates": results,
+                "total": total,
+                "offset": offset,
+                "limit": limit
+            }, 200
+
+        with metrics.stage("match.retrieve"):
+            if job.get('mandatory_skills') or top_k:
+                # Posting / vector index lookups live in the sync app
+                candidates = await asyncio.to_thread(app_module.retrieve_candidates, job, top_k)
+            else:
+                candidates = await db.resumes.find(ResumeModel.CANONICAL).to_list()
+        results = await run_cpu(app_module.rank_candidates, job, candidates, top_k)
+
+        return {
+            "job_title": job['title'],
+            "candidates": results
+        }, 200
+    except Exception as e:
+        return {"error": str(e)}, 500
+
+ROUTES = [
+    ("POST", re.compile(r"^/api/upload-resume$"), upload_resume),
+    ("POST", re.compile(r"^/api/add-job$"), add_job),
+    ("GET", re.compile(r"^/api/match-candidates/([^/]+)$"), match_candidates),
+]
+
+# --- ASGI plumbing ---
+
+async def read_body(receive):
+    """
+    Request body as a file object, spooled to disk above ASYNC_SPOOL_BYTES.
+    """
+    body = tempfile.SpooledTemporaryFile(max_size=Config.ASYNC_SPOOL_BYTES)
+    more = True
+    while more:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            body.close()
+            return None
+        body.write(message.get("body", b""))
+        more = message.get("more_body", False)
+    body.seek(0)
+    return body
+
+def build_environ(scope, body):
+    """
+    WSGI environ for an ASGI http scope (parsed by werkzeug's Request in the native routes).
+    """
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf-8").decode("latin-1"),
+        "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": client[0],
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": body,
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+    }
+    for name, value in scope.get("headers", []):
+        name = name.decode("latin-1")
+        value = value.decode("latin-1")
+        if name == "content-type":
+            environ["CONTENT_TYPE"] = value
+        elif name == "content-length":
+            environ["CONTENT_LENGTH"] = value
+        else:
+            key = "HTTP_" + name.upper().replace("-", "_")
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+def replay(body):
+    """
+    ASGI receive callable handing back a request body that was already read.
+    """
+    sent = False
+    async def receive():
+        nonlocal sent
+        if sent:
+            return {"type": "http.disconnect"}
+        sent = True
+        return {"type": "http.request", "body": body.read(), "more_body": False}
+    return receive
+
+async def call_wsgi(scope, receive, send):
+    """
+    Serve one request with the Flask app.
+    """
+    async with wsgi_slots:
+        async with ThreadSensitiveContext():
+            await wsgi_app(scope, receive, send)
+
+async def send_response(send, status, headers, content):
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in headers],
+    })
+    await send({"type": "http.response.body", "body": content})
+
+async def send_json(send, payload, status):
+    content = flask_app.json.dumps(payload).encode("utf-8")
+    headers = [("Content-Type", "application/json"), ("Content-Length", str(len(content))),
+               ("Access-Control-Allow-Origin", "*")]  # as flask-cors does for the Flask routes
+    await send_response(send, status, headers, content)
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await shutdown()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+async def shutdown():
+    embedder = app_module.embedder
+    if embedder.is_loaded() and getattr(embedder, "async_client", None) is not None:
+        await embedder.async_client.close()
+    cpu_executor.shutdown(wait=False)
+    if parse_pool is not None and parse_pool.is_loaded():
+        parse_pool.shutdown(wait=False)
+
+async def application(scope, receive, send):
+    if scope["type"] == "lifespan":
+        await lifespan(receive, send)
+        return
+    if scope["type"] != "http":
+        return
+
+    for method, pattern, handler in ROUTES:
+        match = pattern.match(scope["path"])
+        if not match or scope["method"] != method:
+            continue
+        body = await read_body(receive)
+        if body is None:
+            return
+        try:
+            start = time.perf_counter()
+            try:
+                response = await handler(Request(build_environ(scope, body)), *match.groups())
+            except Exception as e:
+                response = {"error": str(e)}, 500
+            if response is None:
+                # Left to the Flask route (e.g. a streamed variant): hand it the body already read
+                body.seek(0)
+                await call_wsgi(scope, replay(body), send)
+                return
+            payload, status = response
+            endpoint = f"api.{handler.__name__}"
+            metrics.observe("request_seconds", time.perf_counter() - start, endpoint=endpoint)
+            if status >= 500:
+                metrics.inc("errors", endpoint=endpoint)
+            await send_json(send, payload, status)
+            return
+        finally:
+            body.close()
+
+    await call_wsgi(scope, receive, send)
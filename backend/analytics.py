@@ -0,0 +1,157 @@
+from collections import Counter
+from datetime import datetime, timedelta
+from pymongo import ASCENDING, DESCENDING
+
+from backend.database import bulk_update
+
+TOTALS_ID = "totals"
+
+def day_key(when):
+    return when.strftime('%Y-%m-%d')
+
+def skill_key(name):
+    return name.strip().lower()
+
+def last_days(days):
+    today = datetime.utcnow().date()
+    return [day_key(today - timedelta(days=offset)) for offset in range(days - 1, -1, -1)]
+
+class AnalyticsCounters:
+    """
+    Pre-aggregated dashboard counters in the `stats` collection, kept current with
+    $inc at ingest so dashboard reads never scan the resumes collection.
+
+    Documents:
+      {_id: "totals", candidates, jobs}
+      {_id: "skill:<key>", type: "skill", key, name, count}            current pool
+      {_id: "day:<date>", type: "day", date, uploads}                  upload events
+      {_id: "day_skill:<date>:<key>", type: "day_skill", date, key, name, count}
+    Skill names live in values, not field names, because they may contain dots (node.js).
+    Deleting a resume lowers the pool counters; the daily upload history is kept.
+    """
+    def __init__(self, stats_col):
+        self.stats_col = stats_col
+        self.stats_col.create_index([("type", ASCENDING), ("count", DESCENDING)])
+        self.stats_col.create_index([("type", ASCENDING), ("key", ASCENDING), ("date", ASCENDING)])
+        self.stats_col.create_index([("type", ASCENDING), ("date", ASCENDING)])
+
+    @staticmethod
+    def _skills(doc):
+        # One count per resume and skill, keyed case-insensitively
+        skills = {}
+        for name in doc.get('skills', []):
+            if name and name.strip():
+                skills.setdefault(skill_key(name), name)
+        return skills
+
+    def _resume_updates(self, doc, sign, history=True):
+        updates = [({"_id": TOTALS_ID}, {"$inc": {"candidates": sign}})]
+        day = day_key(doc.get('upload_date') or datetime.utcnow())
+        if history:
+            updates.append(({"_id": f"day:{day}"}, {"$inc": {"uploads": sign}, "$set": {"type": "day", "date": day}}))
+        for key, name in self._skills(doc).items():
+            updates.append(({"_id": f"skill:{key}"},
+                            {"$inc": {"count": sign}, "$set": {"type": "skill", "key": key, "name": name}}))
+            if history:
+                updates.append(({"_id": f"day_skill:{day}:{key}"},
+                                {"$inc": {"count": sign}, "$set": {"type": "day_skill", "date": day, "key": key, "name": name}}))
+        return updates
+
+    def record_resumes(self, docs):
+        """
+        Count newly stored resumes (documents with skills and upload_date).
+        """
+        updates = []
+        for doc in docs:
+            updates.extend(self._resume_updates(doc, 1))
+        bulk_update(self.stats_col, updates, upsert=True)
+
+    def remove_resume(self, doc):
+        bulk_update(self.stats_col, self._resume_updates(doc, -1, history=False), upsert=True)
+
+    def record_job(self, sign=1):
+        self.stats_col.update_one({"_id": TOTALS_ID}, {"$inc": {"jobs": sign}}, upsert=True)
+
+    def totals(self):
+        totals = self.stats_col.find_one({"_id": TOTALS_ID}) or {}
+        return totals.get('candidates', 0), totals.get('jobs', 0)
+
+    def top_skills(self, limit=10):
+        cursor = self.stats_col.find({"type": "skill", "count": {"$gt": 0}}, {"name": 1, "count": 1}) \
+            .sort([("count", DESCENDING), ("_id", ASCENDING)]).limit(limit)
+        return [{"name": doc['name'], "value": doc['count']} for doc in cursor]
+
+    def uploads_per_day(self, days=30):
+        dates = last_days(days)
+        found = {doc['date']: doc.get('uploads', 0)
+                 for doc in self.stats_col.find({"type": "day", "date": {"$gte": dates[0]}}, {"date": 1, "uploads": 1})}
+        return [{"date": date, "uploads": found.get(date, 0)} for date in dates]
+
+    def skill_trends(self, skills=None, days=30):
+        """
+        Daily upload counts per skill. Defaults to the current top 5 skills.
+        returns: {skill name: [{"date", "count"}, ...]}
+        """
+        if not skills:
+            skills = [s['name'] for s in self.top_skills(5)]
+        keys = [skill_key(s) for s in skills]
+        dates = last_days(days)
+        found = {}
+        query = {"type": "day_skill", "key": {"$in": keys}, "date": {"$gte": dates[0]}}
+        for doc in self.stats_col.find(query, {"key": 1, "date": 1, "count": 1}):
+            found[(doc['key'], doc['date'])] = doc.get('count', 0)
+        return {name: [{"date": date, "count": found.get((key, date), 0)} for date in dates]
+                for name, key in zip(skills, keys)}
+
+    def job_skills(self, job, limit=10):
+        """
+        Supply of a job's required and mandatory skills in the candidate pool, most common first.
+        """
+        names = {}
+        for name in job.get('mandatory_skills', []) + job.get('required_skills', []):
+            names.setdefault(skill_key(name), name)
+        counts = {doc['key']: doc.get('count', 0)
+                  for doc in self.stats_col.find({"_id": {"$in": [f"skill:{k}" for k in names]}}, {"key": 1, "count": 1})}
+        total, _ = self.totals()
+        rows = [{"name": name, "candidates": counts.get(key, 0),
+                 "share": round(counts.get(key, 0) / total, 4) if total else 0.0}
+                for key, name in names.items()]
+        rows.sort(key=lambda r: r['candidates'], reverse=True)
+        return rows[:limit]
+
+    def rebuild(self, resumes_col, jobs_col):
+        """
+        Recompute every counter with one pass over the resumes (first start, or repair).
+        Each counter document is overwritten with its recomputed values ($set, upsert) and
+        only then are stale ones removed, so dashboards never read an emptied collection.
+        """
+        counts, fields = {}, {}
+        for doc in resumes_col.find({}, {"skills": 1, "upload_date": 1}):
+            for query, update in self._resume_updates(doc, 1):
+                counts.setdefault(query["_id"], Counter()).update(update["$inc"])
+                fields[query["_id"]] = update.get("$set", {})
+        counts.setdefault(TOTALS_ID, Counter())["jobs"] = jobs_col.count_documents({})
+        counts[TOTALS_ID].setdefault("candidates", 0)
+        bulk_update(self.stats_col, [({"_id": doc_id}, {"$set": dict(fields.get(doc_id, {}), **counter)})
+                                     for doc_id, counter in counts.items()], upsert=True)
+        self.stats_col.delete_many({"_id": {"$nin": list(counts)}})
+        return self.totals()
+
+    def ensure(self, resumes_col, jobs_col):
+        if self.stats_col.find_one({"_id": TOTALS_ID}) is None:
+            print("Analytics counters missing, rebuilding from MongoDB...")
+            self.rebuild(resumes_col, jobs_col)
+
+def aggregate_skill_distribution(resumes_col, limit=10):
+    """
+    Live $unwind/$group skill counts computed by MongoDB (no counters needed).
+    Runs inside the database, but still reads every resume.
+    """
+    pipeline = [
+        {"$project": {"skills": {"$setUnion": [{"$ifNull": ["$skills", []]}, []]}}},
+        {"$unwind": "$skills"},
+        {"$group": {"_id": {"$toLower": "$skills"}, "name": {"$first": "$skills"}, "value": {"$sum": 1}}},
+        {"$sort": {"value": -1, "_id": 1}},
+        {"$limit": limit}
+    ]
+    return [{"name": doc['name'], "value": doc['value']} for doc in resumes_col.aggregate(pipeline)]
@@ -0,0 +1,121 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+
+from backend.config import Config
+
+class BlobStore:
+    """
+    Content-addressed store for uploaded originals.
+
+    Layout (all under `root`):
+      ab/cd/abcd...ef        the file, named by the sha256 of its bytes
+    Identical uploads are stored once. Storing a file that is already present
+    only refreshes its mtime, which is what the retention policy counts from.
+    Resumes reference their original as {"blob": {"sha256", "size"}}.
+    """
+    BLOCK_SIZE = 1024 * 1024
+
+    def __init__(self, root=None, retention_days=None, orphan_grace=None):
+        self.root = root or Config.BLOB_DIR
+        self.retention_days = Config.BLOB_RETENTION_DAYS if retention_days is None else retention_days
+        self.orphan_grace = Config.BLOB_ORPHAN_GRACE if orphan_grace is None else orphan_grace
+        os.makedirs(self.root, exist_ok=True)
+
+    @staticmethod
+    def digest(stream):
+        """
+        sha256 of a seekable binary stream, read in blocks. The stream is rewound afterwards.
+        returns: (sha256 hex, size)
+        """
+        sha = hashlib.sha256()
+        size = 0
+        stream.seek(0)
+        while True:
+            block = stream.read(BlobStore.BLOCK_SIZE)
+            if not block:
+                break
+            sha.update(block)
+            size += len(block)
+        stream.seek(0)
+        return sha.hexdigest(), size
+
+    def path(self, sha256):
+        return os.path.join(self.root, sha256[:2], sha256[2:4], sha256)
+
+    def exists(self, sha256):
+        return os.path.exists(self.path(sha256))
+
+    def put(self, stream):
+        """
+        Store the contents of a seekable binary stream (rewound afterwards).
+        returns: the reference kept on the resume, {"sha256", "size"}
+        """
+        sha256, size = self.digest(stream)
+        path = self.path(sha256)
+        if os.path.exists(path):
+            os.utime(path)
+            return {"sha256": sha256, "size": size}
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write under a temporary name and rename, so readers never see a partial blob
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                shutil.copyfileobj(stream, f, self.BLOCK_SIZE)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        finally:
+            stream.seek(0)
+        return {"sha256": sha256, "size": size}
+
+    def open(self, sha256):
+        return open(self.path(sha256), 'rb')
+
+    def delete(self, sha256):
+        try:
+            os.unlink(self.path(sha256))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def iter_blobs(self):
+        """
+        Yields (sha256, mtime) for every stored blob.
+        """
+        for directory, _, names in os.walk(self.root):
+            for name in names:
+                if name.startswith(".tmp-"):
+                    continue
+                try:
+                    yield name, os.stat(os.path.join(directory, name)).st_mtime
+                except FileNotFoundError:
+                    continue
+
+    def purge(self, resumes_col, now=None):
+        """
+        Apply the retention policy:
+          - blobs not stored or re-uploaded for retention_days are deleted (0 = keep forever)
+            and their reference is removed from the resumes
+          - blobs no resume references (exact duplicates, deleted candidates, failed ingestion)
+            are deleted once older than orphan_grace seconds, which leaves queued uploads alone
+        returns: {"expired", "orphaned", "kept"}
+        """
+        now = now or time.time()
+        referenced = set(resumes_col.distinct("blob.sha256"))
+        counts = {"expired": 0, "orphaned": 0, "kept": 0}
+        for sha256, mtime in list(self.iter_blobs()):
+            age = now - mtime
+            if self.retention_days > 0 and age > self.retention_days * 86400:
+                self.delete(sha256)
+                resumes_col.update_many({"blob.sha256": sha256}, {"$unset": {"blob": ""}})
+                counts["expired"] += 1
+            elif sha256 not in referenced and age > self.orphan_grace:
+                self.delete(sha256)
+                counts["orphaned"] += 1
+            else:
+                counts["kept"] += 1
+        return counts
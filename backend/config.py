@@ -5,9 +5,125 @@ load_dotenv()
 
 class Config:
     MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017/resume_screener")
+    # How long the first query waits for MongoDB before falling back to mongomock
+    MONGO_TIMEOUT_MS = int(os.getenv("MONGO_TIMEOUT_MS", "2000"))
     MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+    # How embeddings are stored in Mongo: 'float32' / 'int8' packed binary, or legacy 'list'
+    EMBEDDING_STORAGE = os.getenv("EMBEDDING_STORAGE", "float32")
+    # 'remote' = HuggingFace Inference API, 'local' = ONNX Runtime on CPU (needs onnxruntime + tokenizers)
+    EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "remote")
+    LOCAL_MODEL_DIR = os.getenv("LOCAL_MODEL_DIR", os.path.join(os.getcwd(), 'models', 'all-MiniLM-L6-v2'))
+    LOCAL_MAX_SEQ_LENGTH = int(os.getenv("LOCAL_MAX_SEQ_LENGTH", "256"))
+    LOCAL_NUM_THREADS = int(os.getenv("LOCAL_NUM_THREADS", "0"))  # 0 = let ONNX Runtime decide
+    # Micro-batching window for concurrent local embedding requests
+    EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "32"))
+    EMBED_BATCH_WAIT_MS = float(os.getenv("EMBED_BATCH_WAIT_MS", "5"))
+    # Remote (HF Inference API) client: pooled session, timeouts, retries, circuit breaker
+    HF_API_URL = os.getenv("HF_API_URL", "https://api-inference.huggingface.co/pipeline/feature-extraction/sentence-transformers/all-MiniLM-L6-v2")
+    EMBED_CONNECT_TIMEOUT = float(os.getenv("EMBED_CONNECT_TIMEOUT", "3.05"))
+    EMBED_READ_TIMEOUT = float(os.getenv("EMBED_READ_TIMEOUT", "30"))
+    EMBED_MAX_RETRIES = int(os.getenv("EMBED_MAX_RETRIES", "2"))
+    EMBED_BACKOFF_BASE = float(os.getenv("EMBED_BACKOFF_BASE", "0.5"))  # seconds, doubled per retry (full jitter)
+    EMBED_BACKOFF_MAX = float(os.getenv("EMBED_BACKOFF_MAX", "8"))
+    EMBED_BREAKER_THRESHOLD = int(os.getenv("EMBED_BREAKER_THRESHOLD", "5"))  # consecutive failed calls
+    EMBED_BREAKER_RESET = float(os.getenv("EMBED_BREAKER_RESET", "30"))  # seconds before a trial call
+    EMBED_POOL_SIZE = int(os.getenv("EMBED_POOL_SIZE", "10"))
+    # Background re-embedding of stale embeddings (other model/normalization version, or fallback vectors)
+    REEMBED_BATCH_SIZE = int(os.getenv("REEMBED_BATCH_SIZE", "64"))
+    REEMBED_RATE = float(os.getenv("REEMBED_RATE", "50"))  # documents per second, 0 = unthrottled
+    # Embedding cache: in-memory LRU + SQLite tier (empty path = memory only)
+    EMBED_CACHE_ENABLED = os.getenv("EMBED_CACHE_ENABLED", "true").lower() == "true"
+    EMBED_CACHE_SIZE = int(os.getenv("EMBED_CACHE_SIZE", "10000"))
+    EMBED_CACHE_PATH = os.getenv("EMBED_CACHE_PATH", os.path.join(os.getcwd(), 'cache', 'embeddings.sqlite3'))
     UPLOAD_FOLDER = os.path.join(os.getcwd(), 'uploads')
     ALLOWED_EXTENSIONS = {'txt', 'pdf', 'docx'}
+    # Uploaded originals: content-addressed (sha256-sharded) store, one copy per distinct file
+    BLOB_DIR = os.getenv("BLOB_DIR", os.path.join(UPLOAD_FOLDER, 'blobs'))
+    BLOB_RETENTION_DAYS = int(os.getenv("BLOB_RETENTION_DAYS", "0"))  # days since last upload, 0 = keep forever
+    BLOB_ORPHAN_GRACE = float(os.getenv("BLOB_ORPHAN_GRACE", "86400"))  # seconds before an unreferenced blob is purged
+    # Optional skill vocabulary file (one skill per line); built-in list is used when unset
+    SKILLS_FILE = os.getenv("SKILLS_FILE")
+
+    # Parser limits: resumes rarely need more, and they cap CPU/memory on huge or hostile files
+    PARSE_MAX_PAGES = int(os.getenv("PARSE_MAX_PAGES", "20"))
+    PARSE_MAX_CHARS = int(os.getenv("PARSE_MAX_CHARS", "100000"))
+    PARSE_TIME_BUDGET = float(os.getenv("PARSE_TIME_BUDGET", "10"))  # seconds per file
+    # Uploads are parsed from memory; streams larger than this are spooled to a temp file first
+    PARSE_SPOOL_BYTES = int(os.getenv("PARSE_SPOOL_BYTES", str(2 * 1024 * 1024)))
+
+    # Duplicate detection at ingest: exact content hash, then MinHash/LSH near-duplicates
+    DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "true").lower() == "true"
+    DEDUP_NEAR_THRESHOLD = float(os.getenv("DEDUP_NEAR_THRESHOLD", "0.9"))  # estimated Jaccard
+    DEDUP_NUM_PERM = int(os.getenv("DEDUP_NUM_PERM", "128"))
+    DEDUP_BANDS = int(os.getenv("DEDUP_BANDS", "32"))
+    DEDUP_SHINGLE_SIZE = int(os.getenv("DEDUP_SHINGLE_SIZE", "5"))
+
+    # Bulk import (/api/upload-resumes)
+    BULK_PARSE_WORKERS = int(os.getenv("BULK_PARSE_WORKERS", str(min(4, os.cpu_count() or 1))))  # 0 = parse in-process
+    BULK_INSERT_CHUNK = int(os.getenv("BULK_INSERT_CHUNK", "100"))
+    BULK_MAX_FILES = int(os.getenv("BULK_MAX_FILES", "5000"))
+    BULK_MAX_FILE_BYTES = int(os.getenv("BULK_MAX_FILE_BYTES", str(10 * 1024 * 1024)))  # bytes actually read, per file
+    BULK_MAX_TOTAL_BYTES = int(os.getenv("BULK_MAX_TOTAL_BYTES", str(1024 * 1024 * 1024)))  # per import, after decompression
+
+    # Background ingestion queue. Always off on Vercel (it sets VERCEL=1 in its functions): threads
+    # die with the request there, so queued uploads would never run
+    ASYNC_INGEST = os.getenv("ASYNC_INGEST", "true").lower() == "true" and not os.getenv("VERCEL")
+    TASK_CONCURRENCY = int(os.getenv("TASK_CONCURRENCY", "4"))
+    TASK_MAX_RETRIES = int(os.getenv("TASK_MAX_RETRIES", "2"))
+    TASK_RETRY_DELAY = float(os.getenv("TASK_RETRY_DELAY", "2"))  # seconds, doubled per attempt
+    TASK_RECOVER_ON_START = os.getenv("TASK_RECOVER_ON_START", "false").lower() == "true"
+
+    # Async serving mode (asgi.py): executors for CPU-bound stages, and concurrency of the routes still served by Flask
+    ASYNC_CPU_WORKERS = int(os.getenv("ASYNC_CPU_WORKERS", str(os.cpu_count() or 1)))  # parse / NER / scoring threads
+    ASYNC_PARSE_PROCESSES = int(os.getenv("ASYNC_PARSE_PROCESSES", "0"))  # >0 = parse uploads in a process pool
+    ASYNC_WSGI_THREADS = int(os.getenv("ASYNC_WSGI_THREADS", "16"))  # Flask requests served at once
+    ASYNC_SPOOL_BYTES = int(os.getenv("ASYNC_SPOOL_BYTES", str(1024 * 1024)))  # request bodies above this go to a temp file
+
+    # Vector index used for top-K candidate retrieval ('flat' = exact, 'ivf' = approximate). Only live matches
+    # (MATCH_CACHE_ENABLED=false) retrieve through it; the stored rankings score the whole qualified pool
+    INDEX_BACKEND = os.getenv("INDEX_BACKEND", "ivf")
+    IVF_NLIST = int(os.getenv("IVF_NLIST", "64"))
+    IVF_NPROBE = int(os.getenv("IVF_NPROBE", "8"))
+    IVF_MIN_TRAIN_SIZE = int(os.getenv("IVF_MIN_TRAIN_SIZE", "2000"))
+    # Retrieve top_k * INDEX_OVERSAMPLE by similarity before re-ranking with skills
+    INDEX_OVERSAMPLE = int(os.getenv("INDEX_OVERSAMPLE", "3"))
+
+    # Mandatory-skill prefilter for live (uncached) matches: 'bitmap' (in-memory posting index) or 'mongo'
+    # (skills_norm multikey index). Stored MatchCache rankings always use the Mongo query
+    SKILL_PREFILTER = os.getenv("SKILL_PREFILTER", "bitmap")
+
+    # Paged listings (/api/candidates, /api/jobs): ?limit= is clamped to this many documents per page
+    LIST_MAX_LIMIT = int(os.getenv("LIST_MAX_LIMIT", "1000"))
+
+    # Dashboard analytics: 'counters' (pre-aggregated stats collection) or 'aggregate' (live $unwind/$group)
+    ANALYTICS_SOURCE = os.getenv("ANALYTICS_SOURCE", "counters")
+
+    # Components are built lazily; warm-up builds them in a background thread at import instead
+    WARM_UP_ON_START = os.getenv("WARM_UP_ON_START", "false").lower() == "true"
+    WARM_UP_INDEXES = os.getenv("WARM_UP_INDEXES", "false").lower() == "true"  # also build vector / skill indexes
+
+    # Stage latency histograms / counters exposed at /api/metrics
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    METRICS_WINDOW = int(os.getenv("METRICS_WINDOW", "1024"))  # recent samples kept per histogram for quantiles
+    # Always add the X-Timing stage breakdown header (otherwise only when the request sends X-Timing)
+    METRICS_TIMING_HEADER = os.getenv("METRICS_TIMING_HEADER", "false").lower() == "true"
+
+    # Memory-mapped embedding snapshot for fast cold starts (needs a writable, persistent directory)
+    SNAPSHOT_ENABLED = os.getenv("SNAPSHOT_ENABLED", "false").lower() == "true"
+    SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", os.path.join(os.getcwd(), 'snapshots', 'resumes'))
+    # Fold everything into one segment once appended + tombstoned rows exceed this fraction of the base segment
+    SNAPSHOT_COMPACT_RATIO = float(os.getenv("SNAPSHOT_COMPACT_RATIO", "0.25"))
+
+    # Precomputed per-job rankings in the matches collection (?top_k= on /api/match-candidates is then only a page size)
+    MATCH_CACHE_ENABLED = os.getenv("MATCH_CACHE_ENABLED", "true").lower() == "true"
+    MATCH_CACHE_WRITE_CHUNK = int(os.getenv("MATCH_CACHE_WRITE_CHUNK", "1000"))
+
+    # Batch ranking of all jobs x all candidates (flask rank-all / POST /api/rank-all): top K kept per job
+    BATCH_RANK_TOP_K = int(os.getenv("BATCH_RANK_TOP_K", "100"))
+    BATCH_RANK_JOB_BLOCK = int(os.getenv("BATCH_RANK_JOB_BLOCK", "256"))  # jobs per block (and per worker task)
+    BATCH_RANK_CANDIDATE_BLOCK = int(os.getenv("BATCH_RANK_CANDIDATE_BLOCK", "8192"))
+    BATCH_RANK_WORKERS = int(os.getenv("BATCH_RANK_WORKERS", str(os.cpu_count() or 1)))
+    BATCH_RANK_PARALLEL_MIN = int(os.getenv("BATCH_RANK_PARALLEL_MIN", "20000000"))  # job x candidate pairs before using processes
 
 os.makedirs(Config.UPLOAD_FOLDER, exist_ok=True)
 
@@ -1,4 +1,6 @@
-from pymongo import MongoClient
+import asyncio
+import threading
+from pymongo import MongoClient, UpdateOne
 from pymongo.errors import ConnectionFailure
 from backend.config import Config
 
@@ -6,11 +8,14 @@ class Database:
     def __init__(self):
         self.client = None
         self.db = None
+        self.async_client = None
+        self.async_db = None
+        self._lock = threading.Lock()
 
     def connect(self):
         try:
             print(f"Attempting to connect to MongoDB: {Config.MONGO_URI}")
-            self.client = MongoClient(Config.MONGO_URI, serverSelectionTimeoutMS=2000)
+            self.client = MongoClient(Config.MONGO_URI, serverSelectionTimeoutMS=Config.MONGO_TIMEOUT_MS)
             # Check connection
             self.client.admin.command('ping')
             self.db = self.client.get_database()
@@ -28,12 +33,105 @@ class Database:
                 raise e
 
     def get_db(self):
-        if not self.db:
-            self.connect()
+        # Connect on first use; the lock keeps concurrent first requests from connecting twice
+        if self.db is None:
+            with self._lock:
+                if self.db is None:
+                    self.connect()
         return self.db
 
+    def get_async_db(self):
+        """
+        The same database for the async serving mode: pymongo's AsyncMongoClient on
+        MongoDB, or mongomock behind a thread-offloading wrapper after a fallback.
+        """
+        db = self.get_db()
+        if self.async_db is None:
+            with self._lock:
+                if self.async_db is None:
+                    if type(db).__module__.startswith('mongomock'):
+                        self.async_db = ThreadedDatabase(db)
+                    else:
+                        from pymongo import AsyncMongoClient  # pymongo >= 4.9
+                        self.async_client = AsyncMongoClient(Config.MONGO_URI, serverSelectionTimeoutMS=Config.MONGO_TIMEOUT_MS)
+                        self.async_db = self.async_client.get_database()
+        return self.async_db
+
     def close(self):
         if self.client:
             self.client.close()
 
+class ThreadedCursor:
+    """
+    Chainable find() whose to_list() runs in a worker thread (AsyncCursor subset).
+    """
+    def __init__(self, collection, args, kwargs):
+        self.collection = collection
+        self.args = args
+        self.kwargs = kwargs
+        self.calls = []
+
+    def _chain(self, name, *args):
+        self.calls.append((name, args))
+        return self
+
+    def sort(self, *args):
+        return self._chain("sort", *args)
+
+    def skip(self, count):
+        return self._chain("skip", count)
+
+    def limit(self, count):
+        return self._chain("limit", count)
+
+    def _fetch(self, length):
+        cursor = self.collection.find(*self.args, **self.kwargs)
+        for name, args in self.calls:
+            cursor = getattr(cursor, name)(*args)
+        if length is not None:
+            cursor = cursor.limit(length)
+        return list(cursor)
+
+    async def to_list(self, length=None):
+        return await asyncio.to_thread(self._fetch, length)
+
+class ThreadedCollection:
+    """
+    Awaitable collection methods over a synchronous (mongomock) collection.
+    """
+    def __init__(self, collection):
+        self.collection = collection
+
+    def find(self, *args, **kwargs):
+        return ThreadedCursor(self.collection, args, kwargs)
+
+    def __getattr__(self, name):
+        method = getattr(self.collection, name)
+        async def call(*args, **kwargs):
+            return await asyncio.to_thread(method, *args, **kwargs)
+        return call
+
+class ThreadedDatabase:
+    def __init__(self, db):
+        self.db = db
+
+    def __getattr__(self, name):
+        return ThreadedCollection(self.db[name])
+
+    __getitem__ = __getattr__
+
+def bulk_update(collection, updates, upsert=False):
+    """
+    Apply [(filter, update), ...] with one bulk_write on MongoDB.
+    mongomock's bulk API lags behind pymongo, so there they are applied one by one.
+    """
+    if not updates:
+        return
+    # Checked on the database object so lazily proxied collections are detected too
+    if type(collection.database).__module__.startswith('mongomock'):
+        for query, update in updates:
+            collection.update_one(query, update, upsert=upsert)
+        return
+    collection.bulk_write([UpdateOne(query, update, upsert=upsert) for query, update in updates], ordered=False)
+
 db_instance = Database()
@@ -0,0 +1,271 @@
+import os
+import shutil
+import tempfile
+import zipfile
+from datetime import datetime
+from bson.objectid import ObjectId
+from werkzeug.utils import secure_filename
+
+from backend.config import Config
+from backend.blobs import BlobStore
+from backend.nlp.parser import ResumeParser
+from backend.nlp.document import PreparedDocument
+from backend.models.resume import ResumeModel
+from backend.models.vectors import decode_embedding, is_current
+from backend.nlp.dedup import BatchLSH, DuplicateDetector
+from backend.metrics import metrics
+
+def allowed_file(filename):
+    return '.' in filename and \
+           filename.rsplit('.', 1)[1].lower() in Config.ALLOWED_EXTENSIONS
+
+def parse_one(source, filename=None):
+    """
+    Top-level (picklable) parse step for the process pool.
+    source: a path (process pool) or an in-memory upload stream; filename gives its format
+    returns: (raw_text, error)
+    """
+    try:
+        return ResumeParser.parse(source, filename=filename), None
+    except Exception as e:
+        return "", str(e)
+
+class BulkIngestPipeline:
+    """
+    Staged bulk import: parse (process pool) -> clean + NER -> batched embedding
+    -> chunked insert_many. Progress is written to the `imports` collection so
+    long imports can be polled while they run.
+    Uploads are staged once, in the BlobStore that keeps the originals (or in a
+    throwaway store when none is given), and parsed from there.
+    """
+    def __init__(self, extractor, embedder, resumes_col, imports_col, on_inserted=None, detector=None, stats=None, blobs=None):
+        self.extractor = extractor
+        self.embedder = embedder
+        self.resumes_col = resumes_col
+        self.imports_col = imports_col
+        # Called with (ids, embeddings) after each insert chunk, e.g. to update the vector index
+        self.on_inserted = on_inserted
+        # Optional DuplicateDetector: exact copies are skipped, near-duplicates reuse embeddings
+        self.detector = detector
+        # Optional AnalyticsCounters, updated for every stored resume
+        self.stats = stats
+        # Optional BlobStore for the originals, referenced from each stored resume
+        self.blobs = blobs
+        self.workdir = tempfile.mkdtemp(prefix="bulk-import-")
+        self.staging = blobs or BlobStore(self.workdir, retention_days=0)
+        self.files = []  # [(filename, blob ref)]
+        self.staged_bytes = 0
+        self.results = []
+        self.import_id = None
+
+    def add_upload(self, storage):
+        """
+        Stage one uploaded FileStorage. Zip archives are expanded into their resumes.
+        Every file, uploaded directly or inside an archive, counts against BULK_MAX_FILES,
+        BULK_MAX_FILE_BYTES and BULK_MAX_TOTAL_BYTES.
+        """
+        filename = secure_filename(storage.filename or '')
+        if filename.lower().endswith('.zip'):
+            stream = storage.stream if storage.stream.seekable() else ResumeParser.spool(storage.stream)
+            self._add_zip(stream, filename)
+        elif filename and allowed_file(filename):
+            stream = storage.stream
+            if stream.seekable():
+                size = stream.seek(0, os.SEEK_END)
+                stream.seek(0)
+                self._stage(filename, stream, size)
+            else:
+                self._stage(filename, stream)
+        else:
+            self.results.append({"filename": storage.filename, "status": "error", "error": "File type not allowed"})
+
+    def _add_zip(self, stream, archive_name):
+        try:
+            with zipfile.ZipFile(stream) as archive:
+                members = [m for m in archive.infolist() if not m.is_dir()]
+                if len(self.files) + len(members) > Config.BULK_MAX_FILES:
+                    raise ValueError(f"Import is limited to {Config.BULK_MAX_FILES} files")
+                for member in members:
+                    filename = secure_filename(os.path.basename(member.filename))
+                    if not filename or not allowed_file(filename):
+                        continue
+                    # The header size is only a cheap early reject: _stage counts the decompressed bytes
+                    if member.file_size > Config.BULK_MAX_FILE_BYTES:
+                        self._reject(filename, "File too large")
+                        continue
+                    with archive.open(member) as src:
+                        self._stage(filename, src)
+        except (zipfile.BadZipFile, ValueError) as e:
+            self._reject(archive_name, str(e))
+
+    def _stage(self, filename, src, size=None):
+        """
+        Store one resume read from src, after checking the file count and its size.
+        size: the stream's known length (a seekable upload, stored without a copy); when None
+        (zip members, which only claim a size in their header) the bytes read are counted.
+        """
+        if len(self.files) >= Config.BULK_MAX_FILES:
+            return self._reject(filename, f"Import is limited to {Config.BULK_MAX_FILES} files")
+        remaining = Config.BULK_MAX_TOTAL_BYTES - self.staged_bytes
+        limit = min(Config.BULK_MAX_FILE_BYTES, remaining)
+        too_large = "File too large" if limit == Config.BULK_MAX_FILE_BYTES else \
+            f"Import is limited to {Config.BULK_MAX_TOTAL_BYTES} bytes"
+        if size is not None:
+            if size > limit:
+                return self._reject(filename, too_large)
+            blob = self.staging.put(src)
+        else:
+            # Decompress / read once into memory (or a temp file), stopping at the limit
+            try:
+                spooled = ResumeParser.spool(src, limit=limit)
+            except ValueError:
+                return self._reject(filename, too_large)
+            with spooled:
+                blob = self.staging.put(spooled)
+        self.staged_bytes += blob["size"]
+        self.files.append((filename, blob))
+
+    def _reject(self, filename, error):
+        self.results.append({"filename": filename, "status": "error", "error": error})
+
+    def close(self):
+        """
+        Remove the staging directory. run() does this itself; call it when run() may not be reached.
+        """
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+    def _progress(self, **fields):
+        self.imports_col.update_one({"_id": self.import_id}, {"$set": fields})
+
+    def _parse_all(self):
+        # Blob paths carry no extension, so the original name goes along for the format
+        paths = [self.staging.path(blob['sha256']) for _, blob in self.files]
+        names = [filename for filename, _ in self.files]
+        if Config.BULK_PARSE_WORKERS > 0 and len(paths) > 1:
+            from concurrent.futures import ProcessPoolExecutor  # pulls in multiprocessing; bulk imports only
+            with ProcessPoolExecutor(max_workers=Config.BULK_PARSE_WORKERS) as pool:
+                return list(pool.map(parse_one, paths, names, chunksize=8))
+        return [parse_one(path, name) for path, name in zip(paths, names)]
+
+    def _dedup(self, item, seen_hashes, batch_lsh):
+        """
+        Fill in fingerprint / near-duplicate link. Returns False if the item is an
+        exact duplicate (of a stored resume or an earlier file in this import).
+        Near-duplicates link to a stored resume first, else to an earlier file of this import.
+        """
+        item["fingerprint"] = self.detector.fingerprint_document(item["document"])
+        content_hash = item["fingerprint"]["content_hash"]
+        if content_hash in seen_hashes:
+            self.results.append({"filename": item["filename"], "status": "duplicate",
+                                 "duplicate": DuplicateDetector.EXACT, "duplicate_of_file": seen_hashes[content_hash]})
+            return False
+        kind, canonical = self.detector.find_duplicate(item["fingerprint"])
+        if kind == DuplicateDetector.EXACT:
+            self.results.append({"filename": item["filename"], "status": "duplicate",
+                                 "duplicate": kind, "id": str(canonical["_id"])})
+            return False
+        seen_hashes[content_hash] = item["filename"]
+        if kind == DuplicateDetector.NEAR:
+            item["duplicate_of"] = canonical["_id"]
+            if is_current(canonical.get("embedding_meta")):
+                item["embedding"] = decode_embedding(canonical["embedding"]).tolist()
+                item["embedding_meta"] = canonical["embedding_meta"]
+        else:
+            earlier = batch_lsh.find(item["fingerprint"])
+            if earlier is not None:
+                # Link to the earlier file's canonical (itself, or what it duplicates) and share its embedding
+                if earlier["duplicate_of"] is None:
+                    item["duplicate_of"] = earlier["_id"]
+                    item["embedding_source"] = earlier
+                else:
+                    item["duplicate_of"] = earlier["duplicate_of"]
+                    item["embedding_source"] = earlier.get("embedding_source")
+                    item["embedding"], item["embedding_meta"] = earlier["embedding"], earlier["embedding_meta"]
+        batch_lsh.add(item["fingerprint"], item)
+        return True
+
+    def run(self):
+        """
+        Process every staged file. Returns the per-file status list.
+        """
+        self.import_id = self.imports_col.insert_one({
+            "status": "running",
+            "total": len(self.files) + len(self.results),
+            "parsed": 0,
+            "inserted": 0,
+            "failed": len(self.results),
+            "started_at": datetime.utcnow()
+        }).inserted_id
+
+        try:
+            # 1. Parse on the process pool (pypdf is CPU-bound)
+            with metrics.stage("bulk.parse"):
+                parsed = self._parse_all()
+            self._progress(parsed=len(parsed))
+
+            # 2. Clean + NER + duplicate check (cheap, in-process)
+            prepared = []
+            seen_hashes = {}
+            batch_lsh = BatchLSH(self.detector.threshold) if self.detector is not None else None
+            for (filename, blob), (raw_text, error) in zip(self.files, parsed):
+                if error or not raw_text.strip():
+                    self.results.append({"filename": filename, "status": "error", "error": error or "No text extracted"})
+                    continue
+                document = PreparedDocument(raw_text)
+                entities = self.extractor.extract_document(document)
+                # _id assigned up front so later files of this import can link to it as duplicate_of
+                item = {"_id": ObjectId(), "filename": filename, "document": document, "entities": entities,
+                        "fingerprint": None, "duplicate_of": None, "embedding": None, "embedding_source": None,
+                        "embedding_meta": None, "blob": blob if self.blobs is not None else None}
+                if self.detector is not None and not self._dedup(item, seen_hashes, batch_lsh):
+                    continue
+                prepared.append(item)
+
+            # 3 + 4. Batched embedding, chunked insert_many
+            chunk_size = Config.BULK_INSERT_CHUNK
+            for start in range(0, len(prepared), chunk_size):
+                chunk = prepared[start:start + chunk_size]
+                todo = [item for item in chunk if item["embedding"] is None and item["embedding_source"] is None]
+                with metrics.stage("bulk.embed"):
+                    embeddings, metas = self.embedder.embed_many([item["document"].embedding_text for item in todo])
+                for item, embedding, meta in zip(todo, embeddings, metas):
+                    item["embedding"], item["embedding_meta"] = embedding, meta
+                for item in chunk:
+                    # Near-duplicates of earlier files reuse that file's embedding (embedded by now)
+                    if item["embedding_source"] is not None:
+                        item["embedding"] = item["embedding_source"]["embedding"]
+                        item["embedding_meta"] = item["embedding_source"]["embedding_meta"]
+                docs = [dict(ResumeModel.create(item["filename"], item["document"].raw, item["document"].clean, item["entities"],
+                                                item["embedding"], item["fingerprint"], item["duplicate_of"], item["embedding_meta"],
+                                                item["blob"], item["document"].skills_norm), _id=item["_id"])
+                        for item in chunk]
+                with metrics.stage("bulk.insert"):
+                    inserted = self.resumes_col.insert_many(docs).inserted_ids
+                    if self.stats:
+                        self.stats.record_resumes(docs)
+                canonical = [(doc_id, item["embedding"], doc["embedding_meta"])
+                             for item, doc, doc_id in zip(chunk, docs, inserted) if item["duplicate_of"] is None]
+                if self.on_inserted and canonical:
+                    self.on_inserted([c[0] for c in canonical], [c[1] for c in canonical], [c[2] for c in canonical])
+                for item, doc_id in zip(chunk, inserted):
+                    result = {
+                        "filename": item["filename"],
+                        "status": "ok",
+                        "id": str(doc_id),
+                        "extracted_skills": item["entities"].get('SKILL', [])
+                    }
+                    if item["duplicate_of"] is not None:
+                        self.resumes_col.update_one({"_id": item["duplicate_of"]}, {"$inc": {"duplicate_count": 1}})
+                        result["duplicate"] = DuplicateDetector.NEAR
+                        result["duplicate_of"] = str(item["duplicate_of"])
+                    self.results.append(result)
+                self._progress(inserted=start + len(chunk))
+
+            failed = sum(1 for r in self.results if r["status"] == "error")
+            self._progress(status="done", failed=failed, finished_at=datetime.utcnow())
+            return self.results
+        except Exception as e:
+            self._progress(status="failed", error=str(e), finished_at=datetime.utcnow())
+            raise
+        finally:
+            self.close()
@@ -0,0 +1,124 @@
+import time
+from datetime import datetime
+
+from backend.config import Config
+from backend.database import bulk_update
+from backend.metrics import metrics
+from backend.models.vectors import encode_embedding, embedding_version, stale_version_query
+from backend.nlp.cleaner import TextCleaner
+
+def resume_text(doc):
+    # Same input as at upload: normalized raw text
+    return TextCleaner.normalize_for_embedding(doc.get('text_raw') or doc.get('text_clean') or "")
+
+def job_text(doc):
+    return TextCleaner.normalize_for_embedding(f"{doc.get('title', '')} {doc.get('description', '')}")
+
+class EmbeddingUnavailable(Exception):
+    pass
+
+class ReembedJob:
+    """
+    Brings stored embeddings up to the current version (model + normalization):
+    every document with another version, no version, or a random fallback vector is
+    re-embedded from its stored text. The collection is streamed in _id order, one
+    batched embedding call and one bulk update per batch, throttled to `rate` docs/s.
+    The last processed _id is checkpointed after every batch, so a crashed or paused
+    run continues where it stopped.
+    """
+    SOURCES = {
+        "jobs": ({"title": 1, "description": 1}, job_text),
+        "resumes": ({"text_raw": 1, "text_clean": 1}, resume_text),
+    }
+    RUNNING = "running"
+    PAUSED = "paused"
+    DONE = "done"
+
+    def __init__(self, embedder, collections, checkpoints_col, batch_size=None, rate=None, clock=time.monotonic, sleep=time.sleep):
+        """
+        collections: {"jobs": col, "resumes": col}
+        rate: max documents per second (0 = unthrottled)
+        """
+        self.embedder = embedder
+        self.collections = collections
+        self.checkpoints_col = checkpoints_col
+        self.batch_size = batch_size or Config.REEMBED_BATCH_SIZE
+        self.rate = Config.REEMBED_RATE if rate is None else rate
+        self.clock = clock
+        self.sleep = sleep
+
+    @staticmethod
+    def checkpoint_id(name):
+        return f"reembed:{name}:{embedding_version()}"
+
+    def status(self):
+        """
+        Per collection: documents still stale, plus the checkpoint of the current version.
+        """
+        result = {"version": embedding_version(), "collections": {}}
+        for name, collection in self.collections.items():
+            checkpoint = self.checkpoints_col.find_one({"_id": self.checkpoint_id(name)}) or {}
+            checkpoint.pop('_id', None)
+            if checkpoint.get('last_id') is not None:
+                checkpoint['last_id'] = str(checkpoint['last_id'])
+            result["collections"][name] = dict(checkpoint, stale=collection.count_documents(stale_version_query()))
+        return result
+
+    def run(self, names=None):
+        """
+        returns: {collection: {"processed", "updated", "failed", "status"}}
+        raises: EmbeddingUnavailable when a whole batch fell back (checkpoint kept for the next run)
+        """
+        return {name: self.run_collection(name) for name in (names or self.collections)}
+
+    def run_collection(self, name):
+        collection = self.collections[name]
+        projection, text_of = self.SOURCES[name]
+        key = self.checkpoint_id(name)
+        state = self.checkpoints_col.find_one({"_id": key}) or {}
+        if state.get("status") != self.RUNNING and state.get("status") != self.PAUSED:
+            # Finished (or never started): scan from the beginning, later fallbacks included
+            state = {"last_id": None, "processed": 0, "updated": 0, "failed": 0, "started_at": datetime.utcnow()}
+        state["status"] = self.RUNNING
+        self._save(key, state)
+
+        while True:
+            query = stale_version_query()
+            if state["last_id"] is not None:
+                query = {"$and": [query, {"_id": {"$gt": state["last_id"]}}]}
+            batch = list(collection.find(query, projection).sort("_id", 1).limit(self.batch_size))
+            if not batch:
+                break
+
+            started = self.clock()
+            with metrics.stage("reembed.embed"):
+                vectors, metas = self.embedder.embed_many([text_of(doc) for doc in batch])
+            updates = [({"_id": doc['_id']}, {"$set": {"embedding": encode_embedding(vector), "embedding_meta": meta}})
+                       for doc, vector, meta in zip(batch, vectors, metas) if not meta.get("fallback")]
+            if not updates:
+                # Embedding endpoint down: stop without moving the checkpoint past this batch
+                state["status"] = self.PAUSED
+                self._save(key, state)
+                raise EmbeddingUnavailable(f"Re-embedding {name} paused: every embedding in the batch fell back")
+            with metrics.stage("reembed.write"):
+                bulk_update(collection, updates)
+
+            state["last_id"] = batch[-1]['_id']
+            state["processed"] += len(batch)
+            state["updated"] += len(updates)
+            state["failed"] += len(batch) - len(updates)  # left stale, picked up by the next run
+            self._save(key, state)
+            metrics.inc("reembedded", len(updates), collection=name)
+
+            if self.rate > 0:
+                self.sleep(max(0.0, len(batch) / self.rate - (self.clock() - started)))
+
+        state["status"] = self.DONE
+        state["last_id"] = None
+        state["finished_at"] = datetime.utcnow()
+        self._save(key, state)
+        return {k: state[k] for k in ("processed", "updated", "failed", "status")}
+
+    def _save(self, key, state):
+        state["updated_at"] = datetime.utcnow()
+        self.checkpoints_col.update_one({"_id": key}, {"$set": state}, upsert=True)
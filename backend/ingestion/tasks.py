@@ -0,0 +1,86 @@
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from bson.objectid import ObjectId
+
+from backend.config import Config
+from backend.metrics import metrics
+
+class TaskQueue:
+    """
+    In-process background work queue. Tasks run on a bounded thread pool and their
+    state (queued/running/done/failed) lives in a Mongo collection, so no external
+    broker is needed and status can be polled from any request.
+    """
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+    def __init__(self, tasks_col, max_workers=None, max_retries=None, retry_delay=None):
+        self.tasks_col = tasks_col
+        self.max_retries = Config.TASK_MAX_RETRIES if max_retries is None else max_retries
+        self.retry_delay = Config.TASK_RETRY_DELAY if retry_delay is None else retry_delay
+        self.executor = ThreadPoolExecutor(max_workers=max_workers or Config.TASK_CONCURRENCY, thread_name_prefix="task")
+        self.handlers = {}
+
+    def register(self, task_type, handler):
+        """
+        handler: callable(payload dict) -> result dict (stored on the task)
+        """
+        self.handlers[task_type] = handler
+
+    def enqueue(self, task_type, payload):
+        if task_type not in self.handlers:
+            raise ValueError(f"No handler registered for task type: {task_type}")
+        task_id = self.tasks_col.insert_one({
+            "type": task_type,
+            "payload": payload,
+            "status": self.QUEUED,
+            "attempts": 0,
+            "created_at": datetime.utcnow(),
+            "updated_at": datetime.utcnow()
+        }).inserted_id
+        self.executor.submit(self._run, task_id)
+        return str(task_id)
+
+    def get(self, task_id):
+        return self.tasks_col.find_one({"_id": ObjectId(task_id)})
+
+    def _update(self, task_id, **fields):
+        fields["updated_at"] = datetime.utcnow()
+        self.tasks_col.update_one({"_id": task_id}, {"$set": fields})
+
+    def _run(self, task_id):
+        task = self.tasks_col.find_one({"_id": task_id})
+        if not task:
+            return
+        attempts = task.get("attempts", 0) + 1
+        self._update(task_id, status=self.RUNNING, attempts=attempts, started_at=datetime.utcnow())
+        try:
+            result = self.handlers[task["type"]](task["payload"])
+            self._update(task_id, status=self.DONE, result=result, error=None, finished_at=datetime.utcnow())
+        except Exception as e:
+            print(f"Task {task_id} attempt {attempts} failed: {e}")
+            metrics.inc("task_errors", type=task["type"])
+            if attempts <= self.max_retries:
+                # Back off without holding a worker slot
+                self._update(task_id, status=self.QUEUED, error=str(e))
+                delay = self.retry_delay * (2 ** (attempts - 1))
+                timer = threading.Timer(delay, self.executor.submit, args=(self._run, task_id))
+                timer.daemon = True
+                timer.start()
+            else:
+                self._update(task_id, status=self.FAILED, error=str(e),
+                             traceback=traceback.format_exc(), finished_at=datetime.utcnow())
+
+    def recover(self):
+        """
+        Re-queue tasks left queued/running by a previous process (e.g. after a crash).
+        """
+        stale = list(self.tasks_col.find({"status": {"$in": [self.QUEUED, self.RUNNING]}}, {"_id": 1}))
+        for task in stale:
+            self._update(task["_id"], status=self.QUEUED)
+            self.executor.submit(self._run, task["_id"])
+        return len(stale)
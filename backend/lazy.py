@@ -0,0 +1,45 @@
+import threading
+
+class LazyProxy:
+    """
+    Stand-in for an object that is expensive to build (model, DB connection, index).
+    The factory runs once, on first attribute access, under a lock so concurrent
+    first requests don't build it twice. Attribute reads and writes are forwarded
+    to the built object, so module-level names can be used exactly as before.
+    """
+    __slots__ = ("_factory", "_name", "_lock", "_target")
+
+    def __init__(self, factory, name=None):
+        object.__setattr__(self, "_factory", factory)
+        object.__setattr__(self, "_name", name or getattr(factory, "__name__", "component"))
+        object.__setattr__(self, "_lock", threading.Lock())
+        object.__setattr__(self, "_target", None)
+
+    def resolve(self):
+        target = self._target
+        if target is None:
+            with self._lock:
+                target = self._target
+                if target is None:
+                    target = self._factory()
+                    object.__setattr__(self, "_target", target)
+        return target
+
+    def is_loaded(self):
+        return self._target is not None
+
+    def __getattr__(self, attr):
+        return getattr(self.resolve(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self.resolve(), attr, value)
+
+    def __repr__(self):
+        state = "loaded" if self.is_loaded() else "not loaded"
+        return f"<LazyProxy {self._name} ({state})>"
+
+def resolve(obj):
+    """
+    The real object behind a LazyProxy (anything else is returned as is).
+    """
+    return obj.resolve() if isinstance(obj, LazyProxy) else obj
@@ -0,0 +1,293 @@
+import time
+from datetime import datetime
+import numpy as np
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import BulkWriteError
+
+from backend.config import Config
+from backend.matching.engine import MatchingEngine
+from backend.matching.cache import MatchCache, CANDIDATE_PROJECTION
+from backend.models.resume import ResumeModel
+from backend.nlp.skills import normalize_skills, resume_skill_ids, job_skill_ids
+
+# Everything needed to score a job (the description is never read)
+JOB_PROJECTION = {"title": 1, "required_skills": 1, "mandatory_skills": 1, "required_skills_norm": 1,
+                  "mandatory_skills_norm": 1, "embedding": 1, "embedding_meta": 1}
+
+# Version code of fallback vectors: comparable with nothing
+NO_VERSION = -1
+
+def mandatory_ids(job):
+    ids = job.get('mandatory_skills_norm')
+    return ids if ids is not None else normalize_skills(job.get('mandatory_skills'))
+
+def version_code(meta, codes):
+    """
+    Small int per embedding version, so compatibility (see vectors.compatible) is an array comparison.
+    """
+    meta = meta or {}
+    if meta.get("fallback"):
+        return NO_VERSION
+    return codes.setdefault(meta.get("version"), len(codes))
+
+class SkillVocab:
+    """
+    Columns for the skill ids the jobs ask for (required and mandatory).
+    Candidate skills no job asks for are left out.
+    """
+    def __init__(self, jobs):
+        self.required = {}
+        self.mandatory = {}
+        for job in jobs:
+            for skill in job_skill_ids(job):
+                self.required.setdefault(skill, len(self.required))
+            for skill in mandatory_ids(job):
+                self.mandatory.setdefault(skill, len(self.mandatory))
+
+def embedding_rows(docs):
+    """
+    Normalized (n, d) float32 matrix of the documents' embeddings. The embedding
+    field is dropped from the documents once copied.
+    """
+    matrix = MatchingEngine.normalize_rows(MatchingEngine.stack_embeddings(docs))
+    for doc in docs:
+        doc.pop('embedding', None)
+    return matrix
+
+def prepare_jobs(jobs, vocab, codes):
+    required = np.zeros((len(jobs), len(vocab.required)), dtype=np.float32)
+    mandatory = np.zeros((len(jobs), len(vocab.mandatory)), dtype=np.float32)
+    for row, job in enumerate(jobs):
+        required[row, [vocab.required[s] for s in job_skill_ids(job)]] = 1
+        mandatory[row, [vocab.mandatory[s] for s in mandatory_ids(job)]] = 1
+    counts = required.sum(axis=1)
+    return {
+        "versions": np.array([version_code(job.get('embedding_meta'), codes) for job in jobs], dtype=np.int64),
+        "matrix": embedding_rows(jobs),
+        "required": required,
+        "required_weight": np.divide(1.0, counts, out=np.zeros_like(counts), where=counts > 0),
+        "mandatory": mandatory,
+        "mandatory_count": mandatory.sum(axis=1)
+    }
+
+def prepare_candidates(candidates, vocab, codes):
+    # uint8 incidence, cast per block: the pool-sized arrays stay small
+    skills = np.zeros((len(candidates), len(vocab.required)), dtype=np.uint8)
+    owned = np.zeros((len(candidates), len(vocab.mandatory)), dtype=np.uint8)
+    for row, cand in enumerate(candidates):
+        ids = resume_skill_ids(cand)
+        skills[row, [vocab.required[s] for s in ids if s in vocab.required]] = 1
+        owned[row, [vocab.mandatory[s] for s in ids if s in vocab.mandatory]] = 1
+    return {
+        "versions": np.array([version_code(cand.get('embedding_meta'), codes) for cand in candidates], dtype=np.int64),
+        "matrix": embedding_rows(candidates),
+        "skills": skills,
+        "owned": owned
+    }
+
+def score_block(jobs, cands, rows, cols, weights):
+    """
+    Full scores of jobs[rows] x candidates[cols] (slices), float32: the semantic block
+    is one matrix-matrix product over normalized embeddings, skill overlap a product
+    of incidence matrices. Pairs missing a mandatory skill score -inf.
+    returns: (total, semantic, skill, comparable)
+    """
+    versions = jobs["versions"][rows][:, None]
+    comparable = (versions == cands["versions"][cols][None, :]) & (versions != NO_VERSION)
+    semantic = jobs["matrix"][rows] @ cands["matrix"][cols].T
+    semantic[~comparable] = 0.0
+    skill = (jobs["required"][rows] @ cands["skills"][cols].T.astype(np.float32)) * jobs["required_weight"][rows][:, None]
+    total = semantic * weights['similarity'] + skill * weights['skills']
+    if jobs["mandatory"].shape[1]:
+        met = jobs["mandatory"][rows] @ cands["owned"][cols].T.astype(np.float32)
+        total[met < jobs["mandatory_count"][rows][:, None]] = -np.inf
+    return total, semantic, skill, comparable
+
+def rank_rows(jobs, cands, rows, top_k, candidate_block, weights):
+    """
+    Top-K candidates for the job rows in `rows`, scanning the pool candidate_block
+    columns at a time. Each block is merged into a bounded (rows, K) best list
+    (argpartition over best + block), so memory does not grow with the pool.
+    returns: (positions, total, semantic, skill, comparable), each (rows, K), best
+    first; position -1 marks an empty slot (fewer qualified candidates than K)
+    """
+    n_rows = rows.stop - rows.start
+    n_cands = len(cands["versions"])
+    k = min(top_k, n_cands)
+    best = np.empty((n_rows, 0), dtype=np.float32)
+    best_pos = np.empty((n_rows, 0), dtype=np.int64)
+    for start in range(0, n_cands, candidate_block):
+        cols = slice(start, min(start + candidate_block, n_cands))
+        total = score_block(jobs, cands, rows, cols, weights)[0]
+        merged = np.concatenate([best, total], axis=1)
+        merged_pos = np.concatenate([best_pos, np.broadcast_to(np.arange(cols.start, cols.stop), total.shape)], axis=1)
+        if merged.shape[1] > k:
+            keep = np.argpartition(-merged, k - 1, axis=1)[:, :k]
+            merged = np.take_along_axis(merged, keep, axis=1)
+            merged_pos = np.take_along_axis(merged_pos, keep, axis=1)
+        best, best_pos = merged, merged_pos
+
+    # Best first; equal scores in pool order (_id), as MatchCache.ranked sorts them
+    order = np.lexsort((best_pos, -best), axis=1)
+    best = np.take_along_axis(best, order, axis=1)
+    best_pos = np.take_along_axis(best_pos, order, axis=1)
+    best_pos[~np.isfinite(best)] = -1
+
+    # Score components of the kept pairs only
+    safe = np.maximum(best_pos, 0)
+    semantic = np.einsum('rd,rkd->rk', jobs["matrix"][rows], cands["matrix"][safe])
+    comparable = (jobs["versions"][rows][:, None] == cands["versions"][safe]) & (jobs["versions"][rows][:, None] != NO_VERSION)
+    semantic[~comparable] = 0.0
+    skill = np.einsum('rv,rkv->rk', jobs["required"][rows], cands["skills"][safe].astype(np.float32)) \
+        * jobs["required_weight"][rows][:, None]
+    return best_pos, best, semantic, skill, comparable
+
+# Process pool workers get the prepared arrays once, at start-up
+_worker_state = {}
+
+def _init_worker(jobs, cands, settings):
+    _worker_state.update(jobs=jobs, cands=cands, settings=settings)
+
+def _rank_rows_worker(rows):
+    return rank_rows(_worker_state["jobs"], _worker_state["cands"], rows, **_worker_state["settings"])
+
+class BatchRanker:
+    """
+    Many-to-many matching: every job against every candidate, or every job for one candidate.
+    Scores are the same as MatchingEngine's (weighted semantic + skill overlap, no
+    semantic score across embedding versions, mandatory skills as hard filters), but
+    computed in (job block x candidate block) float32 products, keeping only each
+    job's top K. Job blocks are spread over a process pool for large pools.
+    The top K lists go to their own `shortlists` collection: MatchCache's `matches`
+    hold each job's whole qualified pool, which a cut-down list must not replace.
+    """
+    def __init__(self, jobs_col, resumes_col, shortlists_col, top_k=None, workers=None,
+                 job_block=None, candidate_block=None, weights=None):
+        self.jobs_col = jobs_col
+        self.resumes_col = resumes_col
+        self.shortlists_col = shortlists_col
+        self.shortlists_col.create_index([("job_id", ASCENDING), ("match_score", DESCENDING)])
+        self.top_k = top_k or Config.BATCH_RANK_TOP_K
+        self.workers = workers or Config.BATCH_RANK_WORKERS
+        self.job_block = job_block or Config.BATCH_RANK_JOB_BLOCK
+        self.candidate_block = candidate_block or Config.BATCH_RANK_CANDIDATE_BLOCK
+        self.weights = weights or MatchingEngine.DEFAULT_WEIGHTS
+
+    @staticmethod
+    def score_data(job, cand, total, semantic, skill, comparable):
+        """
+        Same fields as MatchingEngine.calculate_score.
+        """
+        owned = set(resume_skill_ids(cand))
+        result = {
+            "total_score": round(float(total), 4),
+            "semantic_score": round(float(semantic), 4),
+            "skill_score": round(float(skill), 4),
+            "matched_skills": [s for s in dict.fromkeys(job_skill_ids(job)) if s in owned]
+        }
+        if not comparable:
+            result["embedding_mismatch"] = True
+        return result
+
+    def jobs_for_candidate(self, candidate, top_k=None):
+        """
+        Every job scored against one candidate in a single pass over the jobs.
+        candidate: resume document with CANDIDATE_PROJECTION fields
+        returns: [(job, score_data)], best first (jobs whose mandatory skills the candidate lacks are left out)
+        """
+        jobs = list(self.jobs_col.find({}, JOB_PROJECTION))
+        if not jobs:
+            return []
+        vocab = SkillVocab(jobs)
+        codes = {}
+        cand = dict(candidate)
+        job_arrays = prepare_jobs(jobs, vocab, codes)
+        cand_arrays = prepare_candidates([cand], vocab, codes)
+        total, semantic, skill, comparable = score_block(job_arrays, cand_arrays, slice(0, len(jobs)), slice(0, 1), self.weights)
+        total = total[:, 0]
+        order = [i for i in np.lexsort((np.arange(len(jobs)), -total)) if np.isfinite(total[i])]
+        if top_k:
+            order = order[:top_k]
+        return [(jobs[i], self.score_data(jobs[i], cand, total[i], semantic[i, 0], skill[i, 0], comparable[i, 0]))
+                for i in order]
+
+    def rank_all(self, job_query=None):
+        """
+        Rank the whole candidate pool for every job (or those matching job_query) and
+        store each job's top K in the shortlists collection, replacing its previous shortlist.
+        returns: {"jobs", "candidates", "stored", "workers", "seconds"}
+        """
+        started = time.perf_counter()
+        jobs = list(self.jobs_col.find(job_query or {}, JOB_PROJECTION))
+        candidates = list(self.resumes_col.find(ResumeModel.CANONICAL, CANDIDATE_PROJECTION))
+        summary = {"jobs": len(jobs), "candidates": len(candidates), "stored": 0, "workers": 1}
+        if jobs and candidates:
+            vocab = SkillVocab(jobs)
+            codes = {}
+            job_arrays = prepare_jobs(jobs, vocab, codes)
+            cand_arrays = prepare_candidates(candidates, vocab, codes)
+            blocks = [slice(start, min(start + self.job_block, len(jobs))) for start in range(0, len(jobs), self.job_block)]
+            settings = {"top_k": self.top_k, "candidate_block": self.candidate_block, "weights": self.weights}
+            parallel = self.workers > 1 and len(blocks) > 1 and len(jobs) * len(candidates) >= Config.BATCH_RANK_PARALLEL_MIN
+            if parallel:
+                from concurrent.futures import ProcessPoolExecutor  # pulls in multiprocessing; large batches only
+                summary["workers"] = min(self.workers, len(blocks))
+                with ProcessPoolExecutor(max_workers=summary["workers"], initializer=_init_worker,
+                                         initargs=(job_arrays, cand_arrays, settings)) as pool:
+                    for rows, ranked in zip(blocks, pool.map(_rank_rows_worker, blocks)):
+                        summary["stored"] += self._store(jobs[rows], candidates, ranked)
+            else:
+                for rows in blocks:
+                    ranked = rank_rows(job_arrays, cand_arrays, rows, **settings)
+                    summary["stored"] += self._store(jobs[rows], candidates, ranked)
+        elif jobs:
+            self._store(jobs, candidates, None)
+        summary["seconds"] = round(time.perf_counter() - started, 3)
+        return summary
+
+    def _store(self, jobs, candidates, ranked):
+        """
+        Replace the shortlists of a block of jobs: one delete, chunked insert_many, one update.
+        """
+        entries = []
+        if ranked is not None:
+            positions, total, semantic, skill, comparable = ranked
+            for row, job in enumerate(jobs):
+                for col in range(positions.shape[1]):
+                    pos = positions[row, col]
+                    if pos < 0:
+                        break
+                    cand = candidates[pos]
+                    score_data = self.score_data(job, cand, total[row, col], semantic[row, col], skill[row, col], comparable[row, col])
+                    entries.append(MatchCache.build_entry(job, cand, score_data))
+
+        job_ids = [job['_id'] for job in jobs]
+        self.shortlists_col.delete_many({"job_id": {"$in": job_ids}})
+        chunk_size = Config.MATCH_CACHE_WRITE_CHUNK
+        for start in range(0, len(entries), chunk_size):
+            try:
+                self.shortlists_col.insert_many(entries[start:start + chunk_size], ordered=False)
+            except BulkWriteError:
+                pass  # a concurrent rank_all stored the same job:candidate entry meanwhile
+        self.jobs_col.update_many({"_id": {"$in": job_ids}}, {"$set": {"shortlisted_at": datetime.utcnow()}})
+        return len(entries)
+
+    def shortlist(self, job, offset=0, limit=None):
+        """
+        A job's stored top K, best first, plus its size.
+        """
+        cursor = self.shortlists_col.find({"job_id": job['_id']}, {"_id": 0, "job_id": 0}) \
+            .sort([("match_score", DESCENDING), ("_id", ASCENDING)]).skip(offset)
+        if limit:
+            cursor = cursor.limit(limit)
+        return list(cursor), self.shortlists_col.count_documents({"job_id": job['_id']})
+
+    def discard(self, job_ids=None, candidate_ids=None):
+        """
+        Drop shortlists of edited jobs / entries of deleted candidates (candidate ids as str).
+        """
+        if job_ids:
+            self.shortlists_col.delete_many({"job_id": {"$in": list(job_ids)}})
+            self.jobs_col.update_many({"_id": {"$in": list(job_ids)}}, {"$unset": {"shortlisted_at": ""}})
+        if candidate_ids:
+            self.shortlists_col.delete_many({"candidate_id": {"$in": list(candidate_ids)}})
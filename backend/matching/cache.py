@@ -0,0 +1,139 @@
+from datetime import datetime, timedelta
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import BulkWriteError
+
+from backend.config import Config
+from backend.matching.engine import MatchingEngine
+from backend.nlp.summarizer import SmartSummarizer
+from backend.models.resume import ResumeModel
+from backend.matching.prefilter import mandatory_query, has_all
+
+# Fields needed to score and summarize a candidate
+CANDIDATE_PROJECTION = {"filename": 1, "skills": 1, "skills_norm": 1, "embedding": 1, "embedding_meta": 1}
+
+class MatchCache:
+    """
+    Precomputed per-job rankings stored in the `matches` collection, one document
+    per (job, candidate) with its score and summary. Reads are an indexed
+    sort/skip/limit; a new resume only scores itself against the ranked jobs.
+    """
+    # Resumes stored this long before a rebuild started are re-checked after it, covering
+    # the gap between ResumeModel.create stamping upload_date and the insert becoming visible
+    CATCH_UP_MARGIN = timedelta(seconds=60)
+    def __init__(self, matches_col, jobs_col, resumes_col):
+        self.matches_col = matches_col
+        self.jobs_col = jobs_col
+        self.resumes_col = resumes_col
+        self.matches_col.create_index([("job_id", ASCENDING), ("match_score", DESCENDING)])
+        # The catch-up pass after a rebuild only reads the resumes stored since it started
+        self.resumes_col.create_index([("upload_date", ASCENDING)])
+
+    @staticmethod
+    def build_entry(job, cand, score_data):
+        return {
+            "_id": f"{job['_id']}:{cand['_id']}",
+            "job_id": job['_id'],
+            "candidate_id": str(cand['_id']),
+            "filename": cand['filename'],
+            "skills": cand.get('skills', []),
+            "match_score": score_data['total_score'],
+            "details": score_data,
+            "summary": SmartSummarizer.generate_summary(cand, job, score_data)
+        }
+
+    def _write(self, job, candidates):
+        # Entries are keyed on job:candidate; replacing by _id keeps concurrent
+        # rebuilds/increments idempotent (a duplicate insert means it is already stored)
+        chunk_size = Config.MATCH_CACHE_WRITE_CHUNK
+        for start in range(0, len(candidates), chunk_size):
+            chunk = candidates[start:start + chunk_size]
+            scores = MatchingEngine.score_batch(job, chunk)
+            entries = [self.build_entry(job, cand, score_data) for cand, score_data in zip(chunk, scores)]
+            if not entries:
+                continue
+            self.matches_col.delete_many({"_id": {"$in": [e["_id"] for e in entries]}})
+            try:
+                self.matches_col.insert_many(entries, ordered=False)
+            except BulkWriteError:
+                pass
+
+    def is_ranked(self, job):
+        return job.get('ranked_at') is not None
+
+    def rebuild(self, job):
+        """
+        Batch rescore every qualified candidate for one job (job added or edited).
+        Resumes stored while this runs miss both the candidate snapshot and add_candidates
+        (the job has no ranked_at yet), so they are scored in a catch-up pass at the end.
+        Candidates always come from Mongo (skills_norm $all), never from an in-process
+        posting index: the stored ranking is shared by workers whose indexes may be stale.
+        """
+        started = datetime.utcnow()
+        candidates = list(self.resumes_col.find(mandatory_query(job.get('mandatory_skills')), CANDIDATE_PROJECTION))
+        self.matches_col.delete_many({"job_id": job['_id']})
+        self._write(job, candidates)
+        ranked_at = datetime.utcnow()
+        self.jobs_col.update_one({"_id": job['_id']}, {"$set": {"ranked_at": ranked_at}})
+        job['ranked_at'] = ranked_at
+        # From here on add_candidates covers new resumes; pick up the ones stored in between
+        seen = {c['_id'] for c in candidates}
+        recent = dict(ResumeModel.CANONICAL, upload_date={"$gte": started - self.CATCH_UP_MARGIN})
+        late = [c for c in self.resumes_col.find(mandatory_query(job.get('mandatory_skills'), recent), CANDIDATE_PROJECTION)
+                if c['_id'] not in seen]
+        if late:
+            self._write(job, late)
+        return len(candidates) + len(late)
+
+    def add_candidates(self, candidate_ids):
+        """
+        Merge newly stored resumes into every existing job ranking.
+        """
+        query = dict(ResumeModel.CANONICAL, _id={"$in": list(candidate_ids)})
+        candidates = list(self.resumes_col.find(query, CANDIDATE_PROJECTION))
+        if not candidates:
+            return
+        for job in self.jobs_col.find({"ranked_at": {"$ne": None}}, {"description": 0}):
+            # Jobs with mandatory skills only rank candidates that have all of them
+            qualified = [c for c in candidates if has_all(c, job.get('mandatory_skills'))]
+            if qualified:
+                self._write(job, qualified)
+
+    def invalidate(self, job_id):
+        self.matches_col.delete_many({"job_id": job_id})
+        self.jobs_col.update_one({"_id": job_id}, {"$unset": {"ranked_at": ""}})
+
+    def invalidate_all(self):
+        """
+        Drop every stored ranking (e.g. after re-embedding); jobs are re-ranked on next read.
+        """
+        self.matches_col.delete_many({})
+        self.jobs_col.update_many({"ranked_at": {"$ne": None}}, {"$unset": {"ranked_at": ""}})
+
+    def ranked(self, job, offset=0, limit=None, matches_col=None):
+        """
+        Cursor over a job's results, best first.
+        matches_col: another handle on the collection (the async serving mode passes its own)
+        """
+        if matches_col is None:
+            matches_col = self.matches_col
+        cursor = matches_col.find({"job_id": job['_id']}, {"_id": 0, "job_id": 0}) \
+            .sort([("match_score", DESCENDING), ("_id", ASCENDING)]).skip(offset)
+        if limit:
+            cursor = cursor.limit(limit)
+        return cursor
+
+    def page(self, job, offset=0, limit=None):
+        """
+        Ranked slice of a job's results plus the total count.
+        """
+        results = list(self.ranked(job, offset, limit))
+        total = self.matches_col.count_documents({"job_id": job['_id']})
+        return results, total
+
+    async def apage(self, job, offset, limit, matches_col):
+        """
+        page() over an async collection (AsyncMongoClient or database.ThreadedCollection).
+        """
+        results = await self.ranked(job, offset, limit, matches_col).to_list()
+        total = await matches_col.count_documents({"job_id": job['_id']})
+        return results, total
@@ -1,18 +1,25 @@
-from sklearn.metrics.pairwise import cosine_similarity
 import numpy as np
+from backend.models.vectors import decode_embedding, compatible
+from backend.nlp.skills import resume_skill_ids, job_skill_ids
 
 class MatchingEngine:
+    DEFAULT_WEIGHTS = {'similarity': 0.7, 'skills': 0.3}
+
     @staticmethod
     def compute_similarity(embedding1, embedding2):
         """
         Compute cosine similarity between two vectors.
-        input: list or np.array
+        input: list, np.array or stored binary embedding
         output: float score (0 to 1)
         """
-        vec1 = np.array(embedding1).reshape(1, -1)
-        vec2 = np.array(embedding2).reshape(1, -1)
+        vec1 = decode_embedding(embedding1).astype(np.float64)
+        vec2 = decode_embedding(embedding2).astype(np.float64)
         
-        return float(cosine_similarity(vec1, vec2)[0][0])
+        # Plain NumPy cosine (zero vectors score 0, as sklearn's cosine_similarity did)
+        norm = np.linalg.norm(vec1) * np.linalg.norm(vec2)
+        if norm == 0:
+            return 0.0
+        return float(np.dot(vec1, vec2) / norm)
 
     @staticmethod
     def calculate_score(resume_data, job_data, weights=None):
@@ -21,27 +28,123 @@ class MatchingEngine:
         weights: dict {'similarity': 0.7, 'skills': 0.3}
         """
         if weights is None:
-            weights = {'similarity': 0.7, 'skills': 0.3}
+            weights = MatchingEngine.DEFAULT_WEIGHTS
 
-        # 1. Semantic Similarity (Contextual Match)
-        sem_score = MatchingEngine.compute_similarity(resume_data['embedding'], job_data['embedding'])
+        # 1. Semantic Similarity (Contextual Match), only between embeddings of the same version
+        comparable = compatible(resume_data.get('embedding_meta'), job_data.get('embedding_meta'))
+        sem_score = MatchingEngine.compute_similarity(resume_data['embedding'], job_data['embedding']) if comparable else 0.0
         
-        # 2. Skill Overlap (Exact Match)
-        resume_skills = set([s.lower() for s in resume_data.get('skills', [])])
-        job_skills = set([s.lower() for s in job_data.get('required_skills', [])])
+        # 2. Skill Overlap (Exact Match) on the stored normalized skill ids
+        resume_skills = set(resume_skill_ids(resume_data))
+        job_skills = list(dict.fromkeys(job_skill_ids(job_data)))
+        matched_skills = [s for s in job_skills if s in resume_skills]
         
         if len(job_skills) > 0:
-            skill_match_count = len(resume_skills.intersection(job_skills))
-            skill_score = skill_match_count / len(job_skills)
+            skill_score = len(matched_skills) / len(job_skills)
         else:
             skill_score = 0.0
 
         # Weighted Final Score
         final_score = (sem_score * weights['similarity']) + (skill_score * weights['skills'])
         
-        return {
+        result = {
             "total_score": round(final_score, 4),
             "semantic_score": round(sem_score, 4),
             "skill_score": round(skill_score, 4),
-            "matched_skills": list(resume_skills.intersection(job_skills))
+            "matched_skills": matched_skills
         }
+        if not comparable:
+            result["embedding_mismatch"] = True
+        return result
+
+    @staticmethod
+    def stack_embeddings(docs):
+        """
+        Stack the 'embedding' field of many documents into one (n, d) float32 matrix.
+        """
+        if not docs:
+            return np.zeros((0, 0), dtype=np.float32)
+        first = decode_embedding(docs[0]['embedding'])
+        matrix = np.empty((len(docs), len(first)), dtype=np.float32)
+        matrix[0] = first
+        for i in range(1, len(docs)):
+            matrix[i] = decode_embedding(docs[i]['embedding'])
+        return matrix
+
+    @staticmethod
+    def normalize_rows(matrix):
+        """
+        L2-normalize each row in place. Zero rows stay zero (cosine of 0 like sklearn).
+        """
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        matrix /= norms
+        return matrix
+
+    @staticmethod
+    def skill_incidence(candidates, vocab):
+        """
+        Build a sparse candidate x skill incidence matrix in CSR form.
+        Only skills present in `vocab` (dict: skill id -> column) are kept.
+        returns: (indptr, indices) int arrays
+        """
+        indptr = np.zeros(len(candidates) + 1, dtype=np.int64)
+        indices = []
+        for row, cand in enumerate(candidates):
+            cols = sorted({vocab[s] for s in resume_skill_ids(cand) if s in vocab})
+            indices.extend(cols)
+            indptr[row + 1] = len(indices)
+        return indptr, np.asarray(indices, dtype=np.int64)
+
+    @staticmethod
+    def score_batch(job_data, candidates, weights=None):
+        """
+        Score a whole candidate pool against one job in a single vectorized pass.
+        Semantic scores come from one matrix-vector product over normalized embeddings,
+        skill overlap from a sparse incidence matrix over the job's required skills.
+        Candidates whose embedding version differs from the job's (or that hold a
+        fallback vector) get a semantic score of 0 and are flagged embedding_mismatch.
+        Returns a list of score dicts (same fields as calculate_score), in input order.
+        """
+        if weights is None:
+            weights = MatchingEngine.DEFAULT_WEIGHTS
+        if not candidates:
+            return []
+
+        # 1. Semantic Similarity: normalize once, one mat-vec for the whole pool
+        cand_matrix = MatchingEngine.normalize_rows(MatchingEngine.stack_embeddings(candidates))
+        job_vec = decode_embedding(job_data['embedding'])
+        job_norm = np.linalg.norm(job_vec)
+        if job_norm > 0:
+            job_vec = job_vec / job_norm
+        sem_scores = cand_matrix @ job_vec
+        job_meta = job_data.get('embedding_meta')
+        mismatch = np.array([not compatible(c.get('embedding_meta'), job_meta) for c in candidates])
+        sem_scores[mismatch] = 0.0
+
+        # 2. Skill Overlap over the job's (deduplicated, normalized) skill vocabulary
+        job_skills = list(dict.fromkeys(job_skill_ids(job_data)))
+        vocab = {s: i for i, s in enumerate(job_skills)}
+        indptr, indices = MatchingEngine.skill_incidence(candidates, vocab)
+        rows = np.repeat(np.arange(len(candidates)), np.diff(indptr))
+        match_counts = np.bincount(rows, minlength=len(candidates))
+        if job_skills:
+            skill_scores = match_counts / len(job_skills)
+        else:
+            skill_scores = np.zeros(len(candidates))
+
+        # Weighted Final Score
+        final_scores = (sem_scores * weights['similarity']) + (skill_scores * weights['skills'])
+
+        results = []
+        for i in range(len(candidates)):
+            result = {
+                "total_score": round(float(final_scores[i]), 4),
+                "semantic_score": round(float(sem_scores[i]), 4),
+                "skill_score": round(float(skill_scores[i]), 4),
+                "matched_skills": [job_skills[c] for c in indices[indptr[i]:indptr[i + 1]]]
+            }
+            if mismatch[i]:
+                result["embedding_mismatch"] = True
+            results.append(result)
+        return results
@@ -0,0 +1,294 @@
+import threading
+import numpy as np
+from backend.config import Config
+from backend.models.vectors import load_matrix, normalize_rows
+from backend.models.resume import ResumeModel
+
+class FlatIndex:
+    """
+    Exact (brute force) inner-product index over L2-normalized vectors.
+    Scores are cosine similarities, same as MatchingEngine.compute_similarity.
+
+    Rows live in two tiers: an optional read-only base (positions 0..len(base)-1, e.g. the
+    EmbeddingSnapshot memory map, searched in place and never copied) and a private,
+    growable array for everything added afterwards. Replacing a base vector retires its
+    row and stores the new vector privately.
+    """
+    name = "flat"
+
+    def __init__(self, dim=384):
+        self.dim = dim
+        self._base = np.zeros((0, dim), dtype=np.float32)
+        self._vectors = np.zeros((0, dim), dtype=np.float32)  # rows after the base
+        self._alive = np.zeros(0, dtype=bool)
+        self._size = 0
+        self._ids = []
+        self._positions = {}
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._positions)
+
+    @staticmethod
+    def _normalize(vectors):
+        return normalize_rows(vectors)
+
+    def _grow(self, extra):
+        # Amortized doubling so repeated single adds stay O(1)
+        needed = self._size + extra
+        if needed > len(self._alive):
+            capacity = max(needed, 2 * len(self._alive), 64)
+            alive = np.zeros(capacity, dtype=bool)
+            alive[:self._size] = self._alive[:self._size]
+            self._alive = alive
+        private_size = self._size - len(self._base)
+        if private_size + extra > len(self._vectors):
+            capacity = max(private_size + extra, 2 * len(self._vectors), 64)
+            grown = np.zeros((capacity, self.dim), dtype=np.float32)
+            grown[:private_size] = self._vectors[:private_size]
+            self._vectors = grown
+
+    def _rows(self, positions):
+        """
+        Vectors at the given positions, gathered from both tiers.
+        """
+        positions = np.asarray(positions, dtype=np.int64)
+        base = len(self._base)
+        if base == 0:
+            return self._vectors[positions]
+        rows = np.empty((len(positions), self.dim), dtype=np.float32)
+        in_base = positions < base
+        rows[in_base] = self._base[positions[in_base]]
+        rows[~in_base] = self._vectors[positions[~in_base] - base]
+        return rows
+
+    def _matrix(self):
+        """
+        All rows in position order; the base itself while nothing was added after it.
+        """
+        if self._size == len(self._base):
+            return self._base
+        return self._rows(np.arange(self._size))
+
+    def load_normalized(self, ids, vectors):
+        """
+        Use an (n, dim) matrix of L2-normalized vectors as the base rows of an empty index,
+        without copying it: a read-only memory map stays shared through the OS page cache.
+        """
+        with self._lock:
+            if self._size:
+                raise ValueError("load_normalized needs an empty index")
+            self._base = vectors
+            self._alive = np.ones(len(ids), dtype=bool)
+            self._size = len(ids)
+            self._ids = list(ids)
+            self._positions = {doc_id: pos for pos, doc_id in enumerate(self._ids)}
+
+    def add(self, ids, vectors):
+        """
+        Add (or replace) vectors keyed by id.
+        ids: list of str, vectors: (n, dim) array-like
+        """
+        if len(ids) == 0:
+            return []
+        vectors = self._normalize(vectors)
+        with self._lock:
+            self._grow(len(ids))
+            base = len(self._base)
+            positions = []
+            for doc_id, vec in zip(ids, vectors):
+                pos = self._positions.get(doc_id)
+                if pos is not None and pos < base:
+                    # Base rows are read-only: retire the old row, store the new vector privately
+                    self._alive[pos] = False
+                    pos = None
+                if pos is None:
+                    pos = self._size
+                    self._size += 1
+                    self._ids.append(doc_id)
+                    self._positions[doc_id] = pos
+                self._vectors[pos - base] = vec
+                self._alive[pos] = True
+                positions.append(pos)
+            return positions
+
+    def remove(self, ids):
+        """
+        Drop ids from search results (rows are tombstoned, not compacted).
+        """
+        with self._lock:
+            for doc_id in ids:
+                pos = self._positions.pop(doc_id, None)
+                if pos is not None:
+                    self._alive[pos] = False
+
+    def to_flat(self):
+        """
+        Exact copy of this index's contents, used as ground truth for recall.
+        """
+        with self._lock:
+            exact = FlatIndex(self.dim)
+            live = np.flatnonzero(self._alive[:self._size])
+            exact.add([self._ids[i] for i in live], self._rows(live))
+            return exact
+
+    def _candidate_positions(self, query, nprobe=None):
+        return None  # All rows
+
+    def search(self, query, k, nprobe=None):
+        """
+        Return the k nearest ids as a list of (id, score), best first.
+        nprobe: buckets to scan for this query only (IVF; ignored by the exact index)
+        """
+        query = self._normalize(query)[0]
+        with self._lock:
+            positions = self._candidate_positions(query, nprobe)
+            if positions is None:
+                base = len(self._base)
+                scores = np.empty(self._size, dtype=np.float32)
+                scores[:base] = self._base @ query
+                scores[base:] = self._vectors[:self._size - base] @ query
+                alive = self._alive[:self._size]
+            else:
+                scores = self._rows(positions) @ query
+                alive = self._alive[positions]
+            scores[~alive] = -np.inf
+            k = min(k, int(alive.sum()))
+            if k <= 0:
+                return []
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            if positions is not None:
+                return [(self._ids[positions[i]], float(scores[i])) for i in top]
+            return [(self._ids[i], float(scores[i])) for i in top]
+
+class IVFIndex(FlatIndex):
+    """
+    Approximate inverted-file index: vectors are bucketed under their nearest
+    k-means centroid and a query only scans the `nprobe` closest buckets.
+    Until enough vectors exist to train the centroids it behaves like FlatIndex.
+    """
+    name = "ivf"
+
+    def __init__(self, dim=384, nlist=None, nprobe=None, min_train_size=None):
+        super().__init__(dim)
+        self.nlist = nlist or Config.IVF_NLIST
+        self.nprobe = nprobe or Config.IVF_NPROBE
+        self.min_train_size = min_train_size or Config.IVF_MIN_TRAIN_SIZE
+        self.centroids = None
+        self._lists = []
+        self._buckets = []  # bucket of each position, so replaced vectors can move
+
+    @property
+    def is_trained(self):
+        return self.centroids is not None
+
+    def train(self, iterations=10, seed=0):
+        """
+        Spherical k-means over the currently stored vectors, then rebuild the lists.
+        """
+        with self._lock:
+            data = self._matrix()
+            nlist = min(self.nlist, self._size)
+            if nlist == 0:
+                return
+            rng = np.random.default_rng(seed)
+            centroids = data[rng.choice(self._size, nlist, replace=False)].copy()
+            for _ in range(iterations):
+                assign = np.argmax(data @ centroids.T, axis=1)
+                for c in range(nlist):
+                    members = data[assign == c]
+                    if len(members):
+                        centroids[c] = members.mean(axis=0)
+                centroids = self._normalize(centroids)
+            self.centroids = centroids
+            assign = np.argmax(data @ centroids.T, axis=1)
+            self._lists = [list(np.flatnonzero(assign == c)) for c in range(nlist)]
+            self._buckets = assign.tolist()
+
+    def add(self, ids, vectors):
+        with self._lock:
+            new_size = self._size
+            positions = super().add(ids, vectors)
+            if not self.is_trained:
+                if self._size >= self.min_train_size:
+                    self.train()
+                return positions
+            # New positions are appended in order; replaced vectors move to their new bucket
+            touched = sorted(set(positions))
+            assign = np.argmax(self._rows(touched) @ self.centroids.T, axis=1).tolist()
+            for pos, c in zip(touched, assign):
+                if pos < new_size:
+                    previous = self._buckets[pos]
+                    if previous == c:
+                        continue
+                    self._lists[previous].remove(pos)
+                    self._buckets[pos] = c
+                else:
+                    self._buckets.append(c)
+                self._lists[c].append(pos)
+            return positions
+
+    def load_normalized(self, ids, vectors):
+        with self._lock:
+            super().load_normalized(ids, vectors)
+            if self._size >= self.min_train_size:
+                self.train()
+
+    def _candidate_positions(self, query, nprobe=None):
+        if not self.is_trained:
+            return None
+        nprobe = min(nprobe or self.nprobe, len(self.centroids))
+        probes = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+        positions = []
+        for c in probes:
+            positions.extend(self._lists[c])
+        return np.asarray(positions, dtype=np.int64)
+
+INDEX_BACKENDS = {
+    FlatIndex.name: FlatIndex,
+    IVFIndex.name: IVFIndex,
+}
+
+def create_index(backend=None, dim=384, **kwargs):
+    """
+    Build an empty index for the configured backend ('flat' or 'ivf').
+    """
+    backend = backend or Config.INDEX_BACKEND
+    if backend not in INDEX_BACKENDS:
+        raise ValueError(f"Unknown index backend: {backend}")
+    return INDEX_BACKENDS[backend](dim=dim, **kwargs)
+
+def build_index_from_collection(collection, backend=None, dim=384, snapshot=None):
+    """
+    Load every canonical (non-duplicate) resume embedding of the current version into a new index.
+    With an EmbeddingSnapshot the index searches the snapshot's memory map in place (its
+    vectors are stored normalized), so worker processes on one host share those pages.
+    """
+    index = create_index(backend, dim=dim)
+    if snapshot is not None:
+        ids, matrix = snapshot.load_or_build(collection)
+        if ids:
+            index.load_normalized([str(i) for i in ids], matrix)
+    else:
+        ids, matrix = load_matrix(collection, ResumeModel.indexable_query(), dim=dim)
+        if ids:
+            index.add([str(i) for i in ids], matrix)
+    print(f"Built {index.name} vector index with {len(index)} vectors")
+    return index
+
+def recall_at_k(index, exact, queries, k=10, nprobe=None):
+    """
+    Mean fraction of the exact top-k ids that `index` also returns.
+    nprobe: probing used for this measurement only; the index keeps its own setting.
+    """
+    if len(queries) == 0:
+        return 1.0
+    hits = 0
+    total = 0
+    for q in queries:
+        truth = {doc_id for doc_id, _ in exact.search(q, k)}
+        found = {doc_id for doc_id, _ in index.search(q, k, nprobe)}
+        hits += len(truth & found)
+        total += len(truth)
+    return hits / total if total else 1.0
@@ -0,0 +1,144 @@
+import numpy as np
+from pymongo import ASCENDING
+
+from backend.models.resume import ResumeModel
+from backend.nlp.skills import normalize_skills
+
+def mandatory_query(mandatory_skills, query=None):
+    """
+    Mongo filter for candidates having every mandatory skill (uses the skills_norm multikey index).
+    """
+    query = dict(query if query is not None else ResumeModel.CANONICAL)
+    skills = normalize_skills(mandatory_skills)
+    if skills:
+        query["skills_norm"] = {"$all": skills}
+    return query
+
+def has_all(candidate, mandatory_skills):
+    required = normalize_skills(mandatory_skills)
+    if not required:
+        return True
+    owned = set(candidate.get('skills_norm') or normalize_skills(candidate.get('skills')))
+    return owned.issuperset(required)
+
+def _to_bitmap(positions):
+    # Pack row positions into one Python int (bit i set <=> row i present)
+    if len(positions) == 0:
+        return 0
+    bits = np.zeros(int(max(positions)) + 1, dtype=np.uint8)
+    bits[positions] = 1
+    return int.from_bytes(np.packbits(bits, bitorder='little').tobytes(), 'little')
+
+def _from_bitmap(bitmap):
+    if not bitmap:
+        return np.zeros(0, dtype=np.int64)
+    raw = np.frombuffer(bitmap.to_bytes((bitmap.bit_length() + 7) // 8, 'little'), dtype=np.uint8)
+    return np.flatnonzero(np.unpackbits(raw, bitorder='little'))
+
+class SkillPostingIndex:
+    """
+    In-memory inverted index skill -> bitmap of candidate rows.
+    Bitmaps are Python ints: intersecting a job's mandatory skills is a few
+    word-parallel ANDs, so only the qualified candidates are ever loaded and scored.
+    Removed rows are cleared from the `alive` bitmap; rebuild to reclaim them.
+    """
+    def __init__(self):
+        self.ids = []          # row -> candidate id (str)
+        self.rows = {}         # candidate id -> row
+        self.postings = {}     # skill -> bitmap
+        self.alive = 0         # bitmap of live rows
+
+    def __len__(self):
+        return self.alive.bit_count()
+
+    def build(self, docs):
+        """
+        Bulk load from documents with _id and skills_norm (or skills).
+        """
+        positions = {}
+        for doc in docs:
+            row = len(self.ids)
+            doc_id = str(doc['_id'])
+            self.ids.append(doc_id)
+            self.rows[doc_id] = row
+            for skill in doc.get('skills_norm') or normalize_skills(doc.get('skills')):
+                positions.setdefault(skill, []).append(row)
+        for skill, rows in positions.items():
+            self.postings[skill] = self.postings.get(skill, 0) | _to_bitmap(np.asarray(rows, dtype=np.int64))
+        self.alive = _to_bitmap(np.fromiter(self.rows.values(), dtype=np.int64, count=len(self.rows)))
+        return self
+
+    def add(self, doc_id, skills):
+        doc_id = str(doc_id)
+        if doc_id in self.rows:
+            self.remove([doc_id])
+        row = len(self.ids)
+        self.ids.append(doc_id)
+        self.rows[doc_id] = row
+        bit = 1 << row
+        for skill in normalize_skills(skills):
+            self.postings[skill] = self.postings.get(skill, 0) | bit
+        self.alive |= bit
+
+    def remove(self, doc_ids):
+        for doc_id in doc_ids:
+            row = self.rows.pop(str(doc_id), None)
+            if row is not None:
+                self.alive &= ~(1 << row)
+
+    def candidates(self, mandatory_skills):
+        """
+        Ids of live candidates having every mandatory skill.
+        """
+        skills = normalize_skills(mandatory_skills)
+        bitmap = self.alive
+        # Rarest posting first so the running intersection shrinks fastest
+        for skill in sorted(skills, key=lambda s: self.postings.get(s, 0).bit_count()):
+            bitmap &= self.postings.get(skill, 0)
+            if not bitmap:
+                return []
+        return [self.ids[row] for row in _from_bitmap(bitmap)]
+
+def build_posting_index(collection):
+    """
+    Posting index over every canonical resume, plus the multikey index Mongo uses
+    for the same filter.
+    """
+    collection.create_index([("skills_norm", ASCENDING)])
+    docs = collection.find(ResumeModel.CANONICAL, {"skills_norm": 1, "skills": 1})
+    index = SkillPostingIndex().build(docs)
+    print(f"Built skill posting index with {len(index)} candidates and {len(index.postings)} skills")
+    return index
+
+def backfill_skills_norm(collection, batch_size=500):
+    """
+    Add skills_norm to resumes stored before it existed. Safe to re-run.
+    returns: number of updated documents
+    """
+    return _backfill(collection, {"skills_norm": {"$exists": False}}, {"skills": 1},
+                     lambda doc: {"skills_norm": normalize_skills(doc.get('skills'))}, batch_size)
+
+def backfill_job_skills_norm(collection, batch_size=500):
+    """
+    Add required_skills_norm / mandatory_skills_norm to jobs stored before they existed. Safe to re-run.
+    returns: number of updated documents
+    """
+    from backend.models.job import JobModel
+    return _backfill(collection, {"required_skills_norm": {"$exists": False}}, {"required_skills": 1, "mandatory_skills": 1},
+                     lambda doc: JobModel.normalized_skills(doc.get('required_skills'), doc.get('mandatory_skills')),
+                     batch_size)
+
+def _backfill(collection, query, projection, fields, batch_size):
+    from backend.database import bulk_update
+    updated = 0
+    batch = []
+    for doc in collection.find(query, projection):
+        batch.append(({"_id": doc['_id']}, {"$set": fields(doc)}))
+        if len(batch) >= batch_size:
+            bulk_update(collection, batch)
+            updated += len(batch)
+            batch = []
+    if batch:
+        bulk_update(collection, batch)
+        updated += len(batch)
+    return updated
@@ -0,0 +1,265 @@
+import json
+import os
+from contextlib import contextmanager
+from datetime import datetime
+import numpy as np
+from bson.objectid import ObjectId
+
+from backend.config import Config
+from backend.models.vectors import load_matrix, normalize_rows
+from backend.models.resume import ResumeModel
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process use only
+    fcntl = None
+
+class EmbeddingSnapshot:
+    """
+    On-disk copy of every resume embedding for fast cold starts.
+
+    Layout (all under `directory`):
+      manifest.json          segment list, tombstone file, dims, counts
+      seg-00000.npy          (n, dim) float32 L2-normalized vectors, loaded with mmap_mode='r'
+      seg-00000.ids.npy      (n, 12) uint8 raw ObjectId bytes
+      tombstones.npy         (m, 12) uint8 ids deleted since the segments were written
+    Uploads append a small segment and deletes add tombstones. Appended segments are
+    merged pairwise as they grow (so there are O(log n) of them), and compact() folds
+    everything back into one segment once they outgrow SNAPSHOT_COMPACT_RATIO of the
+    first one. A compact snapshot loads as the memory map
+    itself, which the vector index searches in place, so its pages are shared through
+    the OS page cache by every worker process on the host.
+    """
+    MANIFEST = "manifest.json"
+    TOMBSTONES = "tombstones.npy"
+
+    def __init__(self, directory=None, dim=384):
+        self.directory = directory or Config.SNAPSHOT_DIR
+        self.dim = dim
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    @contextmanager
+    def _locked(self):
+        # Serialize manifest updates across worker processes
+        with open(self._path(".lock"), 'w') as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def exists(self):
+        return os.path.exists(self._path(self.MANIFEST))
+
+    def read_manifest(self):
+        with open(self._path(self.MANIFEST), 'r') as f:
+            return json.load(f)
+
+    def _write_manifest(self, manifest):
+        manifest["updated_at"] = datetime.utcnow().isoformat()
+        tmp = self._path(self.MANIFEST + ".tmp")
+        with open(tmp, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp, self._path(self.MANIFEST))  # atomic swap for concurrent readers
+
+    def _empty_manifest(self):
+        return {"dim": self.dim, "dtype": "float32", "normalized": True, "segments": [], "next_segment": 0,
+                "tombstones": 0}
+
+    @staticmethod
+    def _id_bytes(ids):
+        # uint8 rows rather than 'S12': NumPy strips trailing NUL bytes from S dtypes
+        raw = b"".join(ObjectId(i).binary for i in ids)
+        return np.frombuffer(raw, dtype=np.uint8).reshape(-1, 12)
+
+    @staticmethod
+    def _key_array(id_rows):
+        # One 12-byte void item per id: sortable, so np.isin / np.unique work on ids
+        return np.ascontiguousarray(id_rows, dtype=np.uint8).view('V12').ravel()
+
+    @staticmethod
+    def _to_keys(id_rows):
+        raw = id_rows.tobytes()
+        return [raw[i:i + 12] for i in range(0, len(raw), 12)]
+
+    def _write_segment(self, manifest, ids, vectors):
+        name = f"seg-{manifest['next_segment']:05d}"
+        np.save(self._path(name + ".npy"), np.ascontiguousarray(normalize_rows(vectors)))
+        np.save(self._path(name + ".ids.npy"), self._id_bytes(ids))
+        manifest["segments"].append({"name": name, "count": len(ids)})
+        manifest["next_segment"] += 1
+
+    def _read_tombstones(self):
+        path = self._path(self.TOMBSTONES)
+        return np.load(path) if os.path.exists(path) else np.zeros((0, 12), dtype=np.uint8)
+
+    def write_full(self, collection):
+        """
+        Rebuild the snapshot from a Mongo collection (one segment, no tombstones).
+        Near-duplicate resumes and other embedding versions are left out, as they are from retrieval.
+        """
+        ids, matrix = load_matrix(collection, ResumeModel.indexable_query(), dim=self.dim)
+        with self._locked():
+            self._replace(ids, matrix)
+        return len(ids)
+
+    def _replace(self, ids, matrix):
+        # Caller holds the lock
+        old = self.read_manifest() if self.exists() else self._empty_manifest()
+        manifest = self._empty_manifest()
+        manifest["next_segment"] = old["next_segment"]
+        self._write_segment(manifest, ids, matrix)
+        if os.path.exists(self._path(self.TOMBSTONES)):
+            os.remove(self._path(self.TOMBSTONES))
+        self._write_manifest(manifest)
+        self._remove_segments(old["segments"])
+
+    def _merge_tail(self, manifest):
+        """
+        Merge the last two appended segments while the older one is no larger than the newer
+        (a binary counter): each row is rewritten O(log n) times, never the base segment.
+        Caller holds the lock and writes the manifest.
+        """
+        merged = []
+        while len(manifest["segments"]) > 2 and manifest["segments"][-2]["count"] <= manifest["segments"][-1]["count"]:
+            older, newer = manifest["segments"][-2:]
+            ids = np.concatenate([np.load(self._path(seg["name"] + ".ids.npy")) for seg in (older, newer)])
+            vectors = np.concatenate([np.load(self._path(seg["name"] + ".npy"), mmap_mode='r') for seg in (older, newer)])
+            del manifest["segments"][-2:]
+            name = f"seg-{manifest['next_segment']:05d}"
+            np.save(self._path(name + ".npy"), vectors)  # rows already normalized
+            np.save(self._path(name + ".ids.npy"), ids)
+            manifest["segments"].append({"name": name, "count": len(ids)})
+            manifest["next_segment"] += 1
+            merged.extend([older, newer])
+        return merged
+
+    def _remove_segments(self, segments):
+        for seg in segments:
+            for suffix in (".npy", ".ids.npy"):
+                try:
+                    os.remove(self._path(seg["name"] + suffix))
+                except OSError:
+                    pass
+
+    def _needs_compaction(self, manifest):
+        segments = manifest["segments"]
+        appended = sum(s["count"] for s in segments[1:])
+        return appended + manifest.get("tombstones", 0) > Config.SNAPSHOT_COMPACT_RATIO * max(segments[0]["count"], 1)
+
+    def append(self, ids, vectors):
+        """
+        Add newly ingested embeddings as a new segment.
+        """
+        if len(ids) == 0:
+            return
+        with self._locked():
+            manifest = self.read_manifest() if self.exists() else self._empty_manifest()
+            self._write_segment(manifest, ids, vectors)
+            merged = self._merge_tail(manifest)
+            self._write_manifest(manifest)
+            self._remove_segments(merged)
+        if self._needs_compaction(manifest):
+            self.compact()
+
+    def _stored_keys(self, manifest):
+        return np.concatenate([self._key_array(np.load(self._path(seg["name"] + ".ids.npy")))
+                               for seg in manifest["segments"]] or [self._key_array(np.zeros((0, 12), dtype=np.uint8))])
+
+    def delete(self, ids):
+        """
+        Tombstone deleted resumes; they are skipped on load and dropped by compact().
+        Ids that are not in the snapshot (near-duplicates, fallback vectors) or already
+        tombstoned are ignored, so count() keeps matching the collection.
+        """
+        if not self.exists() or len(ids) == 0:
+            return
+        with self._locked():
+            manifest = self.read_manifest()
+            tombstones = self._read_tombstones()
+            new = self._id_bytes(ids)
+            keys, first = np.unique(self._key_array(new), return_index=True)
+            new = new[first]
+            present = np.isin(keys, self._stored_keys(manifest)) & ~np.isin(keys, self._key_array(tombstones))
+            if not present.any():
+                return
+            tombstones = np.concatenate([tombstones, new[present]])
+            np.save(self._path(self.TOMBSTONES), tombstones)
+            manifest["tombstones"] = len(tombstones)
+            self._write_manifest(manifest)
+
+    def segments(self):
+        """
+        Yields (ids_bytes, vectors) per segment; vectors are read-only memory maps.
+        """
+        for seg in self.read_manifest()["segments"]:
+            ids = np.load(self._path(seg["name"] + ".ids.npy"))
+            vectors = np.load(self._path(seg["name"] + ".npy"), mmap_mode='r')
+            yield ids, vectors
+
+    def load(self):
+        """
+        Live (ObjectId list, (n, dim) matrix) with tombstones and superseded rows removed.
+        A single segment without tombstones is returned as the memory map itself.
+        """
+        if not self.exists():
+            return [], np.zeros((0, self.dim), dtype=np.float32)
+        tombstones = set(self._to_keys(self._read_tombstones()))
+        parts = list(self.segments())
+        if len(parts) == 1 and not tombstones:
+            ids, vectors = parts[0]
+            return [ObjectId(key) for key in self._to_keys(ids)], vectors
+
+        keys = [key for ids, _ in parts for key in self._to_keys(ids)]
+        # Keep the latest row per id (re-uploads append again) and drop tombstoned ids
+        keep = {}
+        for row, key in enumerate(keys):
+            if key not in tombstones:
+                keep[key] = row
+        rows = np.fromiter(keep.values(), dtype=np.int64, count=len(keep))
+        rows.sort()
+        if len(rows) == 0:
+            return [], np.zeros((0, self.dim), dtype=np.float32)
+        matrix = np.concatenate([vectors for _, vectors in parts])[rows]
+        return [ObjectId(keys[r]) for r in rows], matrix
+
+    def load_or_build(self, collection):
+        """
+        Load the snapshot, rebuilding it from Mongo first if it is missing, predates normalized
+        storage, or its size no longer matches the collection (e.g. written to by a process
+        without snapshots). Appended segments and tombstones are compacted first, so what is
+        returned is the single shared memory map rather than a private merged copy.
+        """
+        if not self.exists() or not self.read_manifest().get("normalized") \
+                or self.count() != collection.count_documents(ResumeModel.indexable_query()):
+            print("Embedding snapshot missing or stale, rebuilding from MongoDB...")
+            self.write_full(collection)
+        else:
+            manifest = self.read_manifest()
+            if len(manifest["segments"]) > 1 or manifest.get("tombstones"):
+                self.compact()
+        return self.load()
+
+    def compact(self):
+        """
+        Fold all segments and tombstones into a single segment.
+        """
+        with self._locked():
+            ids, matrix = self.load()
+            self._replace(ids, np.array(matrix))
+        return len(ids)
+
+    def count(self):
+        """
+        Number of live vectors: distinct ids in the segments that are not tombstoned
+        (reads the id files only, 12 bytes per row).
+        """
+        if not self.exists():
+            return 0
+        keys = np.unique(self._stored_keys(self.read_manifest()))
+        return int(len(keys) - np.isin(keys, self._key_array(self._read_tombstones())).sum())
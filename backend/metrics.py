@@ -0,0 +1,174 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+import numpy as np
+
+from backend.config import Config
+
+QUANTILES = (0.5, 0.95, 0.99)
+PREFIX = "resume_screener"
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+class Histogram:
+    """
+    Latency distribution: exact count/sum plus a window of recent samples for quantiles.
+    """
+    def __init__(self, window):
+        self.count = 0
+        self.total = 0.0
+        self.samples = deque(maxlen=window)
+
+    def observe(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.samples.append(seconds)
+
+    def quantiles(self):
+        if not self.samples:
+            return {q: 0.0 for q in QUANTILES}
+        values = np.quantile(np.fromiter(self.samples, dtype=np.float64, count=len(self.samples)), QUANTILES)
+        return dict(zip(QUANTILES, values.tolist()))
+
+class MetricsRegistry:
+    """
+    In-process stage timings and event counters, rendered in Prometheus text format.
+    When disabled, stage() hands back a shared no-op context manager, so the
+    instrumented code pays one attribute check per stage.
+    """
+    def __init__(self, enabled=True, window=1024):
+        self.enabled = enabled
+        self.window = window
+        self.lock = threading.Lock()
+        self.histograms = {}   # (name, labels) -> Histogram
+        self.counters = {}     # (name, labels) -> float
+        self.collectors = []   # callables returning [(name, labels dict, value)] gauges at scrape time
+        self._noop = nullcontext()
+        self._local = threading.local()
+
+    def observe(self, name, seconds, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(self.window)
+            histogram.observe(seconds)
+
+    def inc(self, name, value=1, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def stage(self, name):
+        """
+        Context manager timing one pipeline stage, e.g. `with metrics.stage("upload.parse"):`
+        """
+        if not self.enabled:
+            return self._noop
+        return self._timed_stage(name)
+
+    @contextmanager
+    def _timed_stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.observe("stage_seconds", elapsed, stage=name)
+            timings = getattr(self._local, "timings", None)
+            if timings is not None:
+                timings.append((name, elapsed))
+
+    def timed(self, name):
+        """
+        Decorator form of stage().
+        """
+        def decorator(fn):
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.stage(name):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def start_request(self):
+        # Per-thread list the stages of the current request are appended to
+        self._local.timings = []
+
+    def finish_request(self):
+        timings, self._local.timings = getattr(self._local, "timings", None), None
+        return timings or []
+
+    def add_collector(self, fn):
+        self.collectors.append(fn)
+
+    def render(self):
+        """
+        Prometheus text exposition of every histogram (as a summary), counter and collected gauge.
+        """
+        lines = []
+        with self.lock:
+            histograms = sorted(self.histograms.items())
+            counters = sorted(self.counters.items())
+            summaries = [(key, h.count, h.total, h.quantiles()) for key, h in histograms]
+
+        seen = set()
+        for (name, labels), count, total, quantiles in summaries:
+            metric = f"{PREFIX}_{name}"
+            if metric not in seen:
+                lines.append(f"# TYPE {metric} summary")
+                seen.add(metric)
+            for q, value in quantiles.items():
+                lines.append(f"{metric}{_labels(labels + (('quantile', q),))} {value:.6f}")
+            lines.append(f"{metric}_sum{_labels(labels)} {total:.6f}")
+            lines.append(f"{metric}_count{_labels(labels)} {count}")
+
+        for (name, labels), value in counters:
+            metric = f"{PREFIX}_{name}_total"
+            if metric not in seen:
+                lines.append(f"# TYPE {metric} counter")
+                seen.add(metric)
+            lines.append(f"{metric}{_labels(labels)} {value}")
+
+        for collect in self.collectors:
+            for name, labels, value in collect():
+                metric = f"{PREFIX}_{name}"
+                if metric not in seen:
+                    lines.append(f"# TYPE {metric} gauge")
+                    seen.add(metric)
+                lines.append(f"{metric}{_labels(tuple(sorted(labels.items())))} {value}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self):
+        """
+        JSON-friendly p50/p95/p99 per stage (milliseconds), for quick inspection.
+        """
+        result = {}
+        with self.lock:
+            for (name, labels), h in sorted(self.histograms.items()):
+                key = ",".join(str(v) for _, v in labels) or name
+                if name != "stage_seconds":
+                    key = f"{name}:{key}"
+                result[key] = {"count": h.count,
+                               **{f"p{int(q * 100)}_ms": round(v * 1000, 3) for q, v in h.quantiles().items()}}
+        return result
+
+def format_timing_header(timings):
+    """
+    [(stage, seconds)] -> "upload.parse=12.3, upload.embed=80.1" (milliseconds)
+    """
+    return ", ".join(f"{name}={seconds * 1000:.1f}" for name, seconds in timings)
+
+metrics = MetricsRegistry(enabled=Config.METRICS_ENABLED, window=Config.METRICS_WINDOW)
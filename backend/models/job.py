@@ -1,12 +1,45 @@
 from datetime import datetime
+from backend.models.vectors import encode_embedding, embedding_meta as current_embedding_meta
+from backend.nlp.skills import skill_id, normalize_skills
 
 class JobModel:
     @staticmethod
-    def create(title, description, required_skills, embedding):
-        return {
+    def create(title, description, required_skills, embedding, mandatory_skills=None, embedding_meta=None, required_skill_ids=None):
+        """
+        required_skill_ids: the required skills already normalized (PreparedDocument.skill_ids)
+        """
+        doc = {
             "title": title,
             "created_at": datetime.utcnow(),
             "description": description,
             "required_skills": required_skills or [],
-            "embedding": embedding
+            "mandatory_skills": mandatory_skills or [], # Hard constraint: candidates must have all of these
+            "embedding": encode_embedding(embedding),
+            "embedding_meta": embedding_meta or current_embedding_meta()
+        }
+        doc.update(JobModel.normalized_skills(doc["required_skills"], doc["mandatory_skills"], required_skill_ids))
+        return doc
+
+    @staticmethod
+    def invalid_skills(data):
+        """
+        returns: an error message if required_skills / mandatory_skills is present but not a
+        list of strings (a bare string would be matched character by character), else None
+        """
+        for key in ('required_skills', 'mandatory_skills'):
+            value = data.get(key)
+            if value is not None and not (isinstance(value, list) and all(isinstance(s, str) for s in value)):
+                return f"{key} must be a list of strings"
+        return None
+
+    @staticmethod
+    def normalized_skills(required_skills, mandatory_skills, required_skill_ids=None):
+        """
+        Stored next to the skill lists so matching and summaries never re-normalize:
+        required_skills_norm has one id per required skill (same order), mandatory_skills_norm is a sorted set.
+        """
+        return {
+            "required_skills_norm": list(required_skill_ids) if required_skill_ids is not None
+                                    else [skill_id(s) for s in required_skills or []],
+            "mandatory_skills_norm": normalize_skills(mandatory_skills)
         }
@@ -1,18 +1,44 @@
 from datetime import datetime
+from backend.models.vectors import encode_embedding, embedding_meta as current_embedding_meta, current_version_query
+from backend.nlp.skills import normalize_skills
 
 class ResumeModel:
+    # Resumes that take part in matching (near-duplicates point at their canonical copy)
+    CANONICAL = {"duplicate_of": None}
+
     @staticmethod
-    def create(filename, text_raw, text_clean, entities, embedding):
-        return {
+    def create(filename, text_raw, text_clean, entities, embedding, fingerprint=None, duplicate_of=None, embedding_meta=None, blob=None,
+               skills_norm=None):
+        """
+        skills_norm: the skills already normalized (PreparedDocument.skills_norm); derived from entities when None
+        """
+        doc = {
             "filename": filename,
             "upload_date": datetime.utcnow(),
             "text_raw": text_raw, # Store raw text for display
             "text_clean": text_clean, # Store clean text for debugging
             "skills": entities.get("SKILL", []),
+            # Multikey-indexed for mandatory skill filters
+            "skills_norm": skills_norm if skills_norm is not None else normalize_skills(entities.get("SKILL", [])),
             "experience": entities.get("ORG", []), # Simplified for now
             "education": entities.get("EDU", []),
-            "embedding": embedding,
+            "embedding": encode_embedding(embedding),
+            "embedding_meta": embedding_meta or current_embedding_meta(), # model / normalization version, fallback flag
             "meta": {
                 "entities": entities
             }
         }
+        if fingerprint:
+            doc.update(fingerprint)  # content_hash, minhash, lsh_bands
+        if duplicate_of is not None:
+            doc["duplicate_of"] = duplicate_of
+        if blob:
+            doc["blob"] = blob  # original file in the BlobStore: {sha256, size}
+        return doc
+
+    @staticmethod
+    def indexable_query():
+        """
+        Resumes that belong in the vector index / snapshot: canonical, current embedding version.
+        """
+        return dict(ResumeModel.CANONICAL, **current_version_query())
@@ -0,0 +1,134 @@
+import numpy as np
+from bson.binary import Binary
+from backend.config import Config
+from backend.nlp.cleaner import TextCleaner
+
+# User-defined BSON binary subtypes (0x80-0xFF are reserved for applications)
+FLOAT32_SUBTYPE = 0x80
+INT8_SUBTYPE = 0x81  # 4-byte float32 scale followed by int8 codes
+
+def embedding_version():
+    """
+    Identifies which vectors can be compared: model + text normalization.
+    """
+    return f"{Config.MODEL_NAME}@norm{TextCleaner.NORMALIZATION_VERSION}"
+
+def embedding_meta(fallback=False):
+    """
+    Stored next to every embedding. fallback: the vector is random (embedding API was down).
+    """
+    return {
+        "model": Config.MODEL_NAME,
+        "normalization": TextCleaner.NORMALIZATION_VERSION,
+        "version": embedding_version(),
+        "fallback": fallback
+    }
+
+def compatible(meta_a, meta_b):
+    """
+    True if two embeddings may be compared: same version and neither a random fallback.
+    Documents stored before versioning (no meta) only match each other.
+    """
+    meta_a = meta_a or {}
+    meta_b = meta_b or {}
+    if meta_a.get("fallback") or meta_b.get("fallback"):
+        return False
+    return meta_a.get("version") == meta_b.get("version")
+
+def is_current(meta):
+    return compatible(meta, {"version": embedding_version()})
+
+def current_version_query():
+    """
+    Documents whose embedding is comparable with freshly computed ones.
+    """
+    return {"embedding_meta.version": embedding_version(), "embedding_meta.fallback": False}
+
+def stale_version_query():
+    """
+    Documents the re-embedding job should redo: other or no version, or a fallback vector.
+    """
+    return {"$or": [{"embedding_meta.version": {"$ne": embedding_version()}}, {"embedding_meta.fallback": True}]}
+
+def encode_embedding(embedding, storage=None):
+    """
+    Pack an embedding for storage.
+    storage: 'float32' (default, 4 bytes/dim), 'int8' (1 byte/dim + scale) or 'list' (legacy)
+    """
+    storage = storage or Config.EMBEDDING_STORAGE
+    vector = np.asarray(embedding, dtype=np.float32)
+    if storage == 'list':
+        return vector.tolist()
+    if storage == 'int8':
+        peak = float(np.abs(vector).max()) if vector.size else 0.0
+        scale = np.float32(peak / 127.0 if peak > 0 else 1.0)
+        codes = np.clip(np.rint(vector / scale), -127, 127).astype(np.int8)
+        return Binary(scale.tobytes() + codes.tobytes(), INT8_SUBTYPE)
+    if storage == 'float32':
+        return Binary(vector.tobytes(), FLOAT32_SUBTYPE)
+    raise ValueError(f"Unknown embedding storage: {storage}")
+
+def decode_embedding(value):
+    """
+    Stored embedding -> float32 NumPy vector.
+    float32 binaries are decoded zero-copy (read-only view over the BSON bytes);
+    legacy lists are still accepted.
+    """
+    if isinstance(value, Binary):
+        if value.subtype == INT8_SUBTYPE:
+            scale = np.frombuffer(value, dtype=np.float32, count=1)[0]
+            return np.frombuffer(value, dtype=np.int8, offset=4).astype(np.float32) * scale
+        return np.frombuffer(value, dtype=np.float32)
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return np.frombuffer(value, dtype=np.float32)
+    return np.asarray(value, dtype=np.float32)
+
+def normalize_rows(vectors):
+    """
+    L2-normalize each row ((n, dim) float32); zero rows are left as zeros.
+    """
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+def load_matrix(collection, query=None, field='embedding', dim=384):
+    """
+    Load every embedding matching `query` into one contiguous (n, dim) float32 matrix.
+    Binary embeddings are copied row by row from their buffers, without creating
+    a Python object per float.
+    returns: (ids, matrix)
+    """
+    query = dict(query or {})
+    query.setdefault(field, {"$ne": None})
+    capacity = collection.count_documents(query)
+    matrix = np.empty((capacity, dim), dtype=np.float32)
+    ids = []
+    for doc in collection.find(query, {field: 1}):
+        if len(ids) == capacity:
+            # Documents inserted while we were scanning
+            matrix = np.concatenate([matrix, np.empty((max(capacity, 64), dim), dtype=np.float32)])
+            capacity = len(matrix)
+        matrix[len(ids)] = decode_embedding(doc[field])
+        ids.append(doc['_id'])
+    return ids, matrix[:len(ids)]
+
+def migrate_collection(collection, storage=None, batch_size=500, field='embedding'):
+    """
+    Rewrite legacy list-format embeddings in packed binary form. Safe to re-run.
+    returns: number of migrated documents
+    """
+    from backend.database import bulk_update
+    storage = storage or Config.EMBEDDING_STORAGE
+    migrated = 0
+    batch = []
+    for doc in collection.find({field: {"$type": "array"}}, {field: 1}):
+        batch.append(({"_id": doc['_id']}, {"$set": {field: encode_embedding(doc[field], storage)}}))
+        if len(batch) >= batch_size:
+            bulk_update(collection, batch)
+            migrated += len(batch)
+            batch = []
+    if batch:
+        bulk_update(collection, batch)
+        migrated += len(batch)
+    return migrated
@@ -0,0 +1,55 @@
+import threading
+import queue
+import time
+from concurrent.futures import Future
+
+class MicroBatcher:
+    """
+    Collects items submitted from many threads for a few milliseconds and runs
+    them through `batch_fn` together, so concurrent requests share one forward pass.
+    batch_fn: callable(list of items) -> sequence of results (same order)
+    """
+    def __init__(self, batch_fn, max_batch_size=32, max_wait_ms=5):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, item):
+        """
+        Queue one item and return a Future for its result.
+        """
+        future = Future()
+        self._queue.put((item, future))
+        return future
+
+    def __call__(self, item):
+        return self.submit(item).result()
+
+    def _collect(self):
+        # Block for the first item, then keep filling until the window closes or the batch is full
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            items = [item for item, _ in batch]
+            try:
+                results = self.batch_fn(items)
+                for (_, future), result in zip(batch, results):
+                    future.set_result(result)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
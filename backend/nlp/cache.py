@@ -0,0 +1,86 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+import numpy as np
+
+class EmbeddingCache:
+    """
+    Content-addressed embedding cache.
+    Keys are sha256(model name + normalized text); values are float32 vectors.
+    Tier 1 is a bounded in-memory LRU, tier 2 an SQLite file that survives restarts.
+    """
+    def __init__(self, model_name, max_items=10000, db_path=None):
+        self.model_name = model_name
+        self.max_items = max_items
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats_counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "writes": 0}
+
+        self._db = None
+        if db_path:
+            os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+            self._db.commit()
+
+    def key(self, text):
+        """
+        text: output of TextCleaner.normalize_for_embedding
+        """
+        return hashlib.sha256(f"{self.model_name}\x00{text}".encode('utf-8')).hexdigest()
+
+    def _remember(self, key, vector):
+        # Caller holds the lock
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_items:
+            self._memory.popitem(last=False)
+            self.stats_counters["evictions"] += 1
+
+    def get(self, text):
+        """
+        Returns the cached embedding as a list, or None on a miss.
+        """
+        key = self.key(text)
+        with self._lock:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+                self.stats_counters["memory_hits"] += 1
+                return vector.tolist()
+
+            if self._db is not None:
+                row = self._db.execute("SELECT vector FROM embeddings WHERE key = ?", (key,)).fetchone()
+                if row:
+                    vector = np.frombuffer(row[0], dtype=np.float32)
+                    self._remember(key, vector)
+                    self.stats_counters["disk_hits"] += 1
+                    return vector.tolist()
+
+            self.stats_counters["misses"] += 1
+            return None
+
+    def put(self, text, embedding):
+        """
+        Store a real model embedding. Never call this with fallback vectors.
+        """
+        key = self.key(text)
+        vector = np.asarray(embedding, dtype=np.float32)
+        with self._lock:
+            self._remember(key, vector)
+            if self._db is not None:
+                self._db.execute("INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)", (key, vector.tobytes()))
+                self._db.commit()
+            self.stats_counters["writes"] += 1
+
+    def stats(self):
+        with self._lock:
+            data = dict(self.stats_counters)
+            data["memory_items"] = len(self._memory)
+            data["max_items"] = self.max_items
+            data["disk_items"] = self._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0] if self._db is not None else 0
+        lookups = data["memory_hits"] + data["disk_hits"] + data["misses"]
+        data["hit_rate"] = round((data["memory_hits"] + data["disk_hits"]) / lookups, 4) if lookups else 0.0
+        return data
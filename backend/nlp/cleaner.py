@@ -1,6 +1,15 @@
 import re
 
 class TextCleaner:
+    # Bump when normalize_for_embedding changes: stored embeddings are tagged with it
+    NORMALIZATION_VERSION = 1
+
+    # Compiled once for every document
+    WHITESPACE = re.compile(r'\s+')
+    # Remove special characters but keep basic punctuation for sentence structure
+    # Keeping @ for emails, + for phones
+    SPECIAL_CHARS = re.compile(r'[^\w\s@.+\-]')
+
     @staticmethod
     def clean_text(text):
         """
@@ -11,11 +20,9 @@ class TextCleaner:
             return ""
 
         # Remove extra whitespace
-        text = re.sub(r'\s+', ' ', text).strip()
+        text = TextCleaner.WHITESPACE.sub(' ', text).strip()
         
-        # Remove special characters but keep basic punctuation for sentence structure
-        # Keeping @ for emails, + for phones
-        text = re.sub(r'[^\w\s@.+\-]', '', text) 
+        text = TextCleaner.SPECIAL_CHARS.sub('', text)
         
         return text
 
@@ -23,6 +30,7 @@ class TextCleaner:
     def normalize_for_embedding(text):
         """
         Prepare text for embedding models (lowercase, remove extensive punctuation).
+        Same as PreparedDocument(text).lower, for callers that need nothing else.
         """
         text = TextCleaner.clean_text(text)
         return text.lower()
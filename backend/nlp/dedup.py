@@ -0,0 +1,165 @@
+import hashlib
+import re
+import zlib
+import numpy as np
+from bson.binary import Binary
+from pymongo import ASCENDING
+
+from backend.config import Config
+
+# Large prime above 2^32 for the universal hash family (a * x + b) mod p
+_HASH_PRIME = np.uint64(4294967311)
+
+_WORD = re.compile(r'\w+')
+_WHITESPACE = re.compile(r'\s+')
+
+class MinHasher:
+    """
+    MinHash signatures over word shingles, plus LSH band keys for candidate lookup.
+    Hashing is deterministic (crc32 + seeded permutations) so signatures stored by
+    one process can be compared by another.
+    """
+    def __init__(self, num_perm=None, shingle_size=None, bands=None, seed=1):
+        self.num_perm = num_perm or Config.DEDUP_NUM_PERM
+        self.shingle_size = shingle_size or Config.DEDUP_SHINGLE_SIZE
+        self.bands = bands or Config.DEDUP_BANDS
+        if self.num_perm % self.bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.rows = self.num_perm // self.bands
+        rng = np.random.default_rng(seed)
+        # a < 2^31 keeps a * x (x < 2^32) inside uint64
+        self.a = rng.integers(1, 2 ** 31, self.num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, 2 ** 32, self.num_perm, dtype=np.uint64)
+
+    def shingles(self, text):
+        return self.shingles_from_words(_WORD.findall(text.lower()))
+
+    def shingles_from_words(self, words):
+        """
+        words: lowercase \w+ tokens (PreparedDocument.tokens)
+        """
+        if len(words) < self.shingle_size:
+            return {" ".join(words)} if words else set()
+        return {" ".join(words[i:i + self.shingle_size]) for i in range(len(words) - self.shingle_size + 1)}
+
+    def signature(self, text):
+        return self.signature_from_shingles(self.shingles(text))
+
+    def signature_from_shingles(self, shingles):
+        hashes = np.fromiter((zlib.crc32(s.encode('utf-8')) for s in shingles), dtype=np.uint64)
+        if len(hashes) == 0:
+            return np.full(self.num_perm, np.iinfo(np.uint32).max, dtype=np.uint32)
+        permuted = (np.outer(self.a, hashes) + self.b[:, None]) % _HASH_PRIME
+        return permuted.min(axis=1).astype(np.uint32)
+
+    def band_keys(self, signature):
+        return [f"{i}:{zlib.crc32(signature[i * self.rows:(i + 1) * self.rows].tobytes()):08x}"
+                for i in range(self.bands)]
+
+    @staticmethod
+    def similarity(sig1, sig2):
+        """
+        Estimated Jaccard similarity of the underlying shingle sets.
+        """
+        return float(np.mean(sig1 == sig2))
+
+def content_hash(text_clean):
+    return lowercase_content_hash((text_clean or '').lower())
+
+def lowercase_content_hash(text_lower):
+    # clean_text can leave double spaces where it dropped characters
+    normalized = _WHITESPACE.sub(' ', text_lower).strip()
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+class BatchLSH:
+    """
+    In-memory LSH table over fingerprints that are not stored yet (the files of one bulk
+    import), so near-duplicates inside the same batch are found as well.
+    """
+    def __init__(self, threshold=None):
+        self.threshold = threshold or Config.DEDUP_NEAR_THRESHOLD
+        self._bands = {}  # band key -> [(signature, value)]
+
+    def add(self, fingerprint, value):
+        entry = (np.frombuffer(fingerprint["minhash"], dtype=np.uint32), value)
+        for key in fingerprint["lsh_bands"]:
+            self._bands.setdefault(key, []).append(entry)
+
+    def find(self, fingerprint):
+        """
+        returns: the value added with the most similar fingerprint at or above the threshold, or None
+        """
+        signature = np.frombuffer(fingerprint["minhash"], dtype=np.uint32)
+        best, best_score = None, self.threshold
+        seen = set()
+        for key in fingerprint["lsh_bands"]:
+            for other, value in self._bands.get(key, ()):
+                if id(other) in seen:
+                    continue
+                seen.add(id(other))
+                score = MinHasher.similarity(signature, other)
+                if score >= best_score:
+                    best, best_score = value, score
+        return best
+
+class DuplicateDetector:
+    """
+    Exact (content hash) then near-duplicate (MinHash/LSH) lookup of a resume
+    against the stored collection. Near-duplicates are linked to the canonical
+    resume via `duplicate_of` and reuse its embedding.
+    """
+    EXACT = "exact"
+    NEAR = "near"
+
+    def __init__(self, resumes_col, hasher=None, threshold=None):
+        self.resumes_col = resumes_col
+        self.hasher = hasher or MinHasher()
+        self.threshold = threshold or Config.DEDUP_NEAR_THRESHOLD
+        self.resumes_col.create_index([("content_hash", ASCENDING)])
+        self.resumes_col.create_index([("lsh_bands", ASCENDING)])
+        self.resumes_col.create_index([("duplicate_of", ASCENDING)])
+
+    def fingerprint(self, text_clean):
+        return self._fingerprint(content_hash(text_clean), self.hasher.signature(text_clean))
+
+    def fingerprint_document(self, document):
+        """
+        fingerprint() of a PreparedDocument, from its lowercase text and tokens.
+        """
+        signature = self.hasher.signature_from_shingles(self.hasher.shingles_from_words(document.tokens))
+        return self._fingerprint(lowercase_content_hash(document.lower), signature)
+
+    def _fingerprint(self, digest, signature):
+        return {
+            "content_hash": digest,
+            "minhash": Binary(signature.tobytes()),
+            "lsh_bands": self.hasher.band_keys(signature)
+        }
+
+    def find_duplicate(self, fingerprint):
+        """
+        returns: (kind, canonical_doc) or (None, None). canonical_doc holds _id, embedding and embedding_meta.
+        """
+        exact = self.resumes_col.find_one({"content_hash": fingerprint["content_hash"]},
+                                          {"_id": 1, "duplicate_of": 1})
+        canonical = self._canonical(exact) if exact else None
+        if canonical:
+            return self.EXACT, canonical
+
+        signature = np.frombuffer(fingerprint["minhash"], dtype=np.uint32)
+        best, best_score = None, self.threshold
+        for doc in self.resumes_col.find({"lsh_bands": {"$in": fingerprint["lsh_bands"]}},
+                                         {"minhash": 1, "duplicate_of": 1}):
+            if doc.get("minhash") is None:
+                continue
+            score = MinHasher.similarity(signature, np.frombuffer(doc["minhash"], dtype=np.uint32))
+            if score >= best_score:
+                best, best_score = doc, score
+        canonical = self._canonical(best) if best is not None else None
+        if canonical:
+            return self.NEAR, canonical
+        return None, None
+
+    def _canonical(self, doc):
+        canonical_id = doc.get("duplicate_of") or doc["_id"]
+        return self.resumes_col.find_one({"_id": canonical_id}, {"_id": 1, "embedding": 1, "embedding_meta": 1})
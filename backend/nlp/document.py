@@ -0,0 +1,38 @@
+import re
+from backend.nlp.cleaner import TextCleaner
+from backend.nlp.skills import skill_id, normalize_skills
+
+class PreparedDocument:
+    """
+    A resume or job text preprocessed once and passed to every downstream stage:
+      raw      the text as parsed / submitted
+      clean    TextCleaner.clean_text(raw): NER input, stored as text_clean
+      lower    clean lowercased, which is exactly TextCleaner.normalize_for_embedding(raw):
+               embedding input and cache key, skill matching, duplicate hash
+      tokens   the \\w+ words of `lower` (MinHash shingles), split on first use
+      skills   skill names (found by NER for a resume, given for a job), with
+               skill_ids (one normalized id per name) and skills_norm (unique, sorted)
+    """
+    WORD = re.compile(r'\w+')
+
+    def __init__(self, raw_text, skills=None):
+        self.raw = raw_text or ""
+        self.clean = TextCleaner.clean_text(self.raw)
+        self.lower = self.clean.lower()
+        self._tokens = None
+        self.set_skills(skills or [])
+
+    @property
+    def embedding_text(self):
+        return self.lower
+
+    @property
+    def tokens(self):
+        if self._tokens is None:
+            self._tokens = self.WORD.findall(self.lower)
+        return self._tokens
+
+    def set_skills(self, skills):
+        self.skills = list(skills)
+        self.skill_ids = [skill_id(s) for s in self.skills]
+        self.skills_norm = normalize_skills(self.skills)
@@ -1,38 +1,192 @@
-import requests
+import asyncio
 import numpy as np
 import os
 from backend.config import Config
+from backend.metrics import metrics
+from backend.models.vectors import embedding_meta, embedding_version
+from backend.nlp.remote_client import AsyncRemoteEmbeddingClient, CircuitOpenError, RemoteEmbeddingClient, RemoteEmbeddingError
 
 class ResumeEmbedder:
-    def __init__(self):
-        self.api_url = "https://api-inference.huggingface.co/pipeline/feature-extraction/sentence-transformers/all-MiniLM-L6-v2"
+    def __init__(self, backend=None):
+        self.backend = backend or Config.EMBEDDING_BACKEND
+        self.cache = None
+        if Config.EMBED_CACHE_ENABLED:
+            from backend.nlp.cache import EmbeddingCache
+            # Namespaced by embedding version, so a model or normalization change starts a fresh cache
+            self.cache = EmbeddingCache(embedding_version(), Config.EMBED_CACHE_SIZE, Config.EMBED_CACHE_PATH)
+
+        if self.backend == "local":
+            from backend.nlp.local_embedder import LocalEmbedder
+            from backend.nlp.batching import MicroBatcher
+            self.local = LocalEmbedder()
+            # Concurrent get_embedding calls are coalesced into one padded batch
+            self.batcher = MicroBatcher(self.local.embed_batch, Config.EMBED_BATCH_SIZE, Config.EMBED_BATCH_WAIT_MS)
+            return
+        if self.backend != "remote":
+            raise ValueError(f"Unknown embedding backend: {self.backend}")
+
+        self.api_url = Config.HF_API_URL
         # Use existing env var or fallback. Ideally user provides HUGGINGFACE_API_KEY
-        self.headers = {"Authorization": f"Bearer {os.getenv('HUGGINGFACE_API_KEY', '')}"}
+        self.client = RemoteEmbeddingClient(self.api_url, os.getenv('HUGGINGFACE_API_KEY', ''))
+        self.async_client = None  # created by the async serving mode on first use
+        self._async_loop = None
         print("Initialized HF Inference Embedder")
 
     def get_embedding(self, text):
+        return self.embed(text)[0]
+
+    def embed(self, text):
         """
-        Generates a 384-dimensional embedding using HF Inference API.
-        Falls back to random vector if API fails (for demo stability without key).
+        Generates a 384-dimensional embedding with the configured backend.
+        returns: (vector, embedding_meta) - the meta records model, normalization version and fallback
+        Remote: HF Inference API, falls back to random vector if API fails (for demo stability without key).
+        Local: ONNX model on CPU via the micro-batching queue, errors are raised.
+        Real embeddings are served from / stored in the embedding cache; fallbacks never are.
+        text: normalized text (TextCleaner.normalize_for_embedding), which is also the cache key
         """
         if not text:
-            return np.zeros(384).tolist()
+            return np.zeros(384).tolist(), embedding_meta()
+        
+        if self.cache is not None:
+            cached = self.cache.get(text)
+            if cached is not None:
+                metrics.inc("embedding_cache_hits")
+                return cached, embedding_meta()
         
+        if self.backend == "local":
+            embedding = self.batcher(text).tolist()
+        else:
+            embedding = self._remote_embedding(text)
+            if embedding is None:
+                # Fallback for demo/no-key scenarios
+                print("Using fallback embedding (random)")
+                metrics.inc("embedding_fallbacks")
+                return np.random.rand(384).tolist(), embedding_meta(fallback=True)
+        
+        if self.cache is not None:
+            self.cache.put(text, embedding)
+        return embedding, embedding_meta()
+
+    async def aget_embedding(self, text):
+        return (await self.aembed(text))[0]
+
+    async def aembed(self, text):
+        """
+        embed() for the async serving mode (asgi.py): the remote call is awaited,
+        and the local model runs through the micro-batcher in the default executor.
+        """
+        if not text:
+            return np.zeros(384).tolist(), embedding_meta()
+        
+        if self.cache is not None:
+            cached = self.cache.get(text)
+            if cached is not None:
+                metrics.inc("embedding_cache_hits")
+                return cached, embedding_meta()
+        
+        if self.backend == "local":
+            embedding = (await asyncio.get_running_loop().run_in_executor(None, self.batcher, text)).tolist()
+        else:
+            embedding = (await self._aremote_embeddings([text]))[0]
+            if embedding is None:
+                print("Using fallback embedding (random)")
+                metrics.inc("embedding_fallbacks")
+                return np.random.rand(384).tolist(), embedding_meta(fallback=True)
+        
+        if self.cache is not None:
+            self.cache.put(text, embedding)
+        return embedding, embedding_meta()
+
+    async def _aremote_embeddings(self, texts):
+        loop = asyncio.get_running_loop()
+        if self.async_client is None or self._async_loop is not loop:
+            # Pooled connections belong to one event loop. Shares the breaker, so both
+            # serving modes see the endpoint as down at once
+            stale_client, stale_loop = self.async_client, self._async_loop
+            self._async_loop = loop
+            self.async_client = AsyncRemoteEmbeddingClient(self.api_url, os.getenv('HUGGINGFACE_API_KEY', ''),
+                                                           breaker=self.client.breaker)
+            if stale_client is not None:
+                await self._close_stale_client(stale_client, stale_loop)
+        try:
+            return await self.async_client.embed_batch(texts)
+        except CircuitOpenError:
+            metrics.inc("embedding_circuit_open")
+            return [None] * len(texts)
+        except RemoteEmbeddingError as e:
+            print(f"Embedding Error: {e}")
+            return [None] * len(texts)
+
+    @staticmethod
+    async def _close_stale_client(client, client_loop):
+        """
+        Close a client created on a previous event loop: on that loop while it still runs,
+        otherwise here (its connections can then only be dropped).
+        """
         try:
-            response = requests.post(self.api_url, headers=self.headers, json={"inputs": text, "options": {"wait_for_model": True}})
-            if response.status_code == 200:
-                # The API returns a list of vectors if inputs is list, or one vector if input is string?
-                # Usually returns: [0.1, 0.2, ...] or [[0.1, ...]] depending on input
-                data = response.json()
-                if isinstance(data, list):
-                    # Check if it's a list of list (batched) or just list (single)
-                    if len(data) > 0 and isinstance(data[0], list):
-                         return data[0]
-                    return data
-            print(f"HF API Error {response.status_code}: {response.text}")
+            if client_loop is not None and client_loop.is_running():
+                await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(client.close(), client_loop))
+            else:
+                await client.close()
         except Exception as e:
+            if client_loop is None or not client_loop.is_closed():
+                print(f"Closing stale embedding client failed: {e}")
+
+    def _remote_embedding(self, text):
+        """
+        One HF Inference API call. Returns the vector, or None if the API failed.
+        """
+        vectors = self._remote_embeddings([text])
+        return vectors[0]
+
+    def _remote_embeddings(self, texts):
+        """
+        One batched HF Inference API call. Returns one vector per text, or Nones if the API failed.
+        """
+        try:
+            return self.client.embed_batch(texts)
+        except CircuitOpenError:
+            metrics.inc("embedding_circuit_open")
+            return [None] * len(texts)
+        except RemoteEmbeddingError as e:
             print(f"Embedding Error: {e}")
-            
-        # Fallback for demo/no-key scenarios
-        print("Using fallback embedding (random)")
-        return np.random.rand(384).tolist()
+            return [None] * len(texts)
+
+    def get_embeddings(self, texts):
+        return self.embed_many(texts)[0]
+
+    def embed_many(self, texts):
+        """
+        Embeds a list of texts in batches of EMBED_BATCH_SIZE: padded ONNX batches
+        locally, one multi-input API request per batch remotely.
+        returns: (vectors, embedding metas), in input order
+        """
+        embeddings = [np.zeros(384).tolist() for _ in texts]
+        metas = [embedding_meta() for _ in texts]
+        todo = []
+        for i, t in enumerate(texts):
+            if not t:
+                continue
+            cached = self.cache.get(t) if self.cache is not None else None
+            if cached is not None:
+                embeddings[i] = cached
+            else:
+                todo.append(i)
+        for start in range(0, len(todo), Config.EMBED_BATCH_SIZE):
+            chunk = todo[start:start + Config.EMBED_BATCH_SIZE]
+            batch = [texts[i] for i in chunk]
+            if self.backend == "local":
+                vectors = [vec.tolist() for vec in self.local.embed_batch(batch)]
+            else:
+                vectors = self._remote_embeddings(batch)
+            for i, vec in zip(chunk, vectors):
+                if vec is None:
+                    # Same fallback as get_embedding (never cached)
+                    metrics.inc("embedding_fallbacks")
+                    embeddings[i] = np.random.rand(384).tolist()
+                    metas[i] = embedding_meta(fallback=True)
+                    continue
+                embeddings[i] = vec
+                if self.cache is not None:
+                    self.cache.put(texts[i], embeddings[i])
+        return embeddings, metas
@@ -0,0 +1,55 @@
+import os
+import numpy as np
+from backend.config import Config
+
+class LocalEmbedder:
+    """
+    CPU inference for all-MiniLM-L6-v2 with ONNX Runtime.
+    Expects Config.LOCAL_MODEL_DIR to hold the exported `model.onnx` and the
+    HuggingFace `tokenizer.json` (e.g. from `optimum-cli export onnx --model
+    sentence-transformers/all-MiniLM-L6-v2`). Requires `onnxruntime` and `tokenizers`.
+    """
+    def __init__(self, model_dir=None, max_length=None):
+        try:
+            import onnxruntime as ort
+            from tokenizers import Tokenizer
+        except ImportError:
+            raise ImportError("Local embedding backend needs `pip install onnxruntime tokenizers`")
+
+        model_dir = model_dir or Config.LOCAL_MODEL_DIR
+        self.max_length = max_length or Config.LOCAL_MAX_SEQ_LENGTH
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=self.max_length)
+        self.tokenizer.enable_padding()
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = Config.LOCAL_NUM_THREADS
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, "model.onnx"), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        print(f"Initialized Local ONNX Embedder ({Config.MODEL_NAME})")
+
+    def embed_batch(self, texts):
+        """
+        Embed a list of texts as one padded batch.
+        returns: (n, 384) float32 array of L2-normalized sentence embeddings
+        """
+        encodings = self.tokenizer.encode_batch(list(texts))
+        input_ids = np.asarray([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.asarray([e.attention_mask for e in encodings], dtype=np.int64)
+
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.zeros_like(input_ids)
+        token_embeddings = self.session.run(None, feeds)[0]
+
+        # Mean pooling over real (non-padding) tokens, then normalize like sentence-transformers
+        mask = attention_mask[:, :, None].astype(np.float32)
+        summed = (token_embeddings * mask).sum(axis=1)
+        counts = np.clip(mask.sum(axis=1), 1e-9, None)
+        pooled = summed / counts
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return (pooled / norms).astype(np.float32)
@@ -1,21 +1,42 @@
 import re
+from backend.config import Config
+from backend.nlp.skills import SkillMatcher, load_skill_list
 
 class EntityExtractor:
-    def __init__(self):
-        # Lightweight Regex Patterns
-        self.skill_list = [
-            "Python", "Java", "C++", "JavaScript", "React", "Flask", "Django",
-            "Machine Learning", "Deep Learning", "NLP", "SQL", "NoSQL", "MongoDB",
-            "Docker", "Kubernetes", "AWS", "Azure", "Git", "CI/CD", "Project Management",
-            "Communication", "Leadership", "Next.js", "Tailwind CSS", "TypeScript"
-        ]
-        print("Initialized Regex Entity Extractor")
+    DEFAULT_SKILLS = [
+        "Python", "Java", "C++", "JavaScript", "React", "Flask", "Django",
+        "Machine Learning", "Deep Learning", "NLP", "SQL", "NoSQL", "MongoDB",
+        "Docker", "Kubernetes", "AWS", "Azure", "Git", "CI/CD", "Project Management",
+        "Communication", "Leadership", "Next.js", "Tailwind CSS", "TypeScript"
+    ]
+    EMAIL_PATTERN = re.compile(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}')
+
+    def __init__(self, skill_list=None):
+        # Skill vocabulary: explicit list > Config.SKILLS_FILE > built-in defaults
+        if skill_list is None:
+            skill_list = load_skill_list(Config.SKILLS_FILE) if Config.SKILLS_FILE else self.DEFAULT_SKILLS
+        self.skill_list = list(skill_list)
+        # Whole vocabulary compiled once into a single-pass matcher
+        self.skill_matcher = SkillMatcher(self.skill_list)
+        print(f"Initialized Regex Entity Extractor ({len(self.skill_list)} skills)")
 
     def extract(self, text):
         """
         Extracts entities from text using simple keyword matching and regex.
         Returns a dict with classified entities.
         """
+        return self._extract(text, text.lower() if text else "")
+
+    def extract_document(self, document):
+        """
+        extract() over a PreparedDocument, reusing its clean and lowercase forms.
+        The skills found are set on the document.
+        """
+        entities = self._extract(document.clean, document.lower)
+        document.set_skills(entities["SKILL"])
+        return entities
+
+    def _extract(self, text, text_lower):
         entities = {
             "SKILL": [],
             "ORG": [],
@@ -25,16 +46,11 @@ class EntityExtractor:
             "EMAIL": []
         }
         
-        # 1. Skills (Case-insensitive keyword match)
-        text_lower = text.lower()
-        for skill in self.skill_list:
-            # Use regex to match exact word boundary
-            if re.search(r'\b' + re.escape(skill.lower()) + r'\b', text_lower):
-                 entities["SKILL"].append(skill)
+        # 1. Skills (Case-insensitive keyword match, one pass over the text)
+        entities["SKILL"] = self.skill_matcher.match_lower(text_lower)
                  
         # 2. Email (Regex)
-        email_pattern = r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}'
-        emails = re.findall(email_pattern, text)
+        emails = self.EMAIL_PATTERN.findall(text)
         if emails:
             entities["EMAIL"] = list(set(emails))
             
@@ -1,55 +1,162 @@
-
-import docx
+import codecs
+import io
 import os
+import shutil
+import tempfile
+import time
+from backend.config import Config
 
 class ResumeParser:
     @staticmethod
-    def parse(file_path):
+    def parse(source, max_pages=None, max_chars=None, time_budget=None, filename=None):
         """
         Extracts text from a file based on its extension.
         Supported formats: .pdf, .docx, .txt
+        source: a path, bytes, or a seekable binary file-like object (e.g. an upload
+        stream, parsed in place); `filename` gives the format when source is not a path.
+        Text is pulled one page/paragraph at a time and parsing stops early once
+        max_chars, max_pages or the time budget (seconds) is reached.
+        Defaults come from Config.PARSE_MAX_CHARS / PARSE_MAX_PAGES / PARSE_TIME_BUDGET.
+        """
+        chunks = ResumeParser.iter_text(source, max_pages, filename)
+        return ResumeParser.collect(chunks, max_chars, time_budget)
+
+    @staticmethod
+    def iter_text(source, max_pages=None, filename=None):
         """
-        ext = os.path.splitext(file_path)[1].lower()
+        Generator over the text of a file, one page (PDF), paragraph (DOCX) or block (TXT) at a time.
+        """
+        if filename is None:
+            filename = os.fspath(source) if isinstance(source, (str, os.PathLike)) else getattr(source, 'name', '')
+        ext = os.path.splitext(str(filename))[1].lower()
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            source = io.BytesIO(source)
         
         if ext == '.pdf':
-            return ResumeParser.parse_pdf(file_path)
+            return ResumeParser.iter_pdf(source, max_pages)
         elif ext == '.docx':
-            return ResumeParser.parse_docx(file_path)
+            return ResumeParser.iter_docx(source)
         elif ext == '.txt':
-            return ResumeParser.parse_txt(file_path)
+            return ResumeParser.iter_txt(source)
         else:
             raise ValueError(f"Unsupported file format: {ext}")
 
     @staticmethod
-    def parse_pdf(file_path):
-        text = ""
+    def spool(stream, max_size=None, limit=None):
+        """
+        Copy a (possibly non-seekable) binary stream into memory, or into a temp
+        file once it grows past max_size (Config.PARSE_SPOOL_BYTES).
+        limit: stop and raise ValueError once more than this many bytes were read
+        (counts what the stream really yields, e.g. a decompressing zip member)
+        returns: a seekable file object positioned at the start; close it when done
+        """
+        spooled = tempfile.SpooledTemporaryFile(max_size=max_size or Config.PARSE_SPOOL_BYTES)
+        if limit is None:
+            shutil.copyfileobj(stream, spooled, 65536)
+        else:
+            total = 0
+            while True:
+                block = stream.read(min(65536, limit - total + 1))
+                if not block:
+                    break
+                total += len(block)
+                if total > limit:
+                    spooled.close()
+                    raise ValueError(f"Stream larger than {limit} bytes")
+                spooled.write(block)
+        spooled.seek(0)
+        return spooled
+
+    @staticmethod
+    def collect(chunks, max_chars=None, time_budget=None):
+        """
+        Joins text chunks once (no quadratic string building), honouring the
+        character limit and time budget. The budget is checked between chunks.
+        """
+        max_chars = max_chars or Config.PARSE_MAX_CHARS
+        time_budget = time_budget or Config.PARSE_TIME_BUDGET
+        deadline = time.monotonic() + time_budget
+        parts = []
+        total = 0
+        try:
+            for chunk in chunks:
+                if total + len(chunk) >= max_chars:
+                    parts.append(chunk[:max_chars - total])
+                    break
+                parts.append(chunk)
+                total += len(chunk)
+                if time.monotonic() > deadline:
+                    print(f"Parsing stopped after {time_budget}s budget ({total} chars)")
+                    break
+        finally:
+            # Release the underlying file/reader as soon as we stop pulling pages
+            if hasattr(chunks, 'close'):
+                chunks.close()
+        return "".join(parts)
+
+    @staticmethod
+    def iter_pdf(source, max_pages=None):
+        max_pages = max_pages or Config.PARSE_MAX_PAGES
         try:
             from pypdf import PdfReader
-            reader = PdfReader(file_path)
-            for page in reader.pages:
+            reader = PdfReader(source)
+            for i, page in enumerate(reader.pages):
+                if i >= max_pages:
+                    break
                 extracted = page.extract_text()
                 if extracted:
-                    text += extracted + "\n"
+                    yield extracted + "\n"
         except Exception as e:
-            print(f"Error parsing PDF {file_path}: {e}")
-        return text
+            print(f"Error parsing PDF {ResumeParser._name(source)}: {e}")
 
     @staticmethod
-    def parse_docx(file_path):
-        text = ""
+    def iter_docx(source):
         try:
-            doc = docx.Document(file_path)
+            import docx  # python-docx pulls in lxml; only load it for .docx files
+            doc = docx.Document(source)
             for paragraph in doc.paragraphs:
-                text += paragraph.text + "\n"
+                yield paragraph.text + "\n"
         except Exception as e:
-            print(f"Error parsing DOCX {file_path}: {e}")
-        return text
+            print(f"Error parsing DOCX {ResumeParser._name(source)}: {e}")
 
     @staticmethod
-    def parse_txt(file_path):
+    def iter_txt(source, block_size=65536):
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return f.read()
+            if isinstance(source, (str, os.PathLike)):
+                with open(source, 'r', encoding='utf-8') as f:
+                    while True:
+                        block = f.read(block_size)
+                        if not block:
+                            break
+                        yield block
+            else:
+                # Binary stream: decode incrementally (universal newlines, as open() does above)
+                # rather than wrapping it in a TextIOWrapper that would close the caller's file
+                decoder = io.IncrementalNewlineDecoder(codecs.getincrementaldecoder('utf-8')(), translate=True)
+                while True:
+                    data = source.read(block_size)
+                    block = decoder.decode(data, final=not data)
+                    if block:
+                        yield block
+                    if not data:
+                        break
         except Exception as e:
-            print(f"Error parsing TXT {file_path}: {e}")
-            return ""
+            print(f"Error parsing TXT {ResumeParser._name(source)}: {e}")
+
+    @staticmethod
+    def _name(source):
+        if isinstance(source, (str, os.PathLike)):
+            return os.fspath(source)
+        return getattr(source, 'name', None) or "<stream>"
+
+    @staticmethod
+    def parse_pdf(file_path):
+        return ResumeParser.collect(ResumeParser.iter_pdf(file_path))
+
+    @staticmethod
+    def parse_docx(file_path):
+        return ResumeParser.collect(ResumeParser.iter_docx(file_path))
+
+    @staticmethod
+    def parse_txt(file_path):
+        return ResumeParser.collect(ResumeParser.iter_txt(file_path))
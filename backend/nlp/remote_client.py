@@ -0,0 +1,230 @@
+import asyncio
+import random
+import threading
+import time
+
+from backend.config import Config
+
+class RemoteEmbeddingError(Exception):
+    pass
+
+class CircuitOpenError(RemoteEmbeddingError):
+    pass
+
+class CircuitBreaker:
+    """
+    closed -> (failure_threshold consecutive failures) -> open: calls fail fast
+    open -> (reset_timeout elapsed) -> half-open: one trial call decides
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and self.clock() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self.state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = self.clock()
+            self._trial_in_flight = False
+
+class RemoteEmbeddingClient:
+    """
+    HF feature-extraction API client: one pooled keep-alive Session, connect/read
+    timeouts, bounded retries with full-jitter exponential backoff, and a circuit
+    breaker so a dead endpoint costs nothing once it has been detected.
+    """
+    RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+    def __init__(self, api_url, api_key=None, connect_timeout=None, read_timeout=None, max_retries=None,
+                 backoff_base=None, backoff_max=None, breaker=None, pool_size=None):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.api_url = api_url
+        self.timeout = (connect_timeout or Config.EMBED_CONNECT_TIMEOUT, read_timeout or Config.EMBED_READ_TIMEOUT)
+        self.max_retries = Config.EMBED_MAX_RETRIES if max_retries is None else max_retries
+        self.backoff_base = Config.EMBED_BACKOFF_BASE if backoff_base is None else backoff_base
+        self.backoff_max = backoff_max or Config.EMBED_BACKOFF_MAX
+        self.breaker = breaker or CircuitBreaker(Config.EMBED_BREAKER_THRESHOLD, Config.EMBED_BREAKER_RESET)
+
+        pool_size = pool_size or Config.EMBED_POOL_SIZE
+        self.session = requests.Session()
+        # Retries are handled here (with the breaker), not by urllib3
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        if api_key:
+            self.session.headers["Authorization"] = f"Bearer {api_key}"
+        # Every transport-level failure (connect, timeout, broken chunked body, redirects, bad URL)
+        self._request_errors = (requests.RequestException,)
+
+    def _backoff(self, attempt):
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    @staticmethod
+    def _parse(data, expected):
+        """
+        API output -> list of vectors. Token-level outputs (one vector per token) are mean-pooled.
+        """
+        if isinstance(data, dict):
+            # Errors such as a model still loading can come back as {"error": ...} with a 200
+            raise RemoteEmbeddingError(f"Expected {expected} embeddings, got an object: {str(data.get('error', data))[:200]}")
+        if not isinstance(data, list):
+            raise RemoteEmbeddingError(f"Expected {expected} embeddings, got {type(data).__name__}")
+        if expected == 1 and data and not isinstance(data[0], list):
+            data = [data]  # single input answered with a bare vector
+        if len(data) != expected:
+            raise RemoteEmbeddingError(f"Expected {expected} embeddings, got {len(data)}")
+        vectors = []
+        for item in data:
+            if not isinstance(item, list):
+                raise RemoteEmbeddingError(f"Expected a vector, got {type(item).__name__}")
+            if item and isinstance(item[0], list):
+                width = len(item[0])
+                item = [sum(token[i] for token in item) / len(item) for i in range(width)]
+            vectors.append(item)
+        return vectors
+
+    def embed_batch(self, texts):
+        """
+        Embed several texts in one request.
+        returns: list of vectors (same order); raises RemoteEmbeddingError / CircuitOpenError
+        """
+        if not texts:
+            return []
+        if not self.breaker.allow():
+            raise CircuitOpenError("Embedding endpoint circuit is open")
+
+        payload = {"inputs": list(texts), "options": {"wait_for_model": True}}
+        last_error = None
+        succeeded = False
+        try:
+            for attempt in range(self.max_retries + 1):
+                if attempt:
+                    time.sleep(self._backoff(attempt - 1))
+                try:
+                    response = self.session.post(self.api_url, json=payload, timeout=self.timeout)
+                except self._request_errors as e:
+                    last_error = RemoteEmbeddingError(f"{type(e).__name__}: {e}")
+                    continue
+                if response.status_code == 200:
+                    try:
+                        vectors = self._parse(response.json(), len(texts))
+                    except (RemoteEmbeddingError, ValueError, TypeError, IndexError) as e:
+                        last_error = RemoteEmbeddingError(f"Bad response: {e}")
+                        break
+                    self.breaker.record_success()
+                    succeeded = True
+                    return vectors
+                last_error = RemoteEmbeddingError(f"HF API Error {response.status_code}: {response.text[:200]}")
+                if response.status_code not in self.RETRY_STATUSES:
+                    break
+            raise last_error
+        finally:
+            # Also on unexpected errors: a half-open trial must always be released
+            if not succeeded:
+                self.breaker.record_failure()
+
+    def close(self):
+        self.session.close()
+
+class AsyncRemoteEmbeddingClient:
+    """
+    asyncio twin of RemoteEmbeddingClient on httpx.AsyncClient, for the ASGI
+    serving mode: waiting on the API parks a coroutine instead of a worker thread.
+    Same timeouts, retry policy and breaker semantics (pass one breaker to share state).
+    """
+    RETRY_STATUSES = RemoteEmbeddingClient.RETRY_STATUSES
+
+    def __init__(self, api_url, api_key=None, connect_timeout=None, read_timeout=None, max_retries=None,
+                 backoff_base=None, backoff_max=None, breaker=None, pool_size=None):
+        import httpx  # only the async serving mode needs it
+
+        self.api_url = api_url
+        self.max_retries = Config.EMBED_MAX_RETRIES if max_retries is None else max_retries
+        self.backoff_base = Config.EMBED_BACKOFF_BASE if backoff_base is None else backoff_base
+        self.backoff_max = backoff_max or Config.EMBED_BACKOFF_MAX
+        self.breaker = breaker or CircuitBreaker(Config.EMBED_BREAKER_THRESHOLD, Config.EMBED_BREAKER_RESET)
+
+        read_timeout = read_timeout or Config.EMBED_READ_TIMEOUT
+        timeout = httpx.Timeout(read_timeout, connect=connect_timeout or Config.EMBED_CONNECT_TIMEOUT)
+        pool_size = pool_size or Config.EMBED_POOL_SIZE
+        limits = httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+        headers = {"Authorization": f"Bearer {api_key}"} if api_key else None
+        self.client = httpx.AsyncClient(timeout=timeout, limits=limits, headers=headers)
+        # Transport errors plus decoding / redirect / protocol errors
+        self._request_errors = (httpx.HTTPError,)
+
+    _backoff = RemoteEmbeddingClient._backoff
+
+    async def embed_batch(self, texts):
+        """
+        Embed several texts in one request.
+        returns: list of vectors (same order); raises RemoteEmbeddingError / CircuitOpenError
+        """
+        if not texts:
+            return []
+        if not self.breaker.allow():
+            raise CircuitOpenError("Embedding endpoint circuit is open")
+
+        payload = {"inputs": list(texts), "options": {"wait_for_model": True}}
+        last_error = None
+        succeeded = False
+        try:
+            for attempt in range(self.max_retries + 1):
+                if attempt:
+                    await asyncio.sleep(self._backoff(attempt - 1))
+                try:
+                    response = await self.client.post(self.api_url, json=payload)
+                except self._request_errors as e:
+                    last_error = RemoteEmbeddingError(f"{type(e).__name__}: {e}")
+                    continue
+                if response.status_code == 200:
+                    try:
+                        vectors = RemoteEmbeddingClient._parse(response.json(), len(texts))
+                    except (RemoteEmbeddingError, ValueError, TypeError, IndexError) as e:
+                        last_error = RemoteEmbeddingError(f"Bad response: {e}")
+                        break
+                    self.breaker.record_success()
+                    succeeded = True
+                    return vectors
+                last_error = RemoteEmbeddingError(f"HF API Error {response.status_code}: {response.text[:200]}")
+                if response.status_code not in self.RETRY_STATUSES:
+                    break
+            raise last_error
+        finally:
+            # Also on cancellation or unexpected errors: the shared breaker's half-open trial is released
+            if not succeeded:
+                self.breaker.record_failure()
+
+    async def close(self):
+        await self.client.aclose()
@@ -0,0 +1,131 @@
+import re
+from backend.nlp.cleaner import TextCleaner
+
+def load_skill_list(file_path):
+    """
+    Reads a skill vocabulary file: one skill per line, blank lines and '#' comments ignored.
+    """
+    skills = []
+    with open(file_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.split('#', 1)[0].strip()
+            if line:
+                skills.append(line)
+    return skills
+
+def skill_id(skill):
+    """
+    Normalized id of one skill name: stripped, lowercase.
+    """
+    return skill.strip().lower()
+
+def normalize_skills(skills):
+    """
+    Canonical form used for skill filters: lowercase, stripped, unique, sorted.
+    """
+    return sorted({skill_id(s) for s in (skills or []) if s and s.strip()})
+
+def resume_skill_ids(resume):
+    """
+    A resume's stored skills_norm; normalized here only for resumes stored before it existed.
+    """
+    ids = resume.get('skills_norm')
+    return ids if ids is not None else normalize_skills(resume.get('skills'))
+
+def job_skill_ids(job):
+    """
+    A job's stored required_skills_norm (one id per entry of required_skills, same order);
+    normalized here only for jobs stored before it existed.
+    """
+    ids = job.get('required_skills_norm')
+    return ids if ids is not None else [skill_id(s) for s in job.get('required_skills', [])]
+
+class SkillMatcher:
+    """
+    Finds every vocabulary skill in a text with a single regex scan.
+    The whole vocabulary is compiled once into a trie-shaped pattern, so matching
+    cost grows with the text length rather than with the number of skills.
+    Boundaries are checked with (?<!\\w) / (?!\\w) instead of \\b so skills that
+    start or end with symbols (C++, .NET, Next.js) still match.
+    Overlapping skills are all reported: the scan is a zero-width lookahead at every
+    word start, and each longest hit also implies the shorter skills nested inside it
+    (e.g. 'Machine Learning' -> 'Machine').
+    """
+    WORD_CHAR = re.compile(r'\w')
+
+    def __init__(self, skills):
+        self.skills = list(dict.fromkeys(skills))
+        self._canonical = {}
+        for idx, skill in enumerate(self.skills):
+            for form in self._forms(skill):
+                self._canonical.setdefault(form, idx)
+        self.pattern = self._compile(self._canonical.keys())
+        # The scan reports only the longest form at each word start; shorter forms that are a
+        # word-bounded prefix of it ('machine' in 'machine learning') are implied by the hit.
+        # Forms starting later inside it are found by the scan's lookahead at that word start.
+        self._implied = {form: self._prefixes(form) for form in self._canonical}
+
+    @staticmethod
+    def _forms(skill):
+        """
+        Lowercase surface forms of a skill: as written, and as it reads after
+        TextCleaner.clean_text (e.g. 'CI/CD' -> 'cicd'), since NER runs on clean text.
+        """
+        written = re.sub(r'\s+', ' ', skill).strip().lower()
+        forms = [written]
+        cleaned = TextCleaner.clean_text(skill).lower()
+        if cleaned and cleaned != written:
+            forms.append(cleaned)
+        return forms
+
+    @staticmethod
+    def _trie_to_regex(node):
+        # '' marks the end of a word; children are tried before it so the longest form wins
+        branches = [re.escape(ch) + SkillMatcher._trie_to_regex(child) for ch, child in sorted(node.items()) if ch != '']
+        if not branches:
+            return ''
+        if len(branches) == 1 and '' not in node:
+            return branches[0]
+        group = '(?:' + '|'.join(branches) + ')'
+        return group + '?' if '' in node else group
+
+    @staticmethod
+    def _compile(forms):
+        trie = {}
+        for form in forms:
+            node = trie
+            for ch in form:
+                node = node.setdefault(ch, {})
+            node[''] = {}
+        if not trie:
+            return None
+        return re.compile(r'(?<!\w)(?=(' + SkillMatcher._trie_to_regex(trie) + r')(?!\w))')
+
+    def _prefixes(self, form):
+        """
+        Walks `form` through the vocabulary and collects every form ending on a word boundary
+        along the way, itself included.
+        returns: set of skill indexes
+        """
+        found = set()
+        for end in range(1, len(form) + 1):
+            if (end == len(form) or not self.WORD_CHAR.match(form[end])) and form[:end] in self._canonical:
+                found.add(self._canonical[form[:end]])
+        return found
+
+    def match(self, text):
+        """
+        Returns the canonical names of all skills found in text, in vocabulary order.
+        """
+        return self.match_lower(text.lower() if text else text)
+
+    def match_lower(self, text_lower):
+        """
+        match() for text that is already lowercase (PreparedDocument.lower).
+        """
+        if not text_lower or self.pattern is None:
+            return []
+        found = set()
+        for m in self.pattern.finditer(text_lower):
+            found |= self._implied[m.group(1)]
+        return [self.skills[idx] for idx in sorted(found)]
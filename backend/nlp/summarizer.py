@@ -1,3 +1,5 @@
+from backend.nlp.skills import job_skill_ids
+
 
 class SmartSummarizer:
     @staticmethod
@@ -7,7 +9,9 @@ class SmartSummarizer:
         """
         score = match_details['total_score']
         matched = match_details['matched_skills']
-        missing = [s for s in job_data.get('required_skills', []) if s.lower() not in [m.lower() for m in matched]]
+        # matched_skills holds skill ids, compared against the job's stored ids
+        matched_ids = set(matched)
+        missing = [s for s, sid in zip(job_data.get('required_skills', []), job_skill_ids(job_data)) if sid not in matched_ids]
         
         summary = []
         
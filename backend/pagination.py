@@ -0,0 +1,129 @@
+import base64
+import json
+from datetime import datetime
+from bson.errors import InvalidId
+from bson.objectid import ObjectId
+from flask import Response, current_app, request, stream_with_context
+
+from backend.config import Config
+
+def build_projection(excluded, optional=()):
+    """
+    Exclusion projection that drops heavy fields unless the client asks for them
+    with ?include=field1,field2 (only fields listed in `optional` can be included).
+    """
+    requested = {f.strip() for f in request.args.get('include', '').split(',') if f.strip()}
+    projection = {field: 0 for field in excluded}
+    for field in optional:
+        if field not in requested:
+            projection[field] = 0
+    return projection
+
+class InvalidListRequest(ValueError):
+    """
+    Bad ?cursor= / ?sort= / ?limit= on a listing endpoint (a client error, answered with 400).
+    """
+
+def encode_cursor(doc, sort_field):
+    payload = {"id": str(doc['_id'])}
+    if sort_field != '_id':
+        # A missing sort value is kept as an explicit null: it sorts before every date
+        key = doc.get(sort_field)
+        payload["key"] = key.isoformat() if isinstance(key, datetime) else None
+    raw = json.dumps(payload).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+def decode_cursor(cursor, sort_field):
+    """
+    Turns an opaque cursor back into a keyset filter on (sort_field, _id).
+    raises: InvalidListRequest for cursors this function did not produce
+    """
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        last_id = ObjectId(payload["id"])
+        raw_key = payload.get("key")
+        last_key = datetime.fromisoformat(raw_key) if raw_key is not None else None
+    except (ValueError, TypeError, KeyError, AttributeError, InvalidId):
+        raise InvalidListRequest("Invalid cursor")
+    if sort_field == '_id':
+        return {"_id": {"$gt": last_id}}
+    if last_key is None:
+        # Still inside the documents without a sort value, then everything that has one
+        return {"$or": [
+            {sort_field: None, "_id": {"$gt": last_id}},
+            {sort_field: {"$ne": None}}
+        ]}
+    return {"$or": [
+        {sort_field: {"$gt": last_key}},
+        {sort_field: last_key, "_id": {"$gt": last_id}}
+    ]}
+
+def serialize(doc):
+    if '_id' in doc:
+        doc['_id'] = str(doc['_id'])
+    return doc
+
+def stream_json_array(docs):
+    """
+    Yields a JSON array one document at a time (same body as jsonify(list)).
+    """
+    dumps = current_app.json.dumps
+    def generate():
+        yield '['
+        first = True
+        for doc in docs:
+            if not first:
+                yield ','
+            first = False
+            yield dumps(serialize(doc))
+        yield ']'
+    return Response(stream_with_context(generate()), mimetype='application/json')
+
+def stream_ndjson(docs):
+    """
+    Yields newline-delimited JSON straight from a cursor.
+    """
+    dumps = current_app.json.dumps
+    def generate():
+        for doc in docs:
+            yield dumps(serialize(doc)) + '\n'
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+def list_response(collection, projection, query=None, sort_fields=('_id', 'upload_date')):
+    """
+    Shared listing logic for collection endpoints:
+      ?limit=&cursor=    keyset pagination -> {"items": [...], "next_cursor": ...}, limit clamped to LIST_MAX_LIMIT
+      ?format=ndjson     streamed NDJSON (honours cursor/limit)
+      (no params)        streamed JSON array of every document
+      ?sort=             one of sort_fields (keyset on (sort, _id))
+    raises: InvalidListRequest for an unknown sort, a malformed cursor or a limit below 1
+    """
+    query = dict(query or {})
+    sort_field = request.args.get('sort', '_id')
+    if sort_field not in sort_fields:
+        raise InvalidListRequest(f"sort must be one of: {', '.join(sort_fields)}")
+    limit = request.args.get('limit', type=int)
+    if 'limit' in request.args and (limit is None or limit <= 0):
+        raise InvalidListRequest("limit must be a positive integer")
+    if limit is not None:
+        limit = min(limit, Config.LIST_MAX_LIMIT)
+    cursor = request.args.get('cursor')
+
+    if cursor:
+        query = {"$and": [query, decode_cursor(cursor, sort_field)]} if query else decode_cursor(cursor, sort_field)
+    order = [("_id", 1)] if sort_field == '_id' else [(sort_field, 1), ("_id", 1)]
+    docs = collection.find(query, projection).sort(order)
+
+    if request.args.get('format') == 'ndjson':
+        return stream_ndjson(docs.limit(limit) if limit else docs)
+
+    if limit is None and cursor is None:
+        return stream_json_array(docs)
+
+    limit = limit or 50
+    items = list(docs.limit(limit + 1))
+    next_cursor = encode_cursor(items[limit - 1], sort_field) if len(items) > limit else None
+    return current_app.json.response({
+        "items": [serialize(doc) for doc in items[:limit]],
+        "next_cursor": next_cursor
+    })
@@ -0,0 +1,71 @@
+"""
+All-jobs ranking: one MatchingEngine.score_batch scan of the candidate pool per
+job versus BatchRanker's blocked jobs x candidates products with top-K selection.
+
+    python benchmarks/bench_batch_rank.py [n_candidates] [n_jobs] [top_k]
+
+Uses MONGO_URI when reachable, otherwise the in-memory mongomock fallback.
+"""
+import os
+import random
+import sys
+import time
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.database import db_instance
+from backend.matching.batch import BatchRanker
+from backend.matching.cache import CANDIDATE_PROJECTION
+from backend.matching.engine import MatchingEngine
+from backend.matching.prefilter import has_all
+from backend.models.job import JobModel
+from backend.models.resume import ResumeModel
+
+SKILLS = ["Python", "Java", "SQL", "Docker", "AWS", "React", "Go", "Rust", "Flask", "Kubernetes", "Spark", "Node.js"]
+
+def seed(db, n_candidates, n_jobs, chunk=1000):
+    rng = random.Random(0)
+    vectors = np.random.default_rng(0).standard_normal((n_candidates + n_jobs, 384), dtype=np.float32)
+    db.bench_rank_resumes.drop()
+    db.bench_rank_jobs.drop()
+    for start in range(0, n_candidates, chunk):
+        db.bench_rank_resumes.insert_many([
+            ResumeModel.create(f"bench-{i}.txt", "", "", {"SKILL": rng.sample(SKILLS, rng.randint(1, 6))}, vectors[i])
+            for i in range(start, min(start + chunk, n_candidates))])
+    db.bench_rank_jobs.insert_many([
+        JobModel.create(f"job-{j}", "", rng.sample(SKILLS, 3), vectors[n_candidates + j],
+                        rng.sample(SKILLS, 1) if j % 4 == 0 else [])
+        for j in range(n_jobs)])
+
+def per_job(db, top_k):
+    # What refreshing every job one at a time costs: a full candidate scan and score per job
+    for job in db.bench_rank_jobs.find({}, {"description": 0}):
+        candidates = [c for c in db.bench_rank_resumes.find(ResumeModel.CANONICAL, CANDIDATE_PROJECTION)
+                      if has_all(c, job.get('mandatory_skills'))]
+        scores = MatchingEngine.score_batch(job, candidates)
+        sorted(zip(candidates, scores), key=lambda x: x[1]['total_score'], reverse=True)[:top_k]
+
+def run(n_candidates=5000, n_jobs=100, top_k=50):
+    db = db_instance.get_db()
+    seed(db, n_candidates, n_jobs)
+
+    start = time.perf_counter()
+    per_job(db, top_k)
+    loop_seconds = time.perf_counter() - start
+
+    ranker = BatchRanker(db.bench_rank_jobs, db.bench_rank_resumes, db.bench_rank_shortlists, top_k=top_k)
+    summary = ranker.rank_all()
+
+    print(f"{n_candidates} candidates x {n_jobs} jobs, top {top_k} per job")
+    print(f"  per-job scans           {loop_seconds:8.2f} s (scoring only, nothing stored)")
+    print(f"  batch rank_all          {summary['seconds']:8.2f} s (including {summary['stored']} stored shortlist entries, "
+          f"{summary['workers']} worker(s))")
+    print(f"  speedup: x{loop_seconds / summary['seconds']:.1f}")
+
+    for name in ("bench_rank_resumes", "bench_rank_jobs", "bench_rank_shortlists"):
+        db[name].drop()
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:4]]
+    run(*args)
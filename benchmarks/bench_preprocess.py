@@ -0,0 +1,94 @@
+"""
+Per-upload text preprocessing: the previous path (clean, re-clean for the
+embedding, lowercase again for skills, dedup hash and shingles) versus one
+PreparedDocument shared by NER, dedup and the embedding input.
+
+    python benchmarks/bench_preprocess.py [words] [repeat]
+
+Also checks that both paths produce the same entities, fingerprint and embedding text.
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import mongomock
+
+from corpus import make_job, make_resume_text
+from backend.matching.engine import MatchingEngine
+from backend.models.job import JobModel
+from backend.nlp.cleaner import TextCleaner
+from backend.nlp.dedup import DuplicateDetector
+from backend.nlp.document import PreparedDocument
+from backend.nlp.ner import EntityExtractor
+from backend.nlp.summarizer import SmartSummarizer
+
+def legacy_prepare(extractor, detector, raw_text):
+    # Previous upload path: every stage derives its own form of the text
+    clean_text = TextCleaner.clean_text(raw_text)
+    norm_text = TextCleaner.normalize_for_embedding(raw_text)
+    entities = extractor.extract(clean_text)
+    fingerprint = detector.fingerprint(clean_text) if detector is not None else None
+    return norm_text, entities, fingerprint
+
+def prepare(extractor, detector, raw_text):
+    document = PreparedDocument(raw_text)
+    entities = extractor.extract_document(document)
+    fingerprint = detector.fingerprint_document(document) if detector is not None else None
+    return document.embedding_text, entities, fingerprint
+
+def timeit(fn, texts, repeat):
+    start = time.process_time()
+    for _ in range(repeat):
+        for text in texts:
+            fn(text)
+    return (time.process_time() - start) / (repeat * len(texts))
+
+def check_same(extractor, detector, texts):
+    for text in texts:
+        old_norm, old_entities, old_fp = legacy_prepare(extractor, detector, text)
+        new_norm, new_entities, new_fp = prepare(extractor, detector, text)
+        assert old_norm == new_norm, "embedding text differs"
+        assert old_entities == new_entities, "entities differ"
+        assert old_fp == new_fp, "fingerprint differs"
+
+def run(words=800, repeat=20):
+    rng = random.Random(11)
+    extractor = EntityExtractor()
+    detector = DuplicateDetector(mongomock.MongoClient().bench.resumes)
+    texts = [make_resume_text(rng, words) for _ in range(20)]
+    check_same(extractor, detector, texts)
+
+    legacy = timeit(lambda t: legacy_prepare(extractor, detector, t), texts, repeat)
+    shared = timeit(lambda t: prepare(extractor, detector, t), texts, repeat)
+    # DEDUP_ENABLED=false: text handling only, without the MinHash signature arithmetic
+    legacy_text = timeit(lambda t: legacy_prepare(extractor, None, t), texts, repeat)
+    shared_text = timeit(lambda t: prepare(extractor, None, t), texts, repeat)
+
+    # Summaries: jobs stored before the normalized skill ids (fallback) versus stored ids
+    job = make_job(rng)
+    job["embedding"] = [1.0] * 8
+    stored_job = dict(job, **JobModel.normalized_skills(job["required_skills"], []))
+    document = PreparedDocument(texts[0])
+    extractor.extract_document(document)
+    resume = {"skills": document.skills, "skills_norm": document.skills_norm, "embedding": [1.0] * 8}
+    legacy_resume = {"skills": document.skills, "embedding": [1.0] * 8}
+
+    def summary(r, j):
+        return SmartSummarizer.generate_summary(r, j, MatchingEngine.calculate_score(r, j))
+    assert summary(legacy_resume, job) == summary(resume, stored_job), "summary differs"
+    summary_legacy = timeit(lambda _: summary(legacy_resume, job), range(200), repeat)
+    summary_stored = timeit(lambda _: summary(resume, stored_job), range(200), repeat)
+
+    print(f"{words}-word resumes, outputs identical")
+    for label, old, new in (("with dedup", legacy, shared), ("no dedup", legacy_text, shared_text)):
+        print(f"  {label:<11} legacy {old * 1000:8.3f} ms | shared {new * 1000:8.3f} ms CPU per upload"
+              f" | saved {(1 - new / old) * 100:5.1f}%")
+    print(f"  score+summary legacy docs {summary_legacy * 1e6:6.1f} us | stored ids {summary_stored * 1e6:6.1f} us")
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:3]]
+    run(*args)
@@ -0,0 +1,73 @@
+"""
+Compares the old per-skill re.search loop with the compiled SkillMatcher.
+
+    python benchmarks/bench_skill_matcher.py
+"""
+import os
+import random
+import re
+import string
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.nlp.ner import EntityExtractor
+from backend.nlp.skills import SkillMatcher
+
+def legacy_match(skill_list, text):
+    # Previous EntityExtractor behaviour: one compiled search per skill
+    text_lower = text.lower()
+    found = []
+    for skill in skill_list:
+        if re.search(r'\b' + re.escape(skill.lower()) + r'\b', text_lower):
+            found.append(skill)
+    return found
+
+def make_vocabulary(size, rng):
+    vocab = list(EntityExtractor.DEFAULT_SKILLS)
+    while len(vocab) < size:
+        words = rng.randint(1, 3)
+        vocab.append(" ".join("".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 9))) for _ in range(words)))
+    return vocab
+
+def make_resume(vocab, rng, words=800):
+    filler = ["experienced", "engineer", "built", "systems", "team", "with", "and", "in", "the", "led", "project"]
+    tokens = [rng.choice(filler) for _ in range(words)]
+    for skill in rng.sample(vocab, 30):
+        tokens.insert(rng.randrange(len(tokens)), skill)
+    return " ".join(tokens)
+
+def timeit(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+def run(sizes=(1000, 10000), repeat=5):
+    rng = random.Random(42)
+    results = []
+    for size in sizes:
+        vocab = make_vocabulary(size, rng)
+        text = make_resume(vocab, rng)
+
+        compile_start = time.perf_counter()
+        matcher = SkillMatcher(vocab)
+        compile_time = time.perf_counter() - compile_start
+
+        legacy = timeit(lambda: legacy_match(vocab, text), repeat)
+        compiled = timeit(lambda: matcher.match(text), repeat)
+        results.append({
+            "vocabulary": size,
+            "text_chars": len(text),
+            "legacy_ms": round(legacy * 1000, 3),
+            "compiled_ms": round(compiled * 1000, 3),
+            "compile_ms": round(compile_time * 1000, 3),
+            "speedup": round(legacy / compiled, 1) if compiled else None,
+        })
+    return results
+
+if __name__ == "__main__":
+    for row in run():
+        print(f"{row['vocabulary']:>6} skills | legacy {row['legacy_ms']:>9.3f} ms | "
+              f"compiled {row['compiled_ms']:>7.3f} ms | compile {row['compile_ms']:>8.3f} ms | x{row['speedup']}")
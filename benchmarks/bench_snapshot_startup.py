@@ -0,0 +1,74 @@
+"""
+Cold-start comparison: scanning every resume embedding out of MongoDB versus
+memory-mapping the EmbeddingSnapshot, and the private memory each worker's
+vector index needs on top (the snapshot's mapped pages are shared).
+
+    python benchmarks/bench_snapshot_startup.py [n_resumes]
+
+Uses MONGO_URI when reachable, otherwise the in-memory mongomock fallback.
+"""
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.database import db_instance
+from backend.models.vectors import embedding_meta, encode_embedding, load_matrix
+from backend.matching.index import FlatIndex
+from backend.matching.snapshot import EmbeddingSnapshot
+
+def seed(collection, n, dim=384, chunk=1000):
+    rng = np.random.default_rng(0)
+    for start in range(0, n, chunk):
+        size = min(chunk, n - start)
+        vectors = rng.random((size, dim), dtype=np.float32)
+        collection.insert_many([{"filename": f"bench-{start + i}.txt", "embedding": encode_embedding(v),
+                                 "embedding_meta": embedding_meta()}
+                                for i, v in enumerate(vectors)])
+
+def run(n=20000):
+    collection = db_instance.get_db().bench_snapshot_resumes
+    collection.drop()
+    seed(collection, n)
+
+    start = time.perf_counter()
+    ids, matrix = load_matrix(collection)
+    mongo_scan = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as directory:
+        snapshot = EmbeddingSnapshot(directory)
+        start = time.perf_counter()
+        snapshot.write_full(collection)
+        write_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        snap_ids, snap_matrix = snapshot.load()
+        float(np.asarray(snap_matrix).sum())  # touch every page
+        mmap_load = time.perf_counter() - start
+        assert len(snap_ids) == len(ids)
+
+        # What a worker holds privately: a copied index versus one searching the map in place
+        copied = FlatIndex()
+        copied.add([str(i) for i in ids], matrix)
+        mapped = FlatIndex()
+        mapped.load_normalized([str(i) for i in snap_ids], snap_matrix)
+        private_copy_mb = copied._vectors.nbytes / 2 ** 20
+        private_mapped_mb = mapped._vectors.nbytes / 2 ** 20
+
+    collection.drop()
+    return {
+        "resumes": n,
+        "mongo_scan_ms": round(mongo_scan * 1000, 1),
+        "snapshot_write_ms": round(write_time * 1000, 1),
+        "mmap_load_ms": round(mmap_load * 1000, 1),
+        "speedup": round(mongo_scan / mmap_load, 1) if mmap_load else None,
+        "index_private_mb_copied": round(private_copy_mb, 1),
+        "index_private_mb_mapped": round(private_mapped_mb, 1),
+    }
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    print(run(n))
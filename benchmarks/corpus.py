@@ -0,0 +1,140 @@
+"""
+Synthetic resume / job corpus for the benchmark suite.
+
+    python benchmarks/corpus.py <directory> [count] [words]
+
+Writes `count` resumes to <directory> cycling through txt, docx and pdf.
+Texts are deterministic for a given seed so runs are comparable.
+"""
+import os
+import random
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.nlp.ner import EntityExtractor
+
+FORMATS = ("txt", "docx", "pdf")
+
+FIRST_NAMES = ["Jane", "John", "Priya", "Wei", "Carlos", "Amara", "Lena", "Omar", "Sofia", "Kenji"]
+LAST_NAMES = ["Doe", "Smith", "Sharma", "Chen", "Garcia", "Okafor", "Novak", "Haddad", "Rossi", "Tanaka"]
+COMPANIES = ["Tech Corp", "DataWorks", "Cloudline", "Finverse", "MediSoft", "RetailHub"]
+DEGREES = ["Bachelor of Science in Computer Science", "Master of Engineering", "B.Tech in Information Technology",
+           "MBA", "PhD in Machine Learning"]
+FILLER = ["designed", "implemented", "scalable", "services", "collaborated", "with", "cross-functional", "teams",
+          "improved", "performance", "by", "reducing", "latency", "and", "mentored", "junior", "engineers",
+          "delivered", "features", "for", "customers", "using", "modern", "practices", "the", "in", "on"]
+
+def make_resume_text(rng, words=400, skills=None):
+    """
+    One plain-text resume of roughly `words` words with contact info, skills,
+    experience and education sections.
+    """
+    skills = skills or EntityExtractor.DEFAULT_SKILLS
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    chosen = rng.sample(skills, min(len(skills), rng.randint(4, 10)))
+    lines = [
+        name,
+        f"{name.lower().replace(' ', '.')}@example.com | +1 555 {rng.randint(100, 999)} {rng.randint(1000, 9999)}",
+        "",
+        "SKILLS",
+        ", ".join(chosen),
+        "",
+        "EXPERIENCE",
+    ]
+    body = []
+    while len(body) < words:
+        sentence = [rng.choice(FILLER) for _ in range(rng.randint(8, 16))]
+        sentence.insert(rng.randrange(len(sentence)), rng.choice(chosen))
+        body.extend(sentence)
+    for start in range(0, len(body), 40):
+        lines.append(f"Worked at {rng.choice(COMPANIES)}: " + " ".join(body[start:start + 40]) + ".")
+    lines += ["", "EDUCATION", rng.choice(DEGREES)]
+    return "\n".join(lines)
+
+def make_job(rng, skills=None):
+    skills = skills or EntityExtractor.DEFAULT_SKILLS
+    required = rng.sample(skills, min(len(skills), rng.randint(3, 6)))
+    return {
+        "title": f"{rng.choice(['Senior', 'Junior', 'Staff', 'Lead'])} {rng.choice(['Backend', 'Data', 'ML', 'Full Stack'])} Engineer",
+        "description": " ".join(rng.choice(FILLER) for _ in range(60)) + " " + " ".join(required),
+        "required_skills": required
+    }
+
+def write_txt(path, text):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+
+def write_docx(path, text):
+    import docx
+    document = docx.Document()
+    for line in text.split("\n"):
+        document.add_paragraph(line)
+    document.save(path)
+
+def _pdf_escape(line):
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+def write_pdf(path, text, lines_per_page=50, width=95):
+    """
+    Minimal text PDF (Helvetica, one content stream per page) written by hand
+    so the corpus needs no PDF authoring library.
+    """
+    lines = []
+    for line in text.split("\n"):
+        while len(line) > width:
+            lines.append(line[:width])
+            line = line[width:]
+        lines.append(line)
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[]]
+
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for page_lines in pages:
+        ops = ["BT", "/F1 10 Tf", "12 TL", "50 800 Td"]
+        ops += [f"({_pdf_escape(line.encode('latin-1', 'replace').decode('latin-1'))}) Tj T*" for line in page_lines]
+        ops.append("ET")
+        stream = "\n".join(ops)
+        objects.append(f"<< /Length {len(stream.encode('latin-1'))} >>\nstream\n{stream}\nendstream")
+        content_id = len(objects)
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode('latin-1')
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode('latin-1')
+    for offset in offsets:
+        out += f"{offset:010d} 00000 n \n".encode('latin-1')
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode('latin-1')
+    with open(path, 'wb') as f:
+        f.write(out)
+
+WRITERS = {"txt": write_txt, "docx": write_docx, "pdf": write_pdf}
+
+def write_corpus(directory, count=30, words=400, formats=FORMATS, seed=42):
+    """
+    Write `count` resumes, cycling through `formats`.
+    returns: [(path, fmt)]
+    """
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+    files = []
+    for i in range(count):
+        fmt = formats[i % len(formats)]
+        path = os.path.join(directory, f"resume-{i:05d}.{fmt}")
+        WRITERS[fmt](path, make_resume_text(rng, words))
+        files.append((path, fmt))
+    return files
+
+if __name__ == "__main__":
+    target = sys.argv[1]
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+    words = int(sys.argv[3]) if len(sys.argv) > 3 else 400
+    for path, _ in write_corpus(target, count, words):
+        print(path)
@@ -0,0 +1,196 @@
+"""
+Concurrent upload load test: sync mode (Flask on a fixed worker pool) vs the
+async mode (asgi.py).
+
+    python benchmarks/load_test.py [--requests 300] [--sync-threads 8] [--concurrency 200]
+                                   [--embed-latency 0.5] [--out load.json]
+
+Both apps run in-process against mongomock, and the remote embedding backend is
+pointed at a local stub that answers after --embed-latency seconds. That wait is
+what ties up a sync worker. --sync-threads stands in for the threads of a
+gunicorn/uwsgi deployment. HTTP server overhead is left out for both modes.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from corpus import make_resume_text
+from run_suite import git_revision
+
+BOUNDARY = "loadtestboundary"
+
+def start_embedding_stub(latency):
+    """
+    Stand-in for the HF feature-extraction endpoint: one 384-dim vector per input after `latency` seconds.
+    """
+    responses = {}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            inputs = body["inputs"] if isinstance(body["inputs"], list) else [body["inputs"]]
+            time.sleep(latency)
+            data = responses.get(len(inputs))
+            if data is None:
+                # Encoded once per batch size, so the stub adds little CPU to the measurement
+                rng = np.random.default_rng(len(inputs))
+                data = responses[len(inputs)] = json.dumps(rng.random((len(inputs), 384)).round(5).tolist()).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    class Server(ThreadingHTTPServer):
+        daemon_threads = True
+        request_queue_size = 1024  # hundreds of concurrent connects
+
+    server = Server(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/embed"
+
+def multipart(filename, content):
+    body = (f"--{BOUNDARY}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"{filename}\"\r\n"
+            f"Content-Type: text/plain\r\n\r\n").encode() + content + f"\r\n--{BOUNDARY}--\r\n".encode()
+    return body
+
+def load_apps(workdir, embed_url, concurrency):
+    """
+    Import app.py and asgi.py against mongomock with synchronous ingestion and the stub endpoint.
+    """
+    import mongomock
+    from backend.config import Config
+    from backend.database import db_instance
+
+    Config.UPLOAD_FOLDER = os.path.join(workdir, "uploads")
+    os.makedirs(Config.UPLOAD_FOLDER, exist_ok=True)
+    Config.BLOB_DIR = os.path.join(workdir, "uploads", "blobs")
+    Config.ASYNC_INGEST = False
+    Config.EMBEDDING_BACKEND = "remote"
+    Config.HF_API_URL = embed_url
+    Config.EMBED_CACHE_ENABLED = False
+    Config.EMBED_MAX_RETRIES = 0
+    Config.EMBED_POOL_SIZE = max(concurrency, Config.EMBED_POOL_SIZE)
+    Config.SNAPSHOT_ENABLED = False
+    Config.TASK_RECOVER_ON_START = False
+    db_instance.client = mongomock.MongoClient()
+    db_instance.db = db_instance.client.get_database('resume_screener_load')
+
+    import app as app_module
+    import asgi
+    return app_module, asgi
+
+def run_sync(app_module, bodies, threads):
+    content_type = f"multipart/form-data; boundary={BOUNDARY}"
+
+    def upload(body):
+        start = time.perf_counter()
+        response = app_module.app.test_client().post('/api/upload-resume', data=body, content_type=content_type)
+        return time.perf_counter() - start, response.status_code
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        results = list(pool.map(upload, bodies))
+    return results, time.perf_counter() - start
+
+def run_async(asgi, bodies, concurrency):
+    async def upload(body, limit):
+        async with limit:
+            start = time.perf_counter()
+            scope = {
+                "type": "http", "method": "POST", "path": "/api/upload-resume", "query_string": b"",
+                "http_version": "1.1", "scheme": "http", "server": ("127.0.0.1", 5000), "client": ("127.0.0.1", 0),
+                "headers": [(b"content-type", f"multipart/form-data; boundary={BOUNDARY}".encode()),
+                            (b"content-length", str(len(body)).encode())],
+            }
+            messages = [{"type": "http.request", "body": body, "more_body": False}]
+            status = []
+
+            async def receive():
+                return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+            async def send(message):
+                if message["type"] == "http.response.start":
+                    status.append(message["status"])
+
+            await asgi.application(scope, receive, send)
+            return time.perf_counter() - start, status[0]
+
+    async def main():
+        limit = asyncio.Semaphore(concurrency)
+        return await asyncio.gather(*(upload(body, limit) for body in bodies))
+
+    start = time.perf_counter()
+    results = asyncio.run(main())
+    return results, time.perf_counter() - start
+
+def summarize(results, elapsed):
+    latencies = np.asarray([latency for latency, _ in results]) * 1000
+    ok = sum(1 for _, status in results if status == 201)
+    return {"requests": len(results), "ok": ok, "seconds": round(elapsed, 3),
+            "throughput_rps": round(len(results) / elapsed, 2),
+            "p50_ms": round(float(np.percentile(latencies, 50)), 1), "p95_ms": round(float(np.percentile(latencies, 95)), 1)}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--sync-threads", type=int, default=8)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--embed-latency", type=float, default=0.5, help="seconds per embedding call")
+    parser.add_argument("--out")
+    args = parser.parse_args()
+
+    stub, url = start_embedding_stub(args.embed_latency)
+    workdir = tempfile.mkdtemp(prefix="load-test-")
+    app_module, asgi = load_apps(workdir, url, args.concurrency)
+    rng = random.Random(5)
+    bodies = {mode: [multipart(f"{mode}_{i}.txt", make_resume_text(rng, 300).encode('utf-8')) for i in range(args.requests)]
+              for mode in ("sync", "async")}
+
+    # One upload each first, so model / DB / component loading isn't timed
+    run_sync(app_module, [multipart("warm_sync.txt", b"warm up python flask")], 1)
+    run_async(asgi, [multipart("warm_async.txt", b"warm up docker sql")], 1)
+
+    report = {
+        "sync": summarize(*run_sync(app_module, bodies["sync"], args.sync_threads)),
+        "async": summarize(*run_async(asgi, bodies["async"], args.concurrency)),
+    }
+    report["speedup"] = round(report["async"]["throughput_rps"] / report["sync"]["throughput_rps"], 2)
+    stub.shutdown()
+
+    print(f"{args.requests} uploads, embedding latency {args.embed_latency * 1000:.0f} ms")
+    for mode, label in (("sync", f"sync ({args.sync_threads} threads)"), ("async", f"async (concurrency {args.concurrency})")):
+        r = report[mode]
+        print(f"  {label:<26} {r['throughput_rps']:>8.1f} req/s   p50 {r['p50_ms']:>8.1f} ms   "
+              f"p95 {r['p95_ms']:>8.1f} ms   ok {r['ok']}/{r['requests']}")
+    print(f"  async / sync throughput: x{report['speedup']}")
+
+    if args.out:
+        report["meta"] = {"timestamp": datetime.utcnow().isoformat(), "git": git_revision(),
+                          "python": platform.python_version(), "platform": platform.platform(), "args": vars(args)}
+        with open(args.out, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+"""
+Benchmark suite for the ingestion and matching hot paths.
+
+    python benchmarks/run_suite.py [--quick] [--only micro|e2e] [--out results.json]
+                                   [--compare baseline.json] [--threshold 0.2]
+
+Micro-benchmarks time the NLP / matching functions directly; end-to-end runs
+drive the Flask endpoints through the test client against in-memory mongomock.
+Embeddings are replaced by deterministic vectors so no network call is timed.
+Results are written as JSON; with --compare, any benchmark whose median got
+slower than baseline * (1 + threshold) is flagged and the exit code is 1.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+from datetime import datetime
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from corpus import FORMATS, make_job, make_resume_text, write_corpus
+
+def measure(fn, repeat=20, warmup=2, items=1):
+    """
+    Time `fn` `repeat` times after `warmup` untimed calls.
+    items: units of work per call, for throughput.
+    """
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    samples = np.asarray(samples) * 1000
+    median = float(np.median(samples))
+    return {
+        "n": repeat,
+        "median_ms": round(median, 4),
+        "p95_ms": round(float(np.percentile(samples, 95)), 4),
+        "mean_ms": round(float(samples.mean()), 4),
+        "items_per_sec": round(items * 1000 / median, 2) if median else None,
+    }
+
+def fake_embedding(text, dim=384):
+    # Deterministic per text, so cache/dedup behave as with a real model
+    rng = np.random.default_rng(zlib.crc32(text.encode('utf-8')))
+    vector = rng.standard_normal(dim).astype(np.float32)
+    return (vector / np.linalg.norm(vector)).tolist()
+
+def micro_benchmarks(workdir, quick=False):
+    from backend.nlp.cleaner import TextCleaner
+    from backend.nlp.document import PreparedDocument
+    from backend.nlp.ner import EntityExtractor
+    from backend.nlp.parser import ResumeParser
+    from backend.nlp.summarizer import SmartSummarizer
+    from backend.matching.engine import MatchingEngine
+    from backend.models.job import JobModel
+
+    rng = random.Random(7)
+    repeat = 5 if quick else 30
+    results = {}
+    extractor = EntityExtractor()
+
+    for words in (300, 1500):
+        text = make_resume_text(rng, words)
+        clean = TextCleaner.clean_text(text)
+        results[f"micro.clean_text.{words}w"] = measure(lambda: TextCleaner.clean_text(text), repeat)
+        results[f"micro.extract.{words}w"] = measure(lambda: extractor.extract(clean), repeat)
+        results[f"micro.prepare_document.{words}w"] = measure(
+            lambda: extractor.extract_document(PreparedDocument(text)), repeat)
+
+    files = write_corpus(os.path.join(workdir, "parse"), count=len(FORMATS), words=800)
+    for path, fmt in files:
+        results[f"micro.parse.{fmt}"] = measure(lambda: ResumeParser.parse(path), repeat)
+
+    text = make_resume_text(rng, 600)
+    document = PreparedDocument(text)
+    entities = extractor.extract_document(document)
+    resume = {"filename": "r.txt", "skills": entities.get("SKILL", []), "skills_norm": document.skills_norm,
+              "education": entities.get("EDU", []), "experience": entities.get("ORG", []),
+              "embedding": fake_embedding(text)}
+    job = make_job(rng)
+    job.update(JobModel.normalized_skills(job["required_skills"], []))
+    job["embedding"] = fake_embedding(job["description"])
+    results["micro.calculate_score"] = measure(lambda: MatchingEngine.calculate_score(resume, job), repeat * 10)
+    score = MatchingEngine.calculate_score(resume, job)
+    results["micro.generate_summary"] = measure(lambda: SmartSummarizer.generate_summary(resume, job, score), repeat * 10)
+
+    pool = [dict(resume, embedding=fake_embedding(str(i))) for i in range(200 if quick else 2000)]
+    results[f"micro.score_batch.{len(pool)}"] = measure(lambda: MatchingEngine.score_batch(job, pool), repeat,
+                                                        items=len(pool))
+    return results
+
+def load_app(workdir):
+    """
+    Import app.py against a fresh mongomock database with synchronous ingestion.
+    """
+    import mongomock
+    from backend.config import Config
+    from backend.database import db_instance
+    from backend.models.vectors import embedding_meta
+
+    Config.UPLOAD_FOLDER = os.path.join(workdir, "uploads")
+    os.makedirs(Config.UPLOAD_FOLDER, exist_ok=True)
+    Config.BLOB_DIR = os.path.join(workdir, "uploads", "blobs")
+    Config.ASYNC_INGEST = False
+    Config.EMBED_CACHE_ENABLED = False
+    Config.SNAPSHOT_ENABLED = False
+    Config.TASK_RECOVER_ON_START = False
+    db_instance.client = mongomock.MongoClient()
+    db_instance.db = db_instance.client.get_database('resume_screener_bench')
+
+    import app as app_module
+    app_module.embedder.embed = lambda text: (fake_embedding(text), embedding_meta())
+    app_module.embedder.embed_many = lambda texts: ([fake_embedding(t) for t in texts], [embedding_meta() for _ in texts])
+    return app_module
+
+def e2e_benchmarks(workdir, quick=False):
+    app_module = load_app(workdir)
+    client = app_module.app.test_client()
+    rng = random.Random(11)
+    uploads = 10 if quick else 100
+    bulk = 20 if quick else 200
+
+    texts = [make_resume_text(rng, 400).encode('utf-8') for _ in range(uploads + bulk)]
+    results = {}
+
+    counter = iter(range(uploads))
+    def upload_one():
+        i = next(counter)
+        response = client.post('/api/upload-resume', data={'file': (io.BytesIO(texts[i]), f'r{i}.txt')})
+        assert response.status_code in (200, 201), response.get_json()
+    results["e2e.upload_resume"] = measure(upload_one, repeat=uploads, warmup=0)
+
+    def upload_bulk():
+        files = [(io.BytesIO(t), f'b{i}.txt') for i, t in enumerate(texts[uploads:])]
+        response = client.post('/api/upload-resumes', data={'files': files}, content_type='multipart/form-data')
+        assert response.status_code == 201, response.get_json()
+    results[f"e2e.upload_resumes.{bulk}"] = measure(upload_bulk, repeat=1, warmup=0, items=bulk)
+
+    jobs = [make_job(rng) for _ in range(5)]
+    job_ids = []
+    def add_job():
+        response = client.post('/api/add-job', json=jobs[len(job_ids) % len(jobs)])
+        job_ids.append(response.get_json()['id'])
+    results["e2e.add_job"] = measure(add_job, repeat=len(jobs), warmup=0)
+
+    repeat = 5 if quick else 20
+    results["e2e.match_candidates"] = measure(
+        lambda: client.get(f'/api/match-candidates/{job_ids[0]}?limit=20'), repeat)
+    results["e2e.candidates_page"] = measure(lambda: client.get('/api/candidates?limit=50'), repeat)
+    results["e2e.analytics"] = measure(lambda: client.get('/api/analytics'), repeat)
+    return results
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return None
+
+def compare(current, baseline, threshold):
+    """
+    returns: list of (name, baseline_ms, current_ms, ratio, regressed)
+    """
+    rows = []
+    for name, result in sorted(current.items()):
+        before = baseline.get(name)
+        if not before or not before.get("median_ms"):
+            continue
+        ratio = result["median_ms"] / before["median_ms"]
+        rows.append((name, before["median_ms"], result["median_ms"], ratio, ratio > 1 + threshold))
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--quick", action="store_true", help="fewer repetitions / smaller corpus")
+    parser.add_argument("--only", choices=["micro", "e2e"])
+    parser.add_argument("--out", default=os.path.join(ROOT, "benchmarks", "results",
+                                                      datetime.utcnow().strftime("%Y%m%dT%H%M%S") + ".json"))
+    parser.add_argument("--compare", help="baseline results JSON")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed median slowdown (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="bench-") as workdir:
+        if args.only in (None, "micro"):
+            results.update(micro_benchmarks(workdir, args.quick))
+        if args.only in (None, "e2e"):
+            results.update(e2e_benchmarks(workdir, args.quick))
+
+    report = {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat(),
+            "git": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "quick": args.quick,
+        },
+        "results": results,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    with open(args.out, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    for name, result in sorted(results.items()):
+        print(f"{name:<36} median {result['median_ms']:>10.3f} ms | p95 {result['p95_ms']:>10.3f} ms | "
+              f"{result['items_per_sec']} /s")
+    print(f"\nResults written to {args.out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        rows = compare(results, baseline, args.threshold)
+        regressions = [row for row in rows if row[4]]
+        print(f"\nCompared with {args.compare} (threshold {args.threshold:.0%}):")
+        for name, before, after, ratio, regressed in rows:
+            print(f"{'REGRESSION' if regressed else 'ok':<10} {name:<36} {before:>10.3f} -> {after:>10.3f} ms (x{ratio:.2f})")
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Cold-start report for the serverless entry point.
+
+    python benchmarks/startup_report.py [--runs 5] [--top 15] [--out startup.json] [--compare baseline.json]
+
+Each run imports `app` in a fresh interpreter under `python -X importtime`,
+then times the first request and warm_up(). Prints the slowest imports
+(cumulative) and self time per top-level package; the JSON uses the same
+layout as run_suite.py, so --compare flags regressions the same way.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+from collections import defaultdict
+from datetime import datetime
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from run_suite import compare, git_revision
+
+CHILD = """
+import json, sys, time
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+app.app.test_client().get('/api/jobs?limit=1')
+first_request = time.perf_counter()
+components = app.warm_up()
+warmed = time.perf_counter()
+print(json.dumps({{
+    "import_app": imported - start,
+    "first_request": first_request - imported,
+    "warm_up_rest": warmed - first_request,
+    "components": components
+}}))
+"""
+
+def parse_importtime(stderr):
+    """
+    `-X importtime` lines -> [(module, self_us, cumulative_us)]
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+def run_once():
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", CHILD.format(root=ROOT)],
+                            cwd=ROOT, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr[-2000:])
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    return timings, parse_importtime(result.stderr)
+
+def summarize(samples):
+    values = np.asarray(samples) * 1000
+    median = float(np.median(values))
+    return {"n": len(values), "median_ms": round(median, 3), "p95_ms": round(float(np.percentile(values, 95)), 3),
+            "mean_ms": round(float(values.mean()), 3), "items_per_sec": round(1000 / median, 2) if median else None}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--out")
+    parser.add_argument("--compare", help="baseline startup JSON")
+    parser.add_argument("--threshold", type=float, default=0.2)
+    args = parser.parse_args()
+
+    stages = defaultdict(list)
+    components = defaultdict(list)
+    imports = None
+    for _ in range(args.runs):
+        timings, rows = run_once()
+        for key in ("import_app", "first_request", "warm_up_rest"):
+            stages[key].append(timings[key])
+        for name, seconds in timings["components"].items():
+            components[name].append(seconds)
+        imports = imports or rows  # the first run is the coldest (no OS file cache help after it)
+
+    print(f"Slowest imports (cumulative, first run):")
+    for name, self_us, cumulative_us in sorted(imports, key=lambda r: r[2], reverse=True)[:args.top]:
+        print(f"  {cumulative_us / 1000:>9.1f} ms  {name}")
+    packages = defaultdict(int)
+    for name, self_us, _ in imports:
+        packages[name.split(".")[0]] += self_us
+    print(f"\nSelf time by top-level package:")
+    for name, self_us in sorted(packages.items(), key=lambda p: p[1], reverse=True)[:args.top]:
+        print(f"  {self_us / 1000:>9.1f} ms  {name}")
+
+    results = {f"startup.{key}": summarize(samples) for key, samples in stages.items()}
+    results.update({f"startup.component.{name}": summarize(samples) for name, samples in components.items()})
+    print(f"\nMedian over {args.runs} runs:")
+    for name, result in sorted(results.items()):
+        print(f"  {name:<40} {result['median_ms']:>10.1f} ms")
+
+    report = {
+        "meta": {"timestamp": datetime.utcnow().isoformat(), "git": git_revision(),
+                 "python": platform.python_version(), "platform": platform.platform(), "runs": args.runs},
+        "results": results,
+        "imports": [{"module": name, "self_us": s, "cumulative_us": c} for name, s, c in imports],
+    }
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        rows = compare(results, baseline, args.threshold)
+        print(f"\nCompared with {args.compare} (threshold {args.threshold:.0%}):")
+        for name, before, after, ratio, regressed in rows:
+            print(f"{'REGRESSION' if regressed else 'ok':<10} {name:<40} {before:>10.1f} -> {after:>10.1f} ms (x{ratio:.2f})")
+        if any(row[4] for row in rows):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
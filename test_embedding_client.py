@@ -0,0 +1,297 @@
+import sys
+import os
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Ensure src can be imported
+sys.path.append(os.getcwd())
+
+from backend.nlp.remote_client import CircuitBreaker, CircuitOpenError, RemoteEmbeddingClient, RemoteEmbeddingError
+
+class StubInferenceAPI:
+    """
+    Local stand-in for the HF feature-extraction endpoint.
+    Each request pops the next behaviour from `script` (the last one repeats):
+    "ok" (one 4-dim vector per input), "tokens" (token-level output), "chunked"
+    (a 200 with a malformed chunked body), "error200" (a 200 with an {"error": ...}
+    object), an HTTP status code, or ("hang", seconds).
+    """
+    def __init__(self, script=("ok",)):
+        self.script = list(script)
+        self.requests = []  # (client port, inputs) per request
+        self.lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                inputs = body["inputs"] if isinstance(body["inputs"], list) else [body["inputs"]]
+                with stub.lock:
+                    stub.requests.append((self.client_address[1], inputs))
+                    action = stub.script.pop(0) if len(stub.script) > 1 else stub.script[0]
+                if isinstance(action, tuple):
+                    time.sleep(action[1])
+                    action = "ok"
+                if action == "chunked":
+                    return self._broken_chunked()
+                if action == "ok":
+                    self._reply(200, [[float(len(text)), 1.0, 0.0, 0.0] for text in inputs])
+                elif action == "tokens":
+                    self._reply(200, [[[1.0, 0.0], [3.0, 2.0]] for _ in inputs])
+                elif action == "error200":
+                    self._reply(200, {"error": "Model is currently loading"})
+                else:
+                    self._reply(action, {"error": "stub failure"})
+
+            def _broken_chunked(self):
+                # Invalid chunk size: the client fails while reading the body
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                self.wfile.write(b"zz\r\n[[1.0]]\r\n")
+                self.close_connection = True
+
+            def _reply(self, status, payload):
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                try:
+                    self.wfile.write(data)
+                except OSError:
+                    pass  # client gave up (timeout test)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/embed"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+def make_client(stub, **kwargs):
+    options = {"connect_timeout": 1, "read_timeout": 2, "max_retries": 2, "backoff_base": 0.01, "backoff_max": 0.05}
+    options.update(kwargs)
+    return RemoteEmbeddingClient(stub.url, "test-key", **options)
+
+def test_batch_in_one_request():
+    stub = StubInferenceAPI()
+    client = make_client(stub)
+    try:
+        vectors = client.embed_batch(["a", "bb", "ccc"])
+        assert vectors == [[1.0, 1.0, 0.0, 0.0], [2.0, 1.0, 0.0, 0.0], [3.0, 1.0, 0.0, 0.0]]
+        assert len(stub.requests) == 1 and stub.requests[0][1] == ["a", "bb", "ccc"]
+    finally:
+        client.close()
+        stub.close()
+
+def test_token_level_output_is_mean_pooled():
+    stub = StubInferenceAPI(["tokens"])
+    client = make_client(stub)
+    try:
+        assert client.embed_batch(["x", "y"]) == [[2.0, 1.0], [2.0, 1.0]]
+    finally:
+        client.close()
+        stub.close()
+
+def test_connection_reused():
+    stub = StubInferenceAPI()
+    client = make_client(stub)
+    try:
+        for i in range(5):
+            client.embed_batch([f"text {i}"])
+        ports = {port for port, _ in stub.requests}
+        assert len(stub.requests) == 5 and len(ports) == 1, ports
+    finally:
+        client.close()
+        stub.close()
+
+def test_retries_transient_errors():
+    stub = StubInferenceAPI([503, 429, "ok"])
+    client = make_client(stub)
+    try:
+        assert client.embed_batch(["abc"]) == [[3.0, 1.0, 0.0, 0.0]]
+        assert len(stub.requests) == 3
+        assert client.breaker.state == CircuitBreaker.CLOSED
+    finally:
+        client.close()
+        stub.close()
+
+def test_no_retry_on_client_error():
+    stub = StubInferenceAPI([400, "ok"])
+    client = make_client(stub)
+    try:
+        try:
+            client.embed_batch(["abc"])
+            assert False, "expected RemoteEmbeddingError"
+        except RemoteEmbeddingError as e:
+            assert "400" in str(e)
+        assert len(stub.requests) == 1
+    finally:
+        client.close()
+        stub.close()
+
+def test_read_timeout():
+    stub = StubInferenceAPI([("hang", 1.5)])
+    client = make_client(stub, read_timeout=0.3, max_retries=1)
+    try:
+        start = time.perf_counter()
+        try:
+            client.embed_batch(["abc"])
+            assert False, "expected RemoteEmbeddingError"
+        except RemoteEmbeddingError as e:
+            assert "Timeout" in str(e), e
+        # two attempts of ~0.3 s each, nowhere near the 1.5 s hang
+        assert time.perf_counter() - start < 1.2
+    finally:
+        client.close()
+        stub.close()
+
+def test_breaker_opens_and_fails_fast():
+    stub = StubInferenceAPI([500])
+    client = make_client(stub, max_retries=0, breaker=CircuitBreaker(failure_threshold=3, reset_timeout=60))
+    try:
+        for _ in range(3):
+            try:
+                client.embed_batch(["abc"])
+            except CircuitOpenError:
+                assert False, "opened too early"
+            except RemoteEmbeddingError:
+                pass
+        assert client.breaker.state == CircuitBreaker.OPEN
+        try:
+            client.embed_batch(["abc"])
+            assert False, "expected CircuitOpenError"
+        except CircuitOpenError:
+            pass
+        assert len(stub.requests) == 3  # the open circuit sent nothing
+    finally:
+        client.close()
+        stub.close()
+
+def test_breaker_half_open_recovery():
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=lambda: now[0])
+    stub = StubInferenceAPI([500, 500, "ok"])
+    client = make_client(stub, max_retries=0, breaker=breaker)
+    try:
+        for _ in range(2):
+            try:
+                client.embed_batch(["abc"])
+            except CircuitOpenError:
+                assert False, "circuit should allow the call"
+            except RemoteEmbeddingError:
+                pass
+            assert breaker.state == CircuitBreaker.OPEN
+            now[0] += 10  # reset timeout elapses -> one trial call (fails first time)
+        assert client.embed_batch(["abc"]) == [[3.0, 1.0, 0.0, 0.0]]
+        assert breaker.state == CircuitBreaker.CLOSED
+        assert len(stub.requests) == 3
+    finally:
+        client.close()
+        stub.close()
+
+def test_half_open_allows_single_trial():
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=5, clock=lambda: now[0])
+    breaker.record_failure()
+    assert not breaker.allow()
+    now[0] = 5
+    assert breaker.allow()
+    assert not breaker.allow()  # trial already in flight
+    breaker.record_success()
+    assert breaker.allow()
+
+def test_error_object_with_200():
+    stub = StubInferenceAPI(["error200"])
+    client = make_client(stub)
+    try:
+        for texts in (["abc"], ["abc", "de"]):
+            try:
+                client.embed_batch(texts)
+                assert False, "expected RemoteEmbeddingError"
+            except RemoteEmbeddingError as e:
+                assert "currently loading" in str(e)
+    finally:
+        client.close()
+        stub.close()
+
+def test_breaker_released_on_other_request_errors():
+    # A ChunkedEncodingError is neither ConnectionError nor Timeout; the half-open
+    # trial must still be recorded as a failure, or the circuit never closes again
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=lambda: now[0])
+    stub = StubInferenceAPI([500, "chunked", "ok"])
+    client = make_client(stub, max_retries=0, breaker=breaker)
+    try:
+        for _ in range(2):
+            try:
+                client.embed_batch(["abc"])
+                assert False, "expected RemoteEmbeddingError"
+            except CircuitOpenError:
+                assert False, "circuit should allow the call"
+            except RemoteEmbeddingError:
+                pass
+            assert breaker.state == CircuitBreaker.OPEN
+            now[0] += 11
+        assert client.embed_batch(["abc"]) == [[3.0, 1.0, 0.0, 0.0]]
+        assert breaker.state == CircuitBreaker.CLOSED
+    finally:
+        client.close()
+        stub.close()
+
+def test_async_breaker_released_on_other_http_errors():
+    import asyncio
+    from backend.nlp.remote_client import AsyncRemoteEmbeddingClient
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=lambda: now[0])
+    stub = StubInferenceAPI([500, "chunked", "ok"])
+
+    async def scenario():
+        client = AsyncRemoteEmbeddingClient(stub.url, "test-key", max_retries=0, breaker=breaker)
+        try:
+            for _ in range(2):
+                try:
+                    await client.embed_batch(["abc"])
+                    assert False, "expected RemoteEmbeddingError"
+                except CircuitOpenError:
+                    assert False, "circuit should allow the call"
+                except RemoteEmbeddingError:
+                    pass
+                assert breaker.state == CircuitBreaker.OPEN
+                now[0] += 11
+            assert await client.embed_batch(["abc"]) == [[3.0, 1.0, 0.0, 0.0]]
+            assert breaker.state == CircuitBreaker.CLOSED
+        finally:
+            await client.close()
+    try:
+        asyncio.run(scenario())
+    finally:
+        stub.close()
+
+def run_test():
+    print("=== Remote Embedding Client Tests ===")
+    tests = [(name, fn) for name, fn in globals().items() if name.startswith("test_") and callable(fn)]
+    failed = 0
+    for name, fn in tests:
+        try:
+            fn()
+            print(f"PASS {name}")
+        except Exception as e:
+            failed += 1
+            print(f"FAIL {name}: {type(e).__name__}: {e}")
+    print(f"\n{len(tests) - failed}/{len(tests)} passed")
+    return failed == 0
+
+if __name__ == "__main__":
+    sys.exit(0 if run_test() else 1)
@@ -10,6 +10,7 @@ from backend.nlp.embedder import ResumeEmbedder
 from backend.matching.engine import MatchingEngine
 from backend.models.resume import ResumeModel
 from backend.models.job import JobModel
+from backend.models.vectors import decode_embedding
 
 def run_test():
     print("=== Starting System Verification ===")
@@ -42,7 +43,7 @@ def run_test():
     
     resume_data = ResumeModel.create("test_resume.pdf", resume_text, clean_text, entities, res_embed)
     print(f"   -> Extracted Skills: {resume_data['skills']}")
-    print(f"   -> Embedding Shape: {len(resume_data['embedding'])}")
+    print(f"   -> Embedding Shape: {decode_embedding(resume_data['embedding']).shape}")
     
     # 4. Process Job
     print("\n[4] Processing Job...")
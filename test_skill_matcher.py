@@ -0,0 +1,48 @@
+import sys
+import os
+
+# Ensure src can be imported
+sys.path.append(os.getcwd())
+
+from backend.nlp.skills import SkillMatcher
+
+def legacy_match(skills, text):
+    # Baseline behaviour: one word-bounded search per skill
+    import re
+    return [s for s in skills if re.search(r'(?<!\w)' + re.escape(s.lower()) + r'(?!\w)', text.lower())]
+
+def test_nested_prefixes_are_reported():
+    skills = ['Java', 'Java EE', 'Machine', 'Machine Learning', 'Learning', 'JavaScript', 'SQL']
+    text = 'I know Java EE and machine learning, plus some SQL.'
+    assert SkillMatcher(skills).match(text) == ['Java', 'Java EE', 'Machine', 'Machine Learning', 'Learning', 'SQL']
+    assert SkillMatcher(skills).match(text) == legacy_match(skills, text)
+
+def test_prefix_needs_word_boundary():
+    # 'java' is a prefix of 'javascript' but not a word in it
+    assert SkillMatcher(['Java', 'JavaScript']).match('Senior JavaScript developer') == ['JavaScript']
+
+def test_three_level_nesting():
+    skills = ['Google', 'Google Cloud', 'Google Cloud Platform', 'Cloud']
+    assert SkillMatcher(skills).match('Deployed on Google Cloud Platform') == skills
+
+def test_symbols_and_cleaned_forms():
+    matcher = SkillMatcher(['C', 'C++', 'CI/CD', 'Next.js'])
+    assert matcher.match('C++ and CI/CD with Next.js') == ['C', 'C++', 'CI/CD', 'Next.js']
+    assert matcher.match('cicd pipelines') == ['CI/CD']
+
+def run_test():
+    print("=== Skill Matcher Tests ===")
+    tests = [(name, fn) for name, fn in globals().items() if name.startswith("test_") and callable(fn)]
+    failed = 0
+    for name, fn in tests:
+        try:
+            fn()
+            print(f"PASS {name}")
+        except Exception as e:
+            failed += 1
+            print(f"FAIL {name}: {type(e).__name__}: {e}")
+    print(f"\n{len(tests) - failed}/{len(tests)} passed")
+    return failed == 0
+
+if __name__ == "__main__":
+    sys.exit(0 if run_test() else 1)